@@ -0,0 +1,192 @@
+"""
+Benchmark flattening, unflattening and merging synthetic OCDS release histories.
+
+The releases are generated from the fixtures under ``tests/fixtures/1.1``, and the merge rules are determined from the
+release schema under ``tests/fixtures``, so that the benchmark runs offline. For example, from the repository's root:
+
+    python benchmarks/benchmark.py --ocids 100 --releases 20 --array-length 10 --no-id-fraction 0.2
+"""
+
+import argparse
+import copy
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from glob import glob
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ocdsmerge import CompiledRelease, DirectCompiledRelease, VersionedRelease
+from ocdsmerge.flatten import PathInterner, compile_rules, flatten_with_rules, unflatten
+from ocdsmerge.rules import get_merge_rules
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests", "fixtures")
+SCHEMA = os.path.join(FIXTURES, "release-schema-1__1__4.json")
+START = datetime(2020, 1, 1, tzinfo=timezone.utc)
+OPERATIONS = ("flatten", "unflatten", "compiled", "direct", "versioned")
+
+
+def build_template():
+    """Return a release that combines the fields of the compiled releases in the fixtures."""
+    template = {}
+    for filename in sorted(glob(os.path.join(FIXTURES, "1.1", "*-compiled.json"))):
+        with open(filename) as f:
+            compiled_release = json.load(f)
+        template.update(
+            (key, value) for key, value in compiled_release.items() if key not in {"ocid", "id", "date", "tag"}
+        )
+    return template
+
+
+def generate_releases(template, rng, *, ocids, releases, array_length, depth, no_id_fraction, change_fraction):
+    """Return a list of lists of releases, one list per OCID."""
+    groups = []
+    for i in range(ocids):
+        ocid = f"ocds-213czf-{i:06d}"
+        group = []
+        for j in range(releases):
+            release = copy.deepcopy(template)
+            _expand(release, rng, j, array_length, no_id_fraction, change_fraction)
+            if depth:
+                release["nested"] = _nest(depth, array_length, j)
+            release["ocid"] = ocid
+            release["id"] = f"{ocid}-{j}"
+            release["date"] = (START + timedelta(days=j)).isoformat().replace("+00:00", "Z")
+            release["tag"] = ["update"]
+            group.append(release)
+        groups.append(group)
+    return groups
+
+
+def _expand(data, rng, version, array_length, no_id_fraction, change_fraction):
+    # Resize arrays of objects, remove some `id` values, and change some literal values.
+    for key, value in data.items():
+        if isinstance(value, dict):
+            _expand(value, rng, version, array_length, no_id_fraction, change_fraction)
+        elif isinstance(value, list) and value and all(isinstance(item, dict) for item in value):
+            items = []
+            for k in range(array_length):
+                item = copy.deepcopy(value[k % len(value)])
+                if rng.random() < no_id_fraction:
+                    item.pop("id", None)
+                else:
+                    item["id"] = str(k)
+                _expand(item, rng, version, array_length, no_id_fraction, change_fraction)
+                items.append(item)
+            data[key] = items
+        elif isinstance(value, str) and key != "id" and rng.random() < change_fraction:
+            data[key] = f"{value} {version}"
+
+
+def _nest(depth, array_length, version):
+    node = {"value": version}
+    for level in range(depth):
+        node = {
+            "level": level,
+            "value": version,
+            "child": node,
+            "items": [{"id": str(k), "value": version} for k in range(array_length)],
+        }
+    return node
+
+
+def measure(function, repeat):
+    """Return the fastest time and the peak memory (in bytes) of calling the function."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return min(times), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", 1)[0])
+    parser.add_argument("--ocids", type=int, default=20, help="number of OCIDs")
+    parser.add_argument("--releases", type=int, default=10, help="number of releases per OCID")
+    parser.add_argument("--array-length", type=int, default=5, help="number of objects in each array of objects")
+    parser.add_argument("--depth", type=int, default=0, help="depth of an additional nested object")
+    parser.add_argument("--no-id-fraction", type=float, default=0.1, help="fraction of objects without an id")
+    parser.add_argument("--change-fraction", type=float, default=0.2, help="fraction of strings that change")
+    parser.add_argument("--repeat", type=int, default=3, help="number of times to repeat each operation")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the random number generator")
+    parser.add_argument("--intern-paths", action="store_true", help="share a path interner between merged releases")
+    parser.add_argument("--operation", choices=OPERATIONS, action="append", help="operations to benchmark")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    groups = generate_releases(
+        build_template(),
+        rng,
+        ocids=args.ocids,
+        releases=args.releases,
+        array_length=args.array_length,
+        depth=args.depth,
+        no_id_fraction=args.no_id_fraction,
+        change_fraction=args.change_fraction,
+    )
+    releases = [release for group in groups for release in group]
+
+    merge_rules = get_merge_rules(SCHEMA)
+    rule_tree = compile_rules(merge_rules, {})
+    kwargs = {"merge_rules": merge_rules, "rule_tree": rule_tree}
+    if args.intern_paths:
+        kwargs["interner"] = PathInterner()
+
+    # Each function returns its results, so that the peak memory includes them.
+    def run_flatten():
+        return [flatten_with_rules(release, rule_tree, {}) for release in releases]
+
+    flattened = []
+    for group in groups:
+        compiled_release = CompiledRelease(**kwargs)
+        compiled_release.extend(group)
+        flattened.append(compiled_release.data)
+
+    def run_unflatten():
+        return [unflatten(data) for data in flattened]
+
+    def run_merge(cls):
+        # DirectCompiledRelease doesn't flatten, so it has no interner.
+        cls_kwargs = {
+            key: value for key, value in kwargs.items() if key != "interner" or cls is not DirectCompiledRelease
+        }
+
+        def function():
+            results = []
+            for group in groups:
+                merged_release = cls(**cls_kwargs)
+                merged_release.extend(group)
+                results.append(merged_release.asdict())
+            return results
+
+        return function
+
+    functions = {
+        "flatten": run_flatten,
+        "unflatten": run_unflatten,
+        "compiled": run_merge(CompiledRelease),
+        "direct": run_merge(DirectCompiledRelease),
+        "versioned": run_merge(VersionedRelease),
+    }
+
+    leaves = sum(len(data) for data in flattened)
+    print(f"{len(groups)} OCIDs, {len(releases)} releases, {leaves} leaves in compiled releases")
+    print(f"{'operation':<10} {'seconds':>10} {'releases/s':>12} {'peak MiB':>10}")
+    for operation in args.operation or OPERATIONS:
+        seconds, peak = measure(functions[operation], args.repeat)
+        print(f"{operation:<10} {seconds:>10.4f} {len(releases) / seconds:>12.1f} {peak / 1024 / 1024:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,11 @@
 from ocdsmerge.flatten import APPEND, MERGE_BY_POSITION
-from ocdsmerge.merge import CompiledRelease, Merger, VersionedRelease
+from ocdsmerge.merge import CompiledRelease, DirectCompiledRelease, Merger, VersionedRelease
 
 __all__ = (
     "APPEND",
     "MERGE_BY_POSITION",
     "CompiledRelease",
+    "DirectCompiledRelease",
     "Merger",
     "VersionedRelease",
 )
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import TYPE_CHECKING, Any
+
+from ocdsmerge.merge import PENDING_PER_WORKER, _initialize_worker, _merge_group_in_worker
+from ocdsmerge.util import group_releases, iter_releases
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator, AsyncIterable, Callable, Iterable
+
+    from ocdsmerge.merge import Merger, MergeResult
+
+Group = tuple[str | None, list[dict[str, Any]]]
+
+
+class AsyncMerger:
+    """
+    An asyncio interface to a :class:`~ocdsmerge.merge.Merger`, which merges releases in a pool.
+
+    Releases are merged in a pool of threads or processes, so that merging doesn't block the event loop. Use it as an
+    asynchronous context manager, to shut down the pool on exit:
+
+    .. code-block:: python
+
+       async with AsyncMerger(merger, processes=True) as async_merger:
+           async for ocid, compiled_release, versioned_release in async_merger.merge(releases):
+               ...
+    """
+
+    def __init__(
+        self,
+        merger: Merger,
+        *,
+        processes: bool = False,
+        max_workers: int | None = None,
+        max_pending: int | None = None,
+    ):
+        """
+        Initialize the pool of threads or processes.
+
+        In a pool of threads, merges run concurrently with the event loop, but not in parallel with each other (except
+        on free-threaded builds of Python). In a pool of processes, merges run in parallel, but releases and merged
+        releases are pickled, and the merge rules and rule overrides are sent to each process when the pool starts.
+
+        :param merger: the merger
+        :param processes: whether to use a pool of processes, instead of threads
+        :param max_workers: the number of threads or processes (if not provided, will default to the default of
+            :class:`concurrent.futures.ThreadPoolExecutor` or :class:`concurrent.futures.ProcessPoolExecutor`)
+        :param max_pending: the number of OCIDs to merge at a time, after which no more releases are read until a
+            merge completes (if not provided, will default to twice the number of workers, or of CPUs)
+        """
+        self.merger = merger
+
+        self.executor: Executor
+        if processes:
+            self.executor = ProcessPoolExecutor(
+                max_workers,
+                initializer=_initialize_worker,
+                initargs=(
+                    merger.merge_rules,
+                    merger.rule_overrides,
+                    merger.interner is not None,
+                    merger.on_collision,
+                    merger.on_metrics,
+                    merger.flatten_function is not None,
+                    merger.on_type_conflict,
+                ),
+            )
+            self._function: Callable[..., MergeResult] = _merge_group_in_worker
+        else:
+            self.executor = ThreadPoolExecutor(max_workers, thread_name_prefix="ocdsmerge")
+            self._function = partial(_merge_group_in_thread, merger)
+
+        if max_pending is None:
+            max_pending = PENDING_PER_WORKER * (max_workers or os.cpu_count() or 1)
+        self.max_pending = max_pending
+
+    async def __aenter__(self) -> AsyncMerger:  # noqa: PYI034 # Python 3.11+ typing.Self
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Shut down the pool, without blocking the event loop."""
+        await asyncio.get_running_loop().run_in_executor(None, partial(self.executor.shutdown, cancel_futures=True))
+
+    async def create_compiled_release(self, releases: list[dict[str, Any]]) -> dict[str, Any]:
+        """Merge a list of releases into a compiled release."""
+        return (await self._run((None, releases), compiled=True, versioned=False))[1]
+
+    async def create_versioned_release(self, releases: list[dict[str, Any]]) -> dict[str, Any]:
+        """Merge a list of releases into a versioned release."""
+        return (await self._run((None, releases), compiled=False, versioned=True))[2]
+
+    async def merge(
+        self,
+        releases: AsyncIterable[dict[str, Any]] | Iterable[dict[str, Any]],
+        *,
+        compiled: bool = True,
+        versioned: bool = False,
+        grouped: bool = False,
+        ordered: bool = True,
+    ) -> AsyncGenerator[MergeResult, None]:
+        """
+        Like :meth:`~ocdsmerge.merge.Merger.merge`, but merge the releases of different OCIDs in the pool.
+
+        At most ``max_pending`` OCIDs are merged at a time. Releases are read from ``releases`` only while fewer OCIDs
+        are pending, so that a fast producer of releases waits for the merges (backpressure).
+
+        :param releases: an iterable or asynchronous iterable of releases and/or release packages
+        :param compiled: whether to create compiled releases (if not, ``compiled_release`` is ``None``)
+        :param versioned: whether to create versioned releases (if not, ``versioned_release`` is ``None``)
+        :param grouped: whether releases with the same OCID are consecutive, in which case releases are merged as soon
+            as the next OCID's releases are read
+        :param ordered: whether to yield merged releases in the order of their OCIDs' first releases (if not, will
+            yield merged releases as soon as they are created)
+        """
+        pending: deque[asyncio.Future[MergeResult]] = deque()
+        try:
+            async for group in _group_releases(releases, grouped=grouped):
+                pending.append(self._run(group, compiled=compiled, versioned=versioned))
+                if len(pending) >= self.max_pending:
+                    for future in await _completed(pending, ordered=ordered):
+                        yield future.result()
+            while pending:
+                for future in await _completed(pending, ordered=ordered):
+                    yield future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def _run(self, group: Group, *, compiled: bool, versioned: bool) -> asyncio.Future[MergeResult]:
+        function = partial(self._function, compiled=compiled, versioned=versioned)
+        return asyncio.get_running_loop().run_in_executor(self.executor, function, group)
+
+
+async def _completed(
+    pending: deque[asyncio.Future[MergeResult]], *, ordered: bool
+) -> list[asyncio.Future[MergeResult]]:
+    # Remove and return the first future once it completes, or any futures that complete.
+    if ordered:
+        future = pending.popleft()
+        await asyncio.wait((future,))
+        return [future]
+
+    done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+    completed = [future for future in pending if future in done]
+    for future in completed:
+        pending.remove(future)
+    return completed
+
+
+async def _group_releases(
+    items: AsyncIterable[dict[str, Any]] | Iterable[dict[str, Any]], *, grouped: bool
+) -> AsyncGenerator[Group, None]:
+    # Like ocdsmerge.util.group_releases, for an asynchronous iterable.
+    if not hasattr(items, "__aiter__"):
+        for group in group_releases(iter_releases(items), grouped=grouped):
+            yield group
+            # Let other tasks run between groups.
+            await asyncio.sleep(0)
+        return
+
+    if not grouped:
+        releases = [release async for item in items for release in iter_releases([item])]
+        for group in group_releases(releases):
+            yield group
+        return
+
+    ocid = None
+    current: list[dict[str, Any]] = []
+    async for item in items:
+        for release in iter_releases([item]):
+            # See ocdsmerge.util._get_ocid.
+            release_ocid = release.get("ocid") if isinstance(release, dict) else None
+            if current and release_ocid != ocid:
+                yield ocid, current
+                current = []
+            ocid = release_ocid
+            current.append(release)
+    if current:
+        yield ocid, current
+
+
+def _merge_group_in_thread(merger: Merger, group: Group, *, compiled: bool, versioned: bool) -> MergeResult:
+    return merger._merge_group(*group, compiled=compiled, versioned=versioned)  # noqa: SLF001
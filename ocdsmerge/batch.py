@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+from array import array
+from typing import TYPE_CHECKING, Any
+
+from ocdsmerge.flatten import flatten_with_rules, new_uuid, warn_collision
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+    from ocdsmerge.flatten import Flattened, Identifier, OnCollision, PathInterner, RuleNode
+
+# The ocid, releaseID, releaseDate and releaseTag of a release.
+BatchMetadata = tuple[Any, Any, Any, Any]
+
+# The value of a path that no release has set.
+_MISSING = object()
+
+
+class ReleaseBatch:
+    """
+    Flattened releases, as columns, produced by :func:`~ocdsmerge.batch.flatten_releases`.
+
+    Each row is a path and value in a release. Rows are ordered by release, then by the order of the fields in the
+    release. Paths are numbered in the order in which they are first seen, which is the order of the fields in a merged
+    release.
+
+    The :attr:`path_ids` and :attr:`release_indexes` columns are :class:`array.array` objects, which support the buffer
+    protocol, so that group operations can be performed with NumPy, for example, without copying.
+    """
+
+    __slots__ = ("_path_ids", "path_ids", "paths", "release_indexes", "releases", "values")
+
+    def __init__(self):
+        #: The paths, by path ID.
+        self.paths: list[tuple[Identifier, ...]] = []
+        #: The ocid, releaseID, releaseDate and releaseTag of each release, by release index.
+        self.releases: list[BatchMetadata] = []
+        #: The path ID of each row.
+        self.path_ids = array("q")
+        #: The release index of each row.
+        self.release_indexes = array("q")
+        #: The value of each row.
+        self.values: list[Any] = []
+        self._path_ids: dict[tuple[Identifier, ...], int] = {}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def add(self, flat: Flattened, metadata: BatchMetadata) -> None:
+        """Add the rows of a flattened release."""
+        release_index = len(self.releases)
+        self.releases.append(metadata)
+
+        paths = self.paths
+        path_ids = self._path_ids
+        for path, value in flat.items():
+            path_id = path_ids.get(path)
+            if path_id is None:
+                path_id = path_ids[path] = len(paths)
+                paths.append(path)
+            self.path_ids.append(path_id)
+            self.release_indexes.append(release_index)
+            self.values.append(value)
+
+    def last_rows(self) -> array:
+        """Return the last row of each path, by path ID."""
+        last = array("q", [0]) * len(self.paths)
+        for row, path_id in enumerate(self.path_ids):
+            last[path_id] = row
+        return last
+
+    def changed_rows(self) -> array:
+        """Return the rows whose value differs from the value of the previous row with the same path, if any."""
+        previous = [_MISSING] * len(self.paths)
+        changed = array("q")
+        for row, (path_id, value) in enumerate(zip(self.path_ids, self.values, strict=True)):
+            current = previous[path_id]
+            if current is _MISSING or value != current:
+                changed.append(row)
+                previous[path_id] = value
+        return changed
+
+    def rows_by_path(self) -> list[list[int]]:
+        """Return the rows of each path, by path ID."""
+        rows: list[list[int]] = [[] for _ in self.paths]
+        for row, path_id in enumerate(self.path_ids):
+            rows[path_id].append(row)
+        return rows
+
+    def compiled(self) -> Flattened:
+        """Return the last value of each path, in the order of the paths."""
+        paths = self.paths
+        values = self.values
+        return {paths[path_id]: values[row] for path_id, row in enumerate(self.last_rows())}
+
+    def histories(self) -> dict[tuple[Identifier, ...], list[tuple[int, Any]]]:
+        """Return the ``(release_index, value)`` pairs of each path, in which the value changed, in path order."""
+        histories: dict[tuple[Identifier, ...], list[tuple[int, Any]]] = {path: [] for path in self.paths}
+        paths = self.paths
+        for row in self.changed_rows():
+            histories[paths[self.path_ids[row]]].append((self.release_indexes[row], self.values[row]))
+        return histories
+
+
+def flatten_releases(
+    releases: Iterable[dict[str, Any]],
+    rule_tree: RuleNode,
+    *,
+    new_identifier: Callable[[], str] = new_uuid,
+    interner: PathInterner | None = None,
+    on_collision: OnCollision | None = warn_collision,
+) -> ReleaseBatch:
+    """
+    Flatten releases with the same rules into columns.
+
+    Like :meth:`~ocdsmerge.merge.MergedRelease.flatten_release`, the ``tag`` of each release is omitted. The releases
+    should be sorted by date (see :func:`~ocdsmerge.util.sorted_releases`).
+
+    :param releases: the releases
+    :param rule_tree: the tree of the merge rules and rule overrides (see :func:`~ocdsmerge.flatten.compile_rules`)
+    :param new_identifier: a function that returns a unique identifier, for objects that need one
+    :param interner: the interner of the paths, if any
+    :param on_collision: the function to call if objects in an array have the same ``id`` value, or ``None`` to not
+        check (see :func:`~ocdsmerge.flatten.flatten`)
+    """
+    batch = ReleaseBatch()
+
+    for release in releases:
+        release = release.copy()  # noqa: PLW2901
+        # Prior to OCDS 1.1.4, `tag` didn't set "omitWhenMerged": true.
+        tag = release.pop("tag", None)
+
+        flat = flatten_with_rules(
+            release,
+            rule_tree,
+            flattened={},
+            new_identifier=new_identifier,
+            interner=interner,
+            on_collision=on_collision,
+        )
+        batch.add(flat, (release.get("ocid"), release.get("id"), release.get("date"), tag))
+
+    return batch
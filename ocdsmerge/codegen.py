@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import linecache
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any
+
+from ocdsmerge.flatten import (
+    Flattened,
+    MergeStrategy,
+    RuleNode,
+    _enumerate,
+    compile_rules,
+    is_versioned_value,
+    new_uuid,
+    warn_collision,
+)
+
+if TYPE_CHECKING:
+    from ocdsmerge.flatten import RuleOverrides
+    from ocdsmerge.rules import MergeRules
+
+# A function like flatten_with_rules, without the `node` argument.
+FlattenFunction = Callable[..., Flattened]
+
+# The generated functions, by the hash of the merge rules and rule overrides.
+_functions: dict[str, FlattenFunction] = {}
+
+
+def get_flatten_function(merge_rules: MergeRules, rule_overrides: RuleOverrides) -> FlattenFunction:
+    """
+    Return a function like :func:`~ocdsmerge.flatten.flatten_with_rules`, specialized to the rules and overrides.
+
+    The function is generated as Python source (see :func:`~ocdsmerge.codegen.generate_source`), in which each object
+    in the tree of rules has its own function, with its fields' rules and children as constants. Fields that aren't in
+    the merge rules, like the fields of unknown extensions, are flattened by a function for fields without rules.
+
+    The function is cached by the hash of the merge rules and rule overrides (see :func:`~ocdsmerge.codegen.get_hash`),
+    so that it is generated once per process.
+
+    The function's signature is ``(obj, flattened, path=(), *, versioned=False, new_identifier=new_uuid,
+    interner=None, on_collision=warn_collision)``.
+
+    :param merge_rules: the merge rules
+    :param rule_overrides: the rule overrides
+    """
+    digest = get_hash(merge_rules, rule_overrides)
+    function = _functions.get(digest)
+    if function is None:
+        source = generate_source(compile_rules(merge_rules, rule_overrides))
+        function = _functions[digest] = _compile(source, f"<ocdsmerge.codegen {digest[:12]}>")
+    return function
+
+
+def get_hash(merge_rules: MergeRules, rule_overrides: RuleOverrides) -> str:
+    """Return the SHA-256 hash of the merge rules and rule overrides, independent of their order."""
+    content = json.dumps(
+        [
+            sorted([list(path), rule] for path, rule in merge_rules.items()),
+            sorted([list(path), override.name] for path, override in rule_overrides.items()),
+        ]
+    )
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def generate_source(rule_tree: RuleNode) -> str:
+    """
+    Return the Python source of a module whose ``flatten`` function flattens a JSON object with the tree of rules.
+
+    :param rule_tree: the root of the tree of merge rules and rule overrides (see
+        :func:`~ocdsmerge.flatten.compile_rules`)
+    """
+    # Number the nodes. Nodes without children or overrides flatten their fields like fields without rules.
+    numbers: dict[int, int] = {}
+    nodes: list[RuleNode] = []
+
+    def visit(node: RuleNode) -> None:
+        nodes.append(node)
+        numbers[id(node)] = len(nodes)
+        for key in sorted(node.children):
+            child = node.children[key]
+            if _is_specialized(child):
+                visit(child)
+
+    visit(rule_tree)
+
+    lines = [
+        "def flatten(obj, flattened, path=(), *, versioned=False, new_identifier=new_uuid, interner=None,",
+        "            on_collision=warn_collision):",
+        "    return _flatten_1(obj, flattened, path, versioned, new_identifier, interner, on_collision)",
+        "",
+    ]
+    lines.extend(_function_lines(0, RuleNode(), numbers))
+    for node in nodes:
+        lines.extend(_function_lines(numbers[id(node)], node, numbers))
+
+    # The constants are assigned after the functions that they reference.
+    for node in nodes:
+        number = numbers[id(node)]
+        omit, whole, children = _partition(node, numbers)
+        if omit:
+            lines.append(f"_OMIT_{number} = frozenset({sorted(omit)!r})")
+        if whole:
+            lines.append(f"_WHOLE_{number} = frozenset({sorted(whole)!r})")
+        if children:
+            items = ", ".join(f"{key!r}: _flatten_{child}" for key, child in sorted(children.items()))
+            lines.append(f"_CHILDREN_{number} = {{{items}}}")
+
+    return "\n".join(lines) + "\n"
+
+
+def _is_specialized(node: RuleNode) -> bool:
+    return bool(node.children) or node.override is not None
+
+
+def _partition(node: RuleNode, numbers: dict[int, int]) -> tuple[list[str], list[str], dict[str, int]]:
+    # Return the fields to omit, the fields to merge as whole lists, and the functions of the other fields with rules.
+    omit = []
+    whole = []
+    children = {}
+    for key, child in node.children.items():
+        if child.rule == "omitWhenMerged":
+            omit.append(key)
+        elif child.rule == "wholeListMerge":
+            whole.append(key)
+        elif _is_specialized(child):
+            children[key] = numbers[id(child)]
+    return omit, whole, children
+
+
+def _function_lines(number: int, node: RuleNode, numbers: dict[int, int]) -> list[str]:
+    # This follows the logic of flatten_with_rules.
+    omit, whole, children = _partition(node, numbers)
+    override = "None" if node.override is None else node.override.name
+    enumerate_arguments = f"obj, path, {override}, new_identifier, interner, on_collision"
+    arguments = "flattened, new_path, versioned, new_identifier, interner, on_collision"
+
+    lines = [
+        f"def _flatten_{number}(obj, flattened, path, versioned, new_identifier, interner, on_collision):",
+        "    if type(obj) is list:",
+    ]
+
+    # The objects in an array have the same rules as the array.
+    if node.rule == "omitWhenMerged":
+        lines.append("        return flattened")
+    else:
+        lines.extend(
+            [
+                f"        for key, value in _enumerate({enumerate_arguments}):",
+                "            new_path = (*path, key) if interner is None else interner.child(path, key)",
+            ]
+        )
+        if node.rule == "wholeListMerge":
+            lines.append("            flattened[new_path] = value")
+        else:
+            lines.extend(
+                [
+                    f"            if {_whole_condition()}:",
+                    "                flattened[new_path] = value",
+                    "            elif value:",
+                    f"                _flatten_{number}(value, {arguments})",
+                ]
+            )
+        lines.append("        return flattened")
+
+    lines.append("    for key, value in obj.items():")
+    if omit:
+        lines.extend(
+            [
+                f"        if key in _OMIT_{number}:",
+                "            continue",
+            ]
+        )
+    lines.extend(
+        [
+            "        new_path = (*path, key) if interner is None else interner.child(path, key)",
+            f"        if {f'key in _WHOLE_{number} or ' if whole else ''}{_whole_condition()}:",
+            "            flattened[new_path] = value",
+            "        elif value:",
+        ]
+    )
+    if children:
+        lines.append(f"            _CHILDREN_{number}.get(key, _flatten_0)(value, {arguments})")
+    else:
+        lines.append(f"            _flatten_0(value, {arguments})")
+    lines.extend(["    return flattened", ""])
+
+    return lines
+
+
+def _whole_condition() -> str:
+    # If it's neither an object nor an array, if it's an array containing non-objects, or if it's versioned values.
+    return (
+        "not isinstance(value, (dict, list)) "
+        "or (type(value) is list and any(not isinstance(item, dict) for item in value)) "
+        "or (versioned and value and all(is_versioned_value(item) for item in value))"
+    )
+
+
+def _compile(source: str, filename: str) -> FlattenFunction:
+    namespace: dict[str, Any] = {
+        "_enumerate": _enumerate,
+        "is_versioned_value": is_versioned_value,
+        "new_uuid": new_uuid,
+        "warn_collision": warn_collision,
+        **MergeStrategy.__members__,
+    }
+    exec(compile(source, filename, "exec"), namespace)  # noqa: S102 # generated from the rules' keys with repr()
+    # Show the generated source in tracebacks.
+    linecache.cache[filename] = (len(source), None, source.splitlines(keepends=True), filename)
+    return namespace["flatten"]
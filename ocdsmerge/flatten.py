@@ -1,14 +1,16 @@
 from __future__ import annotations
 
+import sys
 import uuid
 import warnings
+from collections.abc import Callable
 from enum import Enum, auto, unique
 from typing import TYPE_CHECKING, Any
 
 from ocdsmerge.exceptions import DuplicateIdValueWarning, InconsistentTypeError
 
 if TYPE_CHECKING:
-    from collections.abc import Generator
+    from collections.abc import Generator, Iterable, Iterator
 
     from ocdsmerge.rules import MergeRules
 
@@ -25,6 +27,8 @@ globals().update(MergeStrategy.__members__)
 
 Identifier = int | str
 Flattened = dict[tuple[Identifier, ...], Any]
+# A function that is called with the path of an array and an `id` value that is used by many objects in the array.
+OnCollision = Callable[[tuple[Identifier, ...], str], None]
 RuleOverrides = dict[tuple[str, ...], MergeStrategy]
 
 
@@ -46,11 +50,265 @@ class IdValue(str):
         self._original_value = original_value
 
 
+class IdentifierSequence:
+    """
+    A callable that returns sequential identifiers, for objects in arrays that need a unique identifier.
+
+    These are objects without ``id`` values, and objects in arrays with the ``APPEND`` rule override. Unlike UUIDs,
+    sequential identifiers are cheap to create and are the same across runs.
+    """
+
+    __slots__ = ("last",)
+
+    def __init__(self, last: int = 0):
+        #: The last number used.
+        self.last = last
+
+    def __call__(self) -> str:
+        self.last += 1
+        # The null character is unlikely to occur in `id` values.
+        return f"\0{self.last}"
+
+
+class PathInterner:
+    """
+    A table of paths, so that equal paths in flattened objects share one tuple.
+
+    Every call to :func:`~ocdsmerge.flatten.flatten` builds new tuples and ``IdValue`` objects for its paths. If merged
+    releases are held in memory, share an interner between their calls to
+    :func:`~ocdsmerge.flatten.flatten_with_rules`, so that repeated paths across releases and OCIDs are stored once.
+
+    Objects without ``id`` values, and objects in arrays with the ``APPEND`` rule override, have unique identifiers.
+    Their paths (and the paths of their fields) are not interned. Other paths are interned for the life of the
+    interner, so the table grows with the number of distinct ``id`` values. If merged releases are discarded after
+    they are merged, intern their paths with a :meth:`~ocdsmerge.flatten.PathInterner.scope` instead, like
+    :class:`~ocdsmerge.merge.Merger` does.
+    """
+
+    __slots__ = ("_canonical", "_id_values", "_parent", "_paths", "_strings", "hits", "misses")
+
+    def __init__(self, parent: PathInterner | None = None):
+        """
+        Initialize an interner.
+
+        :param parent: the interner of the paths without ``id`` values, if this interner is a scope
+        """
+        self._parent = parent
+        # The interned tuples, strings and IdValue objects, by id. An object is interned if it is its entry.
+        self._canonical: dict[int, Any] = {id(()): ()}
+        # The interned paths, by the ids of the parent path and the last part.
+        self._paths: dict[tuple[int, int], tuple[Identifier, ...]] = {}
+        self._strings: dict[str, str] = {}
+        self._id_values: dict[tuple[Any, ...], IdValue] = {}
+        #: The number of paths that were found in the table.
+        self.hits = 0
+        #: The number of paths that were built, whether added to the table or not.
+        self.misses = 0
+
+    def scope(self) -> PathInterner:
+        """
+        Return an interner that interns paths without ``id`` values with this interner, and other paths itself.
+
+        Paths without ``id`` values, like ``('tender', 'title')``, are few and shared by many merged releases. Paths
+        with ``id`` values are released with the scope, so that an interner that is shared by many merged releases
+        that are discarded after they are merged, doesn't grow with the number of distinct ``id`` values.
+        """
+        return PathInterner(self)
+
+    def child(self, path: tuple[Identifier, ...], part: Identifier) -> tuple[Identifier, ...]:
+        """Return the path extended by the part, re-using the interned tuple if the path and part are interned."""
+        parent = self._parent
+        if parent is not None:
+            if type(part) is not IdValue and parent._canonical.get(id(path)) is path:  # noqa: SLF001
+                return parent.child(path, part)
+            # The parent's paths are interned for the life of the parent, so their ids aren't re-used.
+            is_interned = self._canonical.get(id(path)) is path or parent._canonical.get(id(path)) is path  # noqa: SLF001
+        else:
+            is_interned = self._canonical.get(id(path)) is path
+
+        canonical = self._canonical
+        if type(part) is str:
+            if part in self._strings:
+                part = self._strings[part]
+            else:
+                self._intern(self._strings, part, part)
+        if not is_interned or canonical.get(id(part)) is not part:
+            self.misses += 1
+            return (*path, part)
+        key = (id(path), id(part))
+        try:
+            new_path = self._paths[key]
+        except KeyError:
+            self.misses += 1
+            return self._intern(self._paths, key, (*path, part))
+        self.hits += 1
+        return new_path
+
+    def path(self, path: Iterable[Identifier]) -> tuple[Identifier, ...]:
+        """Return the interned path equal to the path, if its parts can be interned."""
+        new_path: tuple[Identifier, ...] = ()
+        for part in path:
+            # Identifiers from `id` values or positions can be interned, unlike unique identifiers.
+            if type(part) is IdValue and (type(part.identifier) is int or part.identifier == part.original_value):
+                part = self.id_value(part)  # noqa: PLW2901
+            new_path = self.child(new_path, part)
+        return new_path
+
+    def id_value(self, id_value: IdValue) -> IdValue:
+        """Return the interned ``IdValue`` equal to the ``IdValue``, with the same identifier and original value."""
+        identifier = id_value.identifier
+        original_value = id_value.original_value
+        key = (type(identifier), identifier, type(original_value), original_value)
+        try:
+            if key in self._id_values:
+                return self._id_values[key]
+        # If the `id` value is unhashable (that is, invalid), don't intern it.
+        except TypeError:
+            return id_value
+        return self._intern(self._id_values, key, id_value)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Return statistics about the interner.
+
+        These are the numbers of interned paths, strings and ``IdValue`` objects, the numbers of hits and misses, and
+        the approximate size in bytes of the interned objects (excluding the ``id`` values of ``IdValue`` objects).
+        """
+        return {
+            "paths": len(self._paths),
+            "strings": len(self._strings),
+            "id_values": len(self._id_values),
+            "hits": self.hits,
+            "misses": self.misses,
+            "bytes": sum(sys.getsizeof(value) for value in self._canonical.values()),
+        }
+
+    def _intern(self, table: dict[Any, Any], key: Any, value: Any) -> Any:
+        table[key] = value
+        self._canonical[id(value)] = value
+        return value
+
+
+def new_uuid() -> str:
+    """Return a UUID as a string, for objects in arrays that need a unique identifier."""
+    return str(uuid.uuid1(1))  # use 1 instead of MAC address
+
+
+def warn_collision(path: tuple[Identifier, ...], identifier: str) -> None:
+    """
+    Warn that an object in the array at the path has the same ``id`` value as an earlier object in the array.
+
+    This is the default ``on_collision`` function. The warning is a
+    :class:`~ocdsmerge.exceptions.DuplicateIdValueWarning`.
+    """
+    warnings.warn(
+        f"Multiple objects have the `id` value {identifier!r} in the `{_field(path)}` array",
+        category=DuplicateIdValueWarning,
+        stacklevel=3,
+    )
+
+
+class CollisionReport:
+    """
+    A report of objects in arrays that have the same ``id`` value as an earlier object in the same array.
+
+    Pass its :meth:`~ocdsmerge.flatten.CollisionReport.add` method as ``on_collision``, instead of warning once per
+    collision.
+    """
+
+    __slots__ = ("counts",)
+
+    def __init__(self):
+        #: The number of collisions, by the field of the array (with dots between the parts of its path) and ``id``
+        #: value.
+        self.counts: dict[tuple[str, str], int] = {}
+
+    def __iter__(self) -> Iterator[tuple[str, str, int]]:
+        """Yield the field, ``id`` value and number of collisions of each collision."""
+        for (field, identifier), count in self.counts.items():
+            yield field, identifier, count
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def add(self, path: tuple[Identifier, ...], identifier: str) -> None:
+        """Count a collision in the array at the path."""
+        key = (_field(path), str(identifier))
+        self.counts[key] = self.counts.get(key, 0) + 1
+
+
+def _field(path: tuple[Identifier, ...]) -> str:
+    # The path without identifiers is the path of the field in the schema.
+    return ".".join(str(part) for part in path if type(part) is not IdValue)
+
+
 def is_versioned_value(value: dict[str, Any]) -> bool:
     """Return whether the value is a versioned value."""
     return len(value) == 4 and VERSIONED_VALUE_KEYS.issuperset(value)
 
 
+class RuleNode:
+    """
+    A node in a tree of merge rules and rule overrides, produced by :func:`~ocdsmerge.flatten.compile_rules`.
+
+    :func:`~ocdsmerge.flatten.flatten_with_rules` walks the tree in lockstep with the JSON object, so that looking up
+    a field's rule is a step from a node to its child.
+    """
+
+    __slots__ = ("children", "override", "rule")
+
+    def __init__(self):
+        #: The nodes of the object's fields, or of the array's objects' fields.
+        self.children: dict[str, RuleNode] = {}
+        #: The merge rule ("omitWhenMerged" or "wholeListMerge"), if any.
+        self.rule: str | None = None
+        #: The rule override, if any.
+        self.override: MergeStrategy | None = None
+
+
+# The node of fields without rules. It has no children and must not be modified.
+_EMPTY_NODE = RuleNode()
+
+
+def compile_rules(merge_rules: MergeRules, rule_overrides: RuleOverrides) -> RuleNode:
+    """Return the root of a tree of merge rules and rule overrides."""
+    root = RuleNode()
+
+    for path, rule in merge_rules.items():
+        _get_node(root, path).rule = rule
+    for path, override in rule_overrides.items():
+        _get_node(root, path).override = override
+
+    return root
+
+
+def _get_node(node: RuleNode, path: tuple[str, ...]) -> RuleNode:
+    for key in path:
+        node = node.children.setdefault(key, RuleNode())
+    return node
+
+
+# The trees compiled by flatten, by the ids of the merge rules and rule overrides, with copies of the rules and
+# overrides, in case the dicts are modified or their ids are re-used.
+_rule_trees: dict[tuple[int, int], tuple[MergeRules, RuleOverrides, RuleNode]] = {}
+_RULE_TREES_SIZE = 16
+
+
+def _get_rule_tree(merge_rules: MergeRules, rule_overrides: RuleOverrides) -> RuleNode:
+    key = (id(merge_rules), id(rule_overrides))
+    cached = _rule_trees.get(key)
+    if cached is not None and cached[0] == merge_rules and cached[1] == rule_overrides:
+        return cached[2]
+
+    node = compile_rules(merge_rules, rule_overrides)
+    _rule_trees.pop(key, None)
+    if len(_rule_trees) >= _RULE_TREES_SIZE:
+        # Remove the oldest tree.
+        del _rule_trees[next(iter(_rule_trees))]
+    _rule_trees[key] = (merge_rules.copy(), rule_overrides.copy(), node)
+    return node
+
+
 def flatten(
     obj: list[dict[str, Any]] | dict[str, Any],
     merge_rules: MergeRules,
@@ -60,6 +318,9 @@ def flatten(
     rule_path: tuple[str, ...] = (),
     *,
     versioned: bool | None = False,
+    new_identifier: Callable[[], str] = new_uuid,
+    interner: PathInterner | None = None,
+    on_collision: OnCollision | None = warn_collision,
 ) -> Flattened:
     """
     Flatten a JSON object into key-value pairs, in which the key is the JSON path as a tuple.
@@ -90,25 +351,73 @@ def flatten(
            ('a', '2', 'ca'): 'I am cb',
            ('a', '2', 'id'): 2,
        }
+
+    Objects without ``id`` values are given unique identifiers using ``new_identifier``, like UUIDs or an
+    :class:`~ocdsmerge.flatten.IdentifierSequence`.
+
+    To share equal paths between flattened objects, pass the same :class:`~ocdsmerge.flatten.PathInterner` as
+    ``interner``.
+
+    If an object in an array has the same ``id`` value as an earlier object in the array, ``on_collision`` is called
+    with the path of the array and the ``id`` value (as a string). By default, a warning is issued (see
+    :func:`~ocdsmerge.flatten.warn_collision`). To count collisions instead, pass the ``add`` method of a
+    :class:`~ocdsmerge.flatten.CollisionReport`. To not check for collisions, pass ``None``.
+
+    The tree of the merge rules and rule overrides is cached, so that flattening many objects with the same rules
+    doesn't compile the rules each time. To not look up the cache, use :func:`~ocdsmerge.flatten.compile_rules` and
+    :func:`~ocdsmerge.flatten.flatten_with_rules`, instead.
     """
+    node = _get_rule_tree(merge_rules, rule_overrides)
+    for key in rule_path:
+        node = node.children.get(key, _EMPTY_NODE)
+
+    return flatten_with_rules(
+        obj,
+        node,
+        flattened,
+        path,
+        versioned=versioned,
+        new_identifier=new_identifier,
+        interner=interner,
+        on_collision=on_collision,
+    )
+
+
+def flatten_with_rules(
+    obj: list[dict[str, Any]] | dict[str, Any],
+    node: RuleNode,
+    flattened: Flattened,
+    path: tuple[Identifier, ...] = (),
+    *,
+    versioned: bool | None = False,
+    new_identifier: Callable[[], str] = new_uuid,
+    interner: PathInterner | None = None,
+    on_collision: OnCollision | None = warn_collision,
+) -> Flattened:
+    """Like :func:`~ocdsmerge.flatten.flatten`, but using the node of a tree of rules for the ``path``."""
     # For an exploration of alternatives, see: https://github.com/open-contracting/ocds-merge/issues/26
 
     if type(obj) is list:
         is_dict = False
-        iterable = _enumerate(obj, path, rule_path, rule_overrides.get(rule_path))
-        new_rule_path = rule_path
+        iterable = _enumerate(obj, path, node.override, new_identifier, interner, on_collision)
+        # The objects in an array have the same rules as the array.
+        new_node = node
     else:
         is_dict = True
         iterable = obj.items()
+        children = node.children
 
     for key, value in iterable:
         if is_dict:
-            new_rule_path = (*rule_path, key)
+            new_node = children.get(key, _EMPTY_NODE)
 
-        new_path_merge_rules = merge_rules.get(new_rule_path, None)
+        new_path_merge_rules = new_node.rule
 
         if new_path_merge_rules == "omitWhenMerged":
             continue
+
+        new_path = (*path, key) if interner is None else interner.child(path, key)
+
         # If it's `wholeListMerge`, if it's neither an object nor an array, if it's an array containing non-objects
         # (even if `wholeListMerge` is `false`), or if it's versioned values, use the whole list merge strategy.
         # Note: Behavior is undefined and inconsistent if the array is not in the schema and contains objects in some
@@ -121,38 +430,55 @@ def flatten(
             or (type(value) is list and any(not isinstance(item, dict) for item in value))
             or (versioned and value and all(is_versioned_value(item) for item in value))
         ):
-            flattened[(*path, key)] = value
+            flattened[new_path] = value
         # Recurse into non-empty objects, and arrays of objects that aren't `wholeListMerge`.
         elif value:
-            flatten(value, merge_rules, rule_overrides, flattened, (*path, key), new_rule_path, versioned=versioned)
+            flatten_with_rules(
+                value,
+                new_node,
+                flattened,
+                new_path,
+                versioned=versioned,
+                new_identifier=new_identifier,
+                interner=interner,
+                on_collision=on_collision,
+            )
 
     return flattened
 
 
 def _enumerate(
-    obj: list[dict[str, Any]], path: tuple[Identifier, ...], rule_path: tuple[str, ...], rule: MergeStrategy | None
+    obj: list[dict[str, Any]],
+    path: tuple[Identifier, ...],
+    rule: MergeStrategy | None,
+    new_identifier: Callable[[], str],
+    interner: PathInterner | None = None,
+    on_collision: OnCollision | None = warn_collision,
 ) -> Generator[tuple[IdValue, Any], None, None]:
-    # This tracks the identifiers of objects in an array, to warn about collisions.
-    identifiers = {}
+    # This tracks the identifiers of objects in the array, to report collisions.
+    seen = None if on_collision is None else set()
 
     for key, value in enumerate(obj):
-        new_key, default_key = _id_value(key, value, rule)
-
-        # Check whether the identifier is used by other objects in the array.
-        default_path = (*path, default_key)
-        if default_path not in identifiers:
-            identifiers[default_path] = key
-        elif identifiers[default_path] != key:
-            warnings.warn(
-                f"Multiple objects have the `id` value {default_key!r} in the `{'.'.join(map(str, rule_path))}` array",
-                category=DuplicateIdValueWarning,
-                stacklevel=2,
-            )
+        new_key, default_key = _id_value(key, value, rule, new_identifier)
+        # Identifiers from `id` values or positions can be interned, unlike unique identifiers.
+        if interner is not None and (
+            rule == MergeStrategy.MERGE_BY_POSITION or (rule != MergeStrategy.APPEND and "id" in value)
+        ):
+            new_key = interner.id_value(new_key)
+
+        # Check whether the identifier is used by an earlier object in the array.
+        if seen is not None:
+            if default_key in seen:
+                on_collision(path, default_key)
+            else:
+                seen.add(default_key)
 
         yield new_key, value
 
 
-def _id_value(key: int, value: dict[str, Any], rule: MergeStrategy | None) -> tuple[IdValue, IdValue]:
+def _id_value(
+    key: int, value: dict[str, Any], rule: MergeStrategy | None, new_identifier: Callable[[], str]
+) -> tuple[IdValue, IdValue]:
     # If it is an array of objects, get the `id` value to apply the identifier merge strategy.
     # https://standard.open-contracting.org/latest/en/schema/merging/#identifier-merge
     if "id" in value:
@@ -161,14 +487,14 @@ def _id_value(key: int, value: dict[str, Any], rule: MergeStrategy | None) -> tu
     # If the object contained no top-level `id` value, set a unique value.
     else:
         id_value = None
-        identifier = str(uuid.uuid1(1))  # use 1 instead of MAC address
+        identifier = new_identifier()
 
     # Calculate the key for the warning, which checks for collisions using the default merge strategy.
     default_key = IdValue(identifier)
 
     if rule == MergeStrategy.APPEND:
-        # Avoid creating an extra UUID.
-        new_key = IdValue(str(uuid.uuid1(1))) if "id" in value else default_key
+        # Avoid creating an extra identifier.
+        new_key = IdValue(new_identifier()) if "id" in value else default_key
     elif rule == MergeStrategy.MERGE_BY_POSITION:
         new_key = IdValue(key)
     else:
@@ -180,58 +506,138 @@ def _id_value(key: int, value: dict[str, Any], rule: MergeStrategy | None) -> tu
     return new_key, default_key
 
 
+def dump_flattened(flattened: Flattened) -> list[list[Any]]:
+    """
+    Return a flattened object as JSON-serializable data.
+
+    Each key-value pair becomes a ``[path, value]`` pair, in which each ``IdValue`` in the path becomes an
+    ``[identifier, original_value]`` pair.
+    """
+    return [
+        [[[part.identifier, part.original_value] if type(part) is IdValue else part for part in key], value]
+        for key, value in flattened.items()
+    ]
+
+
+def load_flattened(data: list[list[Any]], interner: PathInterner | None = None) -> Flattened:
+    """
+    Return a flattened object from the output of :func:`~ocdsmerge.flatten.dump_flattened`.
+
+    :param interner: the interner of the paths, if any
+    """
+    flattened: Flattened = {}
+
+    # Re-use IdValue objects across paths, like `flatten`.
+    id_values: dict[tuple[type, Identifier, Identifier | None], IdValue] = {}
+
+    for path, value in data:
+        key = []
+        for part in path:
+            if type(part) is list:
+                identifier, original_value = part
+                cache_key = (type(identifier), identifier, original_value)
+                if cache_key not in id_values:
+                    id_value = IdValue(identifier)
+                    id_value.original_value = original_value
+                    id_values[cache_key] = id_value
+                key.append(id_values[cache_key])
+            else:
+                key.append(part)
+        flattened[tuple(key) if interner is None else interner.path(key)] = value
+
+    return flattened
+
+
 def unflatten(flattened: Flattened) -> dict[str, Any]:
-    """Unflattens a flattened object into a JSON object."""
-    unflattened: dict[str, Any] = {}
+    """
+    Unflattens a flattened object into a JSON object.
 
-    identifiers: dict[tuple[Identifier, ...], dict] = {}
+    Consecutive keys often share a prefix, like the fields of an object. The nodes of the previous key's prefix are
+    re-used, instead of walking each key from the root.
+    """
+    unflattened: dict[str, Any] = {}
 
-    for key in flattened:
-        current_node = unflattened
+    # The objects in each array, by the array's id and by identifier.
+    identifiers: dict[int, dict[Identifier, dict]] = {}
+
+    # The previous key, and the nodes of its prefixes, in which nodes[i] is the node of key[:i].
+    previous: tuple[Identifier, ...] = ()
+    nodes: list[Any] = [unflattened]
+
+    for key, value in flattened.items():
+        # Find the length of the prefix that is the same as the previous key's. Only the last part can be a leaf.
+        start = 0
+        shared = min(len(key), len(previous)) - 1
+        while start < shared:
+            part = key[start]
+            other = previous[start]
+            if part is not other and (
+                type(part) is not type(other)
+                or part != other
+                or (type(part) is IdValue and part.identifier != other.identifier)
+            ):
+                break
+            start += 1
+
+        del nodes[start + 1 :]
+        current_node = nodes[start]
+        previous = key
+
+        for end in range(start, len(key)):
+            part = key[end]
 
-        for end, part in enumerate(key, 1):
             if TYPE_CHECKING:
                 assert type(part) is str
 
             # If this is a path to an item of an array.
             # See https://standard.open-contracting.org/1.1/en/schema/merging/#identifier-merge
             if type(part) is IdValue:
+                items = identifiers.get(id(current_node))
+                # If the array is a list value (like the versioned values of a field that was null before it was an
+                # array), copy it before appending objects, so that the flattened object isn't changed.
+                if items is None and type(current_node) is list:
+                    current_node = current_node.copy()
+                    nodes[end - 1][key[end - 1]] = current_node
+                    nodes[end] = current_node
+
                 # If no `id` of an object in the array matches, append a new object.
-                id_path = (*key[: end - 1], part.identifier)
-                if id_path not in identifiers:
+                if items is None or part.identifier not in items:
                     new_node = {}
 
                     # If the original object had an `id` value, set it.
                     if part.original_value is not None:
                         new_node["id"] = part.original_value
 
-                    # Cache which identifiers appear in which arrays.
-                    identifiers[id_path] = new_node
-
                     try:
                         current_node.append(new_node)
                     except AttributeError as e:
                         message = (
                             "An earlier release had the object {!r} for /{}, but the current release has an array"
                         )
-                        raise InconsistentTypeError(message.format(current_node, "/".join(key[: end - 1]))) from e
+                        raise InconsistentTypeError(message.format(current_node, "/".join(key[:end]))) from e
+
+                    # Cache which identifiers appear in which arrays.
+                    if items is None:
+                        items = identifiers[id(current_node)] = {}
+                    items[part.identifier] = new_node
 
                 # Change into it.
-                current_node = identifiers[id_path]
+                current_node = items[part.identifier]
 
             elif not isinstance(current_node, dict):
                 message = "An earlier release had the value {!r} for /{}, but the current release has an object with a {!r} key"  # noqa: E501
-                raise InconsistentTypeError(message.format(current_node, "/".join(key[: end - 1]), part))
+                raise InconsistentTypeError(message.format(current_node, "/".join(key[:end]), part))
 
             # Otherwise, this is a path to a property of an object. If this is a path to a node we visited before,
             # change into it. If it's an `id` field, it's already been set to its original value.
             elif part in current_node:
                 current_node = current_node[part]
 
-            elif end < len(key):
+            elif end < len(key) - 1:
                 # If the path is to a new array, start a new array, and change into it.
-                if type(key[end]) is IdValue:
+                if type(key[end + 1]) is IdValue:
                     current_node[part] = []
+                    identifiers[id(current_node[part])] = {}
                 # If the path is to a new object, start a new object, and change into it.
                 else:
                     current_node[part] = {}
@@ -239,7 +645,11 @@ def unflatten(flattened: Flattened) -> dict[str, Any]:
                 current_node = current_node[part]
 
             # If this is a full path, copy the data, omitting null'ed fields.
-            elif flattened[key] is not None:
-                current_node[part] = flattened[key]
+            else:
+                if value is not None:
+                    current_node[part] = value
+                break
+
+            nodes.append(current_node)
 
     return unflattened
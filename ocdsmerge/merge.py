@@ -1,10 +1,56 @@
 from __future__ import annotations
 
-from typing import Any
+import os
+from bisect import bisect_right, insort
+from collections import deque
+from functools import partial
+from itertools import islice
+from multiprocessing import Pool
+from queue import SimpleQueue
+from typing import TYPE_CHECKING, Any
 
-from ocdsmerge.flatten import Flattened, RuleOverrides, flatten, unflatten
+from ocdsmerge.batch import ReleaseBatch, flatten_releases
+from ocdsmerge.codegen import FlattenFunction, get_flatten_function
+from ocdsmerge.exceptions import InconsistentTypeError
+from ocdsmerge.flatten import (
+    _EMPTY_NODE,
+    Flattened,
+    IdentifierSequence,
+    IdValue,
+    MergeStrategy,
+    OnCollision,
+    PathInterner,
+    RuleNode,
+    RuleOverrides,
+    compile_rules,
+    dump_flattened,
+    flatten_with_rules,
+    is_versioned_value,
+    load_flattened,
+    unflatten,
+    warn_collision,
+)
+from ocdsmerge.metrics import Metrics
+from ocdsmerge.patch import Changes
 from ocdsmerge.rules import MergeRules, Schema, get_merge_rules
-from ocdsmerge.util import sorted_releases
+from ocdsmerge.typecheck import OnTypeConflict, TypeConflict, TypeTable
+from ocdsmerge.util import group_releases, iter_releases, sorted_releases
+from ocdsmerge.view import MergedReleaseView
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Generator, Iterable, Iterator
+    from multiprocessing.pool import AsyncResult
+
+    from ocdsmerge.flatten import Identifier
+
+MergeResult = tuple[str | None, dict[str, Any] | None, dict[str, Any] | None]
+# The releaseID, releaseDate and releaseTag of a release.
+ReleaseMetadata = tuple[str | None, str | None, Any]
+# The index of a release in VersionedRelease.releases, and the value of a field in that release.
+HistoryEntry = tuple[int, Any]
+
+# The number of OCIDs, or chunks of OCIDs, to merge at a time, per worker.
+PENDING_PER_WORKER = 2
 
 
 class Merger:
@@ -13,14 +59,33 @@ class Merger:
         schema: Schema = None,
         merge_rules: MergeRules | None = None,
         rule_overrides: RuleOverrides | None = None,
+        interner: PathInterner | None = None,
+        on_collision: OnCollision | None = warn_collision,
+        on_metrics: Callable[[str | None, Metrics], None] | None = None,
+        *,
+        specialize: bool = False,
+        on_type_conflict: OnTypeConflict | None = None,
     ):
         """
         Initialize a reusable ``Merger`` instance for creating merged releases.
 
-        :param schema: the release schema (if not provided, will default to the latest version of OCDS)
+        :param schema: the release schema (if not provided, will default to the latest version of OCDS bundled with
+            this package)
         :param merge_rules: the merge rules (if not provided, will determine the rules from the ``schema``)
         :param rule_overrides: any rule overrides, in which keys are field paths as tuples, and values are either
             ``ocdsmerge.APPEND`` or ``ocdsmerge.MERGE_BY_POSITION``
+        :param interner: the interner of the paths of the merged releases, if any (see
+            :class:`~ocdsmerge.flatten.PathInterner`), of which each merged release uses a
+            :meth:`~ocdsmerge.flatten.PathInterner.scope`
+        :param on_collision: the function to call if objects in an array have the same ``id`` value, or ``None`` to
+            not check (see :func:`~ocdsmerge.flatten.flatten`)
+        :param on_metrics: the function to call with the OCID and the :class:`~ocdsmerge.metrics.Metrics` of each
+            merge, if any (the OCID is ``None`` for the ``create_*`` methods)
+        :param specialize: whether to flatten releases with a function generated from the merge rules and rule
+            overrides (see :func:`~ocdsmerge.codegen.get_flatten_function`), which is faster for many releases
+        :param on_type_conflict: the function to call if a release has a field whose type differs from its type in
+            earlier releases, in which case the release isn't merged, or ``None`` to not check (see
+            :meth:`~ocdsmerge.merge.MergedRelease.flatten_release`)
         :type schema: dict or str
         """
         if merge_rules is None:
@@ -30,6 +95,12 @@ class Merger:
 
         self.merge_rules = merge_rules
         self.rule_overrides = rule_overrides
+        self.rule_tree = compile_rules(merge_rules, rule_overrides)
+        self.flatten_function = get_flatten_function(merge_rules, rule_overrides) if specialize else None
+        self.interner = interner
+        self.on_collision = on_collision
+        self.on_metrics = on_metrics
+        self.on_type_conflict = on_type_conflict
 
     def create_compiled_release(self, releases: list[dict[str, Any]]) -> dict[str, Any]:
         """Merge a list of releases into a compiled release."""
@@ -39,10 +110,237 @@ class Merger:
         """Merge a list of releases into a versioned release."""
         return self._create_merged_release(VersionedRelease, releases)
 
+    def merge(
+        self,
+        releases: Iterable[dict[str, Any]],
+        *,
+        compiled: bool = True,
+        versioned: bool = False,
+        grouped: bool = False,
+    ) -> Generator[MergeResult, None, None]:
+        """
+        Merge releases with many OCIDs, yielding an ``(ocid, compiled_release, versioned_release)`` tuple per OCID.
+
+        :param releases: an iterable of releases and/or release packages
+        :param compiled: whether to create compiled releases (if not, ``compiled_release`` is ``None``)
+        :param versioned: whether to create versioned releases (if not, ``versioned_release`` is ``None``)
+        :param grouped: whether releases with the same OCID are consecutive, in which case only one OCID's releases are
+            held in memory at a time
+        """
+        for ocid, group in group_releases(iter_releases(releases), grouped=grouped):
+            yield self._merge_group(ocid, group, compiled=compiled, versioned=versioned)
+
+    def merge_parallel(
+        self,
+        releases: Iterable[dict[str, Any]],
+        *,
+        compiled: bool = True,
+        versioned: bool = False,
+        grouped: bool = False,
+        processes: int | None = None,
+        chunksize: int = 1,
+        ordered: bool = True,
+        max_pending: int | None = None,
+    ) -> Generator[MergeResult, None, None]:
+        """
+        Like :meth:`~ocdsmerge.merge.Merger.merge`, but merge the releases of different OCIDs in a pool of processes.
+
+        The merge rules and rule overrides are sent to each process once, when the pool starts. If the merger has an
+        interner, each process has its own. The ``on_collision`` and ``on_metrics`` functions must be picklable, and
+        each process calls its own copy: for example, the counts of a :class:`~ocdsmerge.flatten.CollisionReport`
+        aren't returned.
+
+        At most ``max_pending`` chunks are merged at a time. Releases are read from ``releases`` only while fewer
+        chunks are pending, so that, if ``grouped`` is set, only the pending chunks' releases are held in memory.
+
+        :param processes: the number of processes (if not provided, will default to the number of CPUs)
+        :param chunksize: the number of OCIDs to send to a process at a time
+        :param ordered: whether to yield merged releases in the order of their OCIDs' first releases (if not, will
+            yield merged releases as soon as they are created)
+        :param max_pending: the number of chunks to merge at a time (if not provided, will default to twice the number
+            of processes)
+        """
+        chunks = _chunked(group_releases(iter_releases(releases), grouped=grouped), chunksize)
+        function = partial(_merge_groups_in_worker, compiled=compiled, versioned=versioned)
+
+        if max_pending is None:
+            max_pending = PENDING_PER_WORKER * (processes or os.cpu_count() or 1)
+
+        with Pool(
+            processes,
+            initializer=_initialize_worker,
+            initargs=(
+                self.merge_rules,
+                self.rule_overrides,
+                self.interner is not None,
+                self.on_collision,
+                self.on_metrics,
+                self.flatten_function is not None,
+                self.on_type_conflict,
+            ),
+        ) as pool:
+            # Pool.imap reads its whole input in a background thread, so chunks are submitted one at a time instead.
+            if ordered:
+                pending: deque[AsyncResult] = deque()
+                for chunk in chunks:
+                    pending.append(pool.apply_async(function, (chunk,)))
+                    if len(pending) >= max_pending:
+                        yield from pending.popleft().get()
+                while pending:
+                    yield from pending.popleft().get()
+            else:
+                # The results and errors of the chunks, as they complete.
+                completed: SimpleQueue[list[MergeResult] | BaseException] = SimpleQueue()
+                count = 0
+                for chunk in chunks:
+                    pool.apply_async(function, (chunk,), callback=completed.put, error_callback=completed.put)
+                    count += 1
+                    if count >= max_pending:
+                        yield from _get_completed(completed)
+                        count -= 1
+                while count:
+                    yield from _get_completed(completed)
+                    count -= 1
+
+    def _merge_group(
+        self, ocid: str | None, releases: list[dict[str, Any]], *, compiled: bool, versioned: bool
+    ) -> MergeResult:
+        metrics = self._metrics()
+        kwargs = self._merged_release_kwargs()
+        compiled_release = CompiledRelease(metrics=metrics, **kwargs)
+        versioned_release = VersionedRelease(metrics=metrics, **kwargs)
+
+        merged_releases: list[MergedRelease] = []
+        # CompiledRelease.flat_append must be called before VersionedRelease.flat_append, which modifies `flat`.
+        if compiled:
+            merged_releases.append(compiled_release)
+        if versioned:
+            merged_releases.append(versioned_release)
+
+        # Flatten each release once, for both merged releases. The types are checked against each merged release's own
+        # types: a null value is in a versioned release's history, but not in a compiled release.
+        flattener = versioned_release if versioned else compiled_release
+        on_type_conflict = self.on_type_conflict
+        if metrics is None:
+            for release in sorted_releases(releases):
+                args = flattener.flatten_release(release, check_types=False)
+                for merged_release in _check_types(merged_releases, release, args[0], on_type_conflict):
+                    merged_release.flat_append(*args)
+        else:
+            for release in metrics.sorted_releases(releases):
+                args = metrics.flatten_release(flattener, release, check_types=False)
+                for merged_release in _check_types(merged_releases, release, args[0], on_type_conflict):
+                    metrics.flat_append(merged_release, args)
+
+        result = (
+            ocid,
+            compiled_release.asdict() if compiled else None,
+            versioned_release.asdict() if versioned else None,
+        )
+        if metrics is not None:
+            self.on_metrics(ocid, metrics)
+        return result
+
+    def _merged_release_kwargs(self) -> dict[str, Any]:
+        return {
+            "merge_rules": self.merge_rules,
+            "rule_overrides": self.rule_overrides,
+            "rule_tree": self.rule_tree,
+            "flatten_function": self.flatten_function,
+            # The merged releases are discarded after they are merged, so their paths with `id` values are, too.
+            "interner": None if self.interner is None else self.interner.scope(),
+            "on_collision": self.on_collision,
+            "on_type_conflict": self.on_type_conflict,
+        }
+
+    def _metrics(self) -> Metrics | None:
+        if self.on_metrics is None:
+            return None
+        return Metrics()
+
     def _create_merged_release(self, cls: type[MergedRelease], releases: list[dict[str, Any]]) -> dict[str, Any]:
-        merged_release = cls(merge_rules=self.merge_rules, rule_overrides=self.rule_overrides)
+        metrics = self._metrics()
+        merged_release = cls(metrics=metrics, **self._merged_release_kwargs())
         merged_release.extend(releases)
-        return merged_release.asdict()
+        data = merged_release.asdict()
+        if metrics is not None:
+            self.on_metrics(None, metrics)
+        return data
+
+
+# The merger used by each worker process of Merger.merge_parallel.
+_worker_merger: Merger | None = None
+
+
+def _initialize_worker(
+    merge_rules: MergeRules,
+    rule_overrides: RuleOverrides,
+    intern_paths: bool,  # noqa: FBT001
+    on_collision: OnCollision | None,
+    on_metrics: Callable[[str | None, Metrics], None] | None = None,
+    specialize: bool = False,  # noqa: FBT001 FBT002
+    on_type_conflict: OnTypeConflict | None = None,
+) -> None:
+    global _worker_merger  # noqa: PLW0603
+    _worker_merger = Merger(
+        merge_rules=merge_rules,
+        rule_overrides=rule_overrides,
+        interner=PathInterner() if intern_paths else None,
+        on_collision=on_collision,
+        on_metrics=on_metrics,
+        specialize=specialize,
+        on_type_conflict=on_type_conflict,
+    )
+
+
+def _merge_group_in_worker(
+    group: tuple[str | None, list[dict[str, Any]]], *, compiled: bool, versioned: bool
+) -> MergeResult:
+    if TYPE_CHECKING:
+        assert _worker_merger is not None
+    return _worker_merger._merge_group(*group, compiled=compiled, versioned=versioned)  # noqa: SLF001
+
+
+def _merge_groups_in_worker(
+    groups: list[tuple[str | None, list[dict[str, Any]]]], *, compiled: bool, versioned: bool
+) -> list[MergeResult]:
+    return [_merge_group_in_worker(group, compiled=compiled, versioned=versioned) for group in groups]
+
+
+def _chunked(iterable: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _get_completed(completed: SimpleQueue[list[MergeResult] | BaseException]) -> list[MergeResult]:
+    result = completed.get()
+    if isinstance(result, BaseException):
+        raise result
+    return result
+
+
+def _check_types(
+    merged_releases: list[MergedRelease],
+    release: dict[str, Any],
+    flat: Flattened,
+    on_type_conflict: OnTypeConflict | None,
+) -> list[MergedRelease]:
+    # Return the merged releases into which the flattened release can be merged, checking its types against each
+    # merged release's types. The on_type_conflict function is called once, with the conflicts in all merged releases.
+    if on_type_conflict is None:
+        return merged_releases
+    accepted = []
+    conflicts: list[TypeConflict] = []
+    for merged_release in merged_releases:
+        merged_release_conflicts = merged_release._type_conflicts(flat)  # noqa: SLF001
+        if merged_release_conflicts:
+            conflicts.extend(merged_release_conflicts)
+        else:
+            accepted.append(merged_release)
+    if conflicts:
+        on_type_conflict(release, list(dict.fromkeys(conflicts)))
+    return accepted
 
 
 class MergedRelease:
@@ -56,52 +354,188 @@ class MergedRelease:
         schema: Schema = None,
         merge_rules: MergeRules | None = None,
         rule_overrides: RuleOverrides | None = None,
+        rule_tree: RuleNode | None = None,
+        interner: PathInterner | None = None,
+        on_collision: OnCollision | None = warn_collision,
+        metrics: Metrics | None = None,
+        flatten_function: FlattenFunction | None = None,
+        on_type_conflict: OnTypeConflict | None = None,
     ):
         """
         Initialize a merged release.
 
         :param data: the latest copy of the merged release, if any
-        :param schema: the release schema (if not provided, will default to the latest version of OCDS)
+        :param schema: the release schema (if not provided, will default to the latest version of OCDS bundled with
+            this package)
         :param merge_rules: the merge rules (if not provided, will determine the rules from the ``schema``)
         :param rule_overrides: any rule overrides, in which keys are field paths as tuples, and values are either
             ``ocdsmerge.APPEND`` or ``ocdsmerge.MERGE_BY_POSITION``
+        :param rule_tree: the tree of the merge rules and rule overrides (if not provided, will compile it using
+            :func:`~ocdsmerge.flatten.compile_rules`)
+        :param interner: the interner of the paths, if any, which can be shared by many merged releases (see
+            :class:`~ocdsmerge.flatten.PathInterner`)
+        :param on_collision: the function to call if objects in an array have the same ``id`` value, or ``None`` to
+            not check (see :func:`~ocdsmerge.flatten.flatten`)
+        :param metrics: the metrics to which to add this merged release's counters and timings, if any
+        :param flatten_function: the function with which to flatten releases, generated from the merge rules and
+            rule overrides (if not provided, will use :func:`~ocdsmerge.flatten.flatten_with_rules` with the
+            ``rule_tree``; see :func:`~ocdsmerge.codegen.get_flatten_function`)
+        :param on_type_conflict: the function to call if a release has a field whose type differs from its type in
+            earlier releases, in which case the release isn't merged, or ``None`` to not check (see
+            :meth:`~ocdsmerge.merge.MergedRelease.flatten_release`)
         :type schema: dict or str
         """
         if merge_rules is None:
             merge_rules = get_merge_rules(schema)
         if rule_overrides is None:
             rule_overrides = {}
+        if rule_tree is None:
+            rule_tree = compile_rules(merge_rules, rule_overrides)
 
         self.merge_rules = merge_rules
         self.rule_overrides = rule_overrides
+        self.rule_tree = rule_tree
+        if flatten_function is None:
+            flatten_function = partial(flatten_with_rules, node=rule_tree)
+        self.flatten_function = flatten_function
+        self.interner = interner
+        self.on_collision = on_collision
+        self.metrics = metrics
+        self.on_type_conflict = on_type_conflict
+        # The types of the fields in the merged release, if checked. They are determined from the data when first
+        # checked, and again after the data changes other than by checked releases.
+        self.types: TypeTable | None = None
+        # Objects without `id` values are given sequential identifiers, so that merged releases are reproducible.
+        self.new_identifier = IdentifierSequence()
 
         if data is None:
             self.data = {}
         else:
-            self.data = flatten(data, self.merge_rules, self.rule_overrides, flattened={}, versioned=self.versioned)
+            self.data = self.flatten_function(
+                data,
+                flattened={},
+                versioned=self.versioned,
+                new_identifier=self.new_identifier,
+                interner=self.interner,
+                on_collision=self.on_collision,
+            )
+
+    @classmethod
+    def from_state(cls, state: dict[str, Any], **kwargs) -> MergedRelease:
+        """
+        Initialize a merged release from the output of :meth:`~ocdsmerge.merge.MergedRelease.get_state`.
+
+        Unlike initializing a merged release with its ``data``, this doesn't re-flatten the merged release.
+
+        :param state: the flattened state of the merged release
+        :param kwargs: the other arguments to :meth:`~ocdsmerge.merge.MergedRelease.__init__`
+        """
+        merged_release = cls(**kwargs)
+        merged_release._load_state(state)
+        return merged_release
+
+    def _load_state(self, state: dict[str, Any]) -> None:
+        self.data = load_flattened(state["data"], self.interner)
+        self.new_identifier = IdentifierSequence(state["last_identifier"])
+
+    def get_state(self) -> dict[str, Any]:
+        """Return the flattened state of the merged release as JSON-serializable data, for later updates."""
+        return {"data": dump_flattened(self.data), "last_identifier": self.new_identifier.last}
 
     def asdict(self) -> dict[str, Any]:
         """Return the merged release as a dictionary."""
-        return unflatten(self.data)
+        if self.metrics is None:
+            return unflatten(self.data)
+        with self.metrics.timer("unflatten"):
+            return unflatten(self.data)
+
+    def view(self) -> MergedReleaseView:
+        """
+        Return a read-only view of the merged release, which unflattens each field when it is accessed.
+
+        To read a few fields, this is faster than :meth:`~ocdsmerge.merge.MergedRelease.asdict`.
+        """
+        return MergedReleaseView(self.data)
 
     def extend(self, releases: list[dict[str, Any]]) -> None:
         """Sort and merge many releases into the merged release."""
-        for release in sorted_releases(releases):
+        sort = sorted_releases if self.metrics is None else self.metrics.sorted_releases
+        for release in sort(releases):
             self.append(release)
 
     def append(self, release: dict[str, Any]) -> None:
         """Merge one release into the merged release."""
-        release = release.copy()
+        if self.metrics is None:
+            args = self.flatten_release(release)
+            if args is not None:
+                self.flat_append(*args)
+        else:
+            args = self.metrics.flatten_release(self, release)
+            if args is not None:
+                self.metrics.flat_append(self, args)
+
+    def flatten_release(
+        self, release: dict[str, Any], *, check_types: bool = True
+    ) -> tuple[Flattened, str | None, str | None, str | None, str | None] | None:
+        """
+        Flatten one release, returning the arguments to :meth:`~ocdsmerge.merge.MergedRelease.flat_append`.
+
+        If the merged release has an ``on_type_conflict`` function, and if the release has a field that is a literal,
+        an object or an array, but that was created as another type by earlier releases, the function is called with
+        the release and its conflicts (see :class:`~ocdsmerge.typecheck.TypeTable`), and ``None`` is returned. The
+        release is checked as if it were merged last.
+
+        A conflict is an error that :meth:`~ocdsmerge.merge.MergedRelease.asdict` would raise after the release is
+        merged. A literal for a field that was created as an object or an array is ignored by ``asdict``, and the
+        objects of an array are appended to a field that was created as a list (like the versioned values of a field
+        that was null), so these aren't conflicts.
+
+        :param release: the release
+        :param check_types: whether to check the types of the release's fields, if the merged release has an
+            ``on_type_conflict`` function
+        """
+        data = release.copy()
 
         # Store the values of fields that set "omitWhenMerged": true.
-        ocid = release.get("ocid")
-        release_id = release.get("id")
-        date = release.get("date")
+        ocid = data.get("ocid")
+        release_id = data.get("id")
+        date = data.get("date")
         # Prior to OCDS 1.1.4, `tag` didn't set "omitWhenMerged": true.
-        tag = release.pop("tag", None)
+        tag = data.pop("tag", None)
+
+        flat = self.flatten_function(
+            data,
+            flattened={},
+            new_identifier=self.new_identifier,
+            interner=self.interner,
+            on_collision=self.on_collision,
+        )
+        if check_types and self.on_type_conflict is not None:
+            conflicts = self._type_conflicts(flat)
+            if conflicts:
+                self.on_type_conflict(release, conflicts)
+                return None
+        return flat, ocid, release_id, date, tag
 
-        flat = flatten(release, self.merge_rules, self.rule_overrides, flattened={})
-        self.flat_append(flat, ocid, release_id, date, tag)
+    def _type_conflicts(self, flat: Flattened) -> list[TypeConflict]:
+        if self.types is None:
+            self.types = TypeTable(self.data, versioned=self.versioned)
+        return self.types.check(self.data, flat)
+
+    def flatten_releases(self, releases: list[dict[str, Any]]) -> ReleaseBatch:
+        """
+        Sort and flatten many releases into columns, for :meth:`~ocdsmerge.merge.MergedRelease.flat_extend`.
+
+        Unlike :meth:`~ocdsmerge.merge.MergedRelease.flatten_release`, the types of the releases' fields aren't
+        checked, even if the merged release has an ``on_type_conflict`` function.
+        """
+        return flatten_releases(
+            sorted_releases(releases),
+            self.rule_tree,
+            new_identifier=self.new_identifier,
+            interner=self.interner,
+            on_collision=self.on_collision,
+        )
 
     def flat_append(
         self,
@@ -113,14 +547,65 @@ class MergedRelease:
     ) -> None:
         raise NotImplementedError("subclasses must implement flat_append()")
 
+    def flat_extend(self, batch: ReleaseBatch) -> None:
+        """
+        Merge many flattened releases into the merged release.
+
+        This is like calling :meth:`~ocdsmerge.merge.MergedRelease.flat_append` for each release, but each path's rows
+        are merged at once. The types of the releases' fields aren't checked (see
+        :meth:`~ocdsmerge.merge.MergedRelease.flatten_releases`).
+        """
+        raise NotImplementedError("subclasses must implement flat_extend()")
+
+
+# The paths that CompiledRelease sets for each release.
+_COMPILED_METADATA_PATHS = frozenset([("id",), ("date",), ("ocid",)])
+
 
 class CompiledRelease(MergedRelease):
     versioned = False
 
-    def __init__(self, data: dict[str, Any] | None = None, **kwargs):
+    def __init__(self, data: dict[str, Any] | None = None, *, track_dates: bool = False, **kwargs):
+        """
+        Initialize a compiled release.
+
+        :param track_dates: whether to remember the date of the release that set each field, so that
+            :meth:`~ocdsmerge.merge.CompiledRelease.insert` can merge a release that is earlier than releases already
+            merged
+        """
         super().__init__(data, **kwargs)
         self.data[("tag",)] = ["compiled"]
 
+        # The date of the release that set each path. The date of the latest release is stored at ("date",).
+        self.dates: dict[tuple[Identifier, ...], str | None] | None = {} if track_dates else None
+
+    def _load_state(self, state: dict[str, Any]) -> None:
+        super()._load_state(state)
+        if self.dates is not None and "dates" in state:
+            self.dates = load_flattened(state["dates"], self.interner)
+
+    def get_state(self) -> dict[str, Any]:
+        state = super().get_state()
+        if self.dates is not None:
+            state["dates"] = dump_flattened(self.dates)
+        return state
+
+    def append(self, release: dict[str, Any], *, changes: bool = False) -> Changes | None:
+        """
+        Merge one release into the compiled release.
+
+        :param release: the release
+        :param changes: whether to return the paths whose values the release changed (see
+            :func:`~ocdsmerge.patch.json_patch`)
+        """
+        args = self.flatten_release(release) if self.metrics is None else self.metrics.flatten_release(self, release)
+        if args is None:
+            return Changes(len(self.data)) if changes else None
+        if self.metrics is None:
+            return self.flat_append(*args, changes=changes)
+        with self.metrics.timer("flat_append"):
+            return self.flat_append(*args, changes=changes)
+
     def flat_append(
         self,
         flat: Flattened,
@@ -128,7 +613,15 @@ class CompiledRelease(MergedRelease):
         release_id: str | None,  # noqa: ARG002
         date: str | None,
         tag: str | None,  # noqa: ARG002
-    ) -> None:
+        *,
+        changes: bool = False,
+    ) -> Changes | None:
+        diff = None
+        if changes:
+            diff = Changes(len(self.data))
+            _add_changes(self.data, diff, {("id",): f"{ocid}-{date}", ("date",): date, ("ocid",): ocid})
+            _add_changes(self.data, diff, flat)
+
         # Add an `id` and `date`.
         self.data[("id",)] = f"{ocid}-{date}"
         self.data[("date",)] = date
@@ -137,10 +630,218 @@ class CompiledRelease(MergedRelease):
 
         self.data.update(flat)
 
+        if self.dates is not None:
+            self.dates[("date",)] = date
+            self.dates.update(dict.fromkeys(flat, date))
+
+        return diff
+
+    def insert(self, release: dict[str, Any], *, changes: bool = False) -> Changes | None:
+        """
+        Merge one release into the compiled release, at the position of its ``date``.
+
+        Unlike :meth:`~ocdsmerge.merge.MergedRelease.append`, the release can be earlier than releases already merged.
+        A field is set only if no later release set it. Objects in arrays are ordered by when they were first merged,
+        not by date.
+
+        If the compiled release wasn't initialized with ``track_dates=True``, the dates of the fields merged before are
+        unknown, and the release sets all its fields, like :meth:`~ocdsmerge.merge.MergedRelease.append`. A release
+        without a ``date`` is merged like :meth:`~ocdsmerge.merge.MergedRelease.append`, too.
+
+        :param release: the release
+        :param changes: whether to return the paths whose values the release changed (see
+            :func:`~ocdsmerge.patch.json_patch`)
+        """
+        args = self.flatten_release(release)
+        if args is None:
+            return Changes(len(self.data)) if changes else None
+        return self.flat_insert(*args, changes=changes)
+
+    def flat_insert(
+        self,
+        flat: Flattened,
+        ocid: str | None,
+        release_id: str | None,
+        date: str | None,
+        tag: str | None,
+        *,
+        changes: bool = False,
+    ) -> Changes | None:
+        """Like :meth:`~ocdsmerge.merge.CompiledRelease.flat_append`, but for a release at any position."""
+        # The date of a release without a date can't be compared.
+        if self.dates is None or date is None:
+            return self.flat_append(flat, ocid, release_id, date, tag, changes=changes)
+
+        dates = self.dates
+        diff = Changes(len(self.data)) if changes else None
+
+        # If releases have the same date, the inserted release is considered the latest.
+        latest = dates.get(("date",))
+        if latest is None or date >= latest:
+            metadata = {("id",): f"{ocid}-{date}", ("date",): date, ("ocid",): ocid}
+            if diff is not None:
+                _add_changes(self.data, diff, metadata)
+            self.data.update(metadata)
+            dates[("date",)] = date
+
+        # The paths that no later release set.
+        updates = {}
+        for key, value in flat.items():
+            previous = dates.get(key)
+            if previous is None or date >= previous:
+                updates[key] = value
+
+        # The release was checked as if it were merged last, so, if later releases set some of its paths, the types of
+        # the fields are determined again when next checked.
+        if len(updates) < len(flat):
+            self.types = None
+
+        if diff is not None:
+            _add_changes(self.data, diff, updates)
+        self.data.update(updates)
+        dates.update(dict.fromkeys(updates, date))
+
+        return diff
+
+    def flat_extend(self, batch: ReleaseBatch) -> None:
+        if not batch.releases:
+            return
+
+        # The releases weren't checked, so the types of the fields are determined again when next checked.
+        self.types = None
+
+        last = len(batch.releases) - 1
+        ocid, _, date, _ = batch.releases[last]
+
+        self.data[("id",)] = f"{ocid}-{date}"
+        self.data[("date",)] = date
+        self.data[("ocid",)] = ocid
+
+        # The last value of each path wins, except that the `id`, `date` and `ocid` set for the last release replace
+        # the values of earlier releases.
+        for path, row in zip(batch.paths, batch.last_rows(), strict=True):
+            if path in _COMPILED_METADATA_PATHS and batch.release_indexes[row] != last:
+                continue
+            self.data[path] = batch.values[row]
+            if self.dates is not None:
+                self.dates[path] = batch.releases[batch.release_indexes[row]][2]
+
+        if self.dates is not None:
+            self.dates[("date",)] = date
+
+
+def _add_changes(data: Flattened, changes: Changes, flat: Flattened) -> None:
+    for key, value in flat.items():
+        if key in changes:
+            continue
+        if key not in data:
+            changes[key] = None
+        else:
+            previous = data[key]
+            # 1 == 1.0 == True, but their JSON differs.
+            if type(previous) is not type(value) or previous != value:
+                changes[key] = previous
+
 
 class VersionedRelease(MergedRelease):
+    """
+    A versioned release.
+
+    The history of each field is stored in :attr:`~ocdsmerge.merge.MergedRelease.data` as a list of
+    ``(release_index, value)`` tuples, in which ``release_index`` is the index of the release's metadata in
+    :attr:`~ocdsmerge.merge.VersionedRelease.releases`. Versioned values are created by
+    :meth:`~ocdsmerge.merge.VersionedRelease.asdict`.
+    """
+
     versioned = True
 
+    def __init__(self, data: dict[str, Any] | None = None, *, track_repeats: bool = False, **kwargs):
+        """
+        Initialize a versioned release.
+
+        :param track_repeats: whether to remember the releases that repeat a field's previous value, so that
+            :meth:`~ocdsmerge.merge.VersionedRelease.insert` can version the field if an earlier release changes it
+        """
+        #: The releaseID, releaseDate and releaseTag of each release, as tuples.
+        self.releases: list[ReleaseMetadata] = []
+        self._release_indexes: dict[tuple[Any, ...], int] = {}
+
+        super().__init__(data, **kwargs)
+
+        # Store the versioned values of the existing versioned release, if any, as history entries.
+        for key, value in self.data.items():
+            if type(value) is list and all(type(item) is dict and is_versioned_value(item) for item in value):
+                self.data[key] = [
+                    (
+                        self._get_release_index((item["releaseID"], item["releaseDate"], item["releaseTag"])),
+                        item["value"],
+                    )
+                    for item in value
+                ]
+
+        # The indexes of the releases that repeated a path's previous value, sorted by date.
+        self.repeats: dict[tuple[Identifier, ...], list[int]] | None = {} if track_repeats else None
+
+    def _get_release_index(self, metadata: ReleaseMetadata) -> int:
+        release_id, date, tag = metadata
+        key = (release_id, date, tuple(tag) if type(tag) is list else tag)
+        try:
+            return self._release_indexes[key]
+        except KeyError:
+            index = self._release_indexes[key] = len(self.releases)
+        # If the metadata is unhashable (that is, invalid), don't re-use it.
+        except TypeError:
+            index = len(self.releases)
+        self.releases.append(metadata)
+        return index
+
+    def _load_state(self, state: dict[str, Any]) -> None:
+        super()._load_state(state)
+        for metadata in state["releases"]:
+            self._get_release_index(tuple(metadata))
+        for key, value in self.data.items():
+            if type(value) is list:
+                self.data[key] = list(map(tuple, value))
+        if self.repeats is not None and "repeats" in state:
+            self.repeats = load_flattened(state["repeats"], self.interner)
+
+    def get_state(self) -> dict[str, Any]:
+        state = super().get_state()
+        for pair in state["data"]:
+            if type(pair[1]) is list:
+                pair[1] = list(map(list, pair[1]))
+        state["releases"] = list(map(list, self.releases))
+        if self.repeats is not None:
+            state["repeats"] = dump_flattened(self.repeats)
+        return state
+
+    def asdict(self) -> dict[str, Any]:
+        """Return the versioned release as a dictionary."""
+        if self.metrics is None:
+            return self._asdict()
+        with self.metrics.timer("unflatten"):
+            return self._asdict()
+
+    def view(self) -> MergedReleaseView:
+        """Return a read-only view of the versioned release, which unflattens each field when it is accessed."""
+        return MergedReleaseView(self.data, self.get_versioned_values)
+
+    def _asdict(self) -> dict[str, Any]:
+        return unflatten(
+            {
+                key: self.get_versioned_values(value) if type(value) is list else value
+                for key, value in self.data.items()
+            }
+        )
+
+    def get_versioned_values(self, history: list[HistoryEntry]) -> list[dict[str, Any]]:
+        """Return a field's history entries as versioned values."""
+        versioned_values = []
+        for index, value in history:
+            release_id, date, tag = self.releases[index]
+            versioned_values.append({"releaseID": release_id, "releaseDate": date, "releaseTag": tag, "value": value})
+        return versioned_values
+
     def flat_append(
         self,
         flat: Flattened,
@@ -148,21 +849,380 @@ class VersionedRelease(MergedRelease):
         release_id: str | None,
         date: str | None,
         tag: str | None,
-    ) -> None:
+    ) -> bool:
+        """Merge one flattened release into the versioned release, and return whether its histories changed."""
         # Don't version the OCID.
         flat.pop(("ocid",), None)
+        changed = ("ocid",) not in self.data or self.data[("ocid",)] != ocid
         self.data[("ocid",)] = ocid
 
+        index = self._get_release_index((release_id, date, tag))
+
+        for key, value in flat.items():
+            if key in self.data:
+                # If key is not versioned, continue.
+                if type(self.data[key]) is not list:
+                    continue
+                # If the value is unchanged, don't add it to the history.
+                if value == self.data[key][-1][1]:
+                    if self.repeats is not None:
+                        self.repeats.setdefault(key, []).append(index)
+                    continue
+
+            self.data.setdefault(key, []).append((index, value))
+            changed = True
+
+        return changed
+
+    def flat_extend(self, batch: ReleaseBatch) -> None:
+        if not batch.releases:
+            return
+
+        # The releases weren't checked, so the types of the fields are determined again when next checked.
+        self.types = None
+
+        indexes = [self._get_release_index(metadata[1:]) for metadata in batch.releases]
+
+        # Don't version the OCID.
+        self.data[("ocid",)] = batch.releases[-1][0]
+
+        values = batch.values
+        for path, rows in zip(batch.paths, batch.rows_by_path(), strict=True):
+            if path == ("ocid",):
+                continue
+
+            if path in self.data:
+                history = self.data[path]
+                # If the path is not versioned (even if its value is null), continue.
+                if type(history) is not list:
+                    continue
+            else:
+                history = self.data[path] = []
+
+            for row in rows:
+                value = values[row]
+                index = indexes[batch.release_indexes[row]]
+                # If the value is unchanged, don't add it to the history.
+                if history and value == history[-1][1]:
+                    if self.repeats is not None:
+                        self.repeats.setdefault(path, []).append(index)
+                    continue
+                history.append((index, value))
+
+    def insert(self, release: dict[str, Any]) -> None:
+        """
+        Merge one release into the versioned release, at the position of its ``date``.
+
+        Unlike :meth:`~ocdsmerge.merge.MergedRelease.append`, the release can be earlier than releases already merged.
+        Only the histories of the fields in the release are updated. Fields, and objects in arrays, are ordered by
+        when they were first merged, not by date, so the output can differ from
+        :meth:`~ocdsmerge.merge.MergedRelease.extend` with the same releases. In particular, if a later release set a
+        field to null, and the inserted release sets it to an array or an object, ``asdict`` has the null value's
+        versioned values before the array's objects, or raises an :exc:`~ocdsmerge.exceptions.InconsistentTypeError`
+        for the object. (With an ``on_type_conflict`` function, the release is checked as if it were merged last, so
+        it is reported instead.)
+
+        If the versioned release wasn't initialized with ``track_repeats=True``, then, if a later release repeated a
+        field's previous value and the inserted release changes it, the later release is missing from its history.
+        """
+        args = self.flatten_release(release)
+        if args is not None:
+            self.flat_insert(*args)
+
+    def flat_insert(
+        self,
+        flat: Flattened,
+        ocid: str | None,
+        release_id: str | None,
+        date: str | None,
+        tag: str | None,
+    ) -> bool:
+        """Like :meth:`~ocdsmerge.merge.VersionedRelease.flat_append`, but for a release at any position."""
+        # The date of a release without a date can't be compared.
+        if date is None:
+            return self.flat_append(flat, ocid, release_id, date, tag)
+
+        flat.pop(("ocid",), None)
+        changed = ("ocid",) not in self.data
+        self.data.setdefault(("ocid",), ocid)
+
+        index = self._get_release_index((release_id, date, tag))
+
         for key, value in flat.items():
-            # If key is not versioned, continue. If the value is unchanged, don't add it to the history.
-            if key in self.data and (type(self.data[key]) is not list or value == self.data[key][-1]["value"]):
+            if key in self.data and type(self.data[key]) is not list:
+                continue
+
+            history = self.data.setdefault(key, [])
+            # If releases have the same date, the inserted release is considered the latest.
+            position = bisect_right(history, date, key=self._get_entry_date)
+
+            # If the value is unchanged from the previous entry, don't add it to the history.
+            if position and value == history[position - 1][1]:
+                self._add_repeat(key, index)
                 continue
 
-            self.data.setdefault(key, []).append(
-                {
-                    "releaseID": release_id,
-                    "releaseDate": date,
-                    "releaseTag": tag,
-                    "value": value,
-                }
+            history.insert(position, (index, value))
+            changed = True
+
+            following = history[position + 1] if position + 1 < len(history) else None
+
+            # If a later release repeated the previous value, it now changes the value back.
+            repeat = (
+                self._pop_repeat(key, date, self._get_entry_date(following) if following else None)
+                if position
+                else None
             )
+            if repeat is not None:
+                history.insert(position + 1, (repeat, history[position - 1][1]))
+            # If the following entry has the same value, it no longer changes the value.
+            elif following and following[1] == value:
+                del history[position + 1]
+                self._add_repeat(key, following[0])
+
+        return changed
+
+    def _get_entry_date(self, entry: HistoryEntry) -> str | None:
+        return self.releases[entry[0]][1]
+
+    def _get_repeat_date(self, index: int) -> str | None:
+        return self.releases[index][1]
+
+    def _add_repeat(self, key: tuple[Identifier, ...], index: int) -> None:
+        if self.repeats is not None:
+            insort(self.repeats.setdefault(key, []), index, key=self._get_repeat_date)
+
+    def _pop_repeat(self, key: tuple[Identifier, ...], start: str | None, end: str | None) -> int | None:
+        # Return the first repeat strictly between the dates, if any.
+        if self.repeats is None or key not in self.repeats:
+            return None
+        repeats = self.repeats[key]
+        position = bisect_right(repeats, start, key=self._get_repeat_date)
+        if position < len(repeats) and (end is None or self._get_repeat_date(repeats[position]) < end):
+            return repeats.pop(position)
+        return None
+
+
+# The objects and arrays of a DirectCompiledRelease, to distinguish them from literal values, like the value of a
+# `wholeListMerge` field, which can also be dicts and lists.
+class _Object(dict):
+    __slots__ = ()
+
+
+# An object in an array that was given its `id` value when created. Its `id` value isn't overwritten.
+class _Item(dict):
+    __slots__ = ()
+
+
+class _Array(list):
+    # The objects in the array, by identifier.
+    __slots__ = ("index",)
+
+    def __init__(self):
+        super().__init__()
+        self.index: dict[Identifier, dict[str, Any]] = {}
+
+
+class DirectCompiledRelease:
+    """
+    A compiled release that merges each release directly into a nested object, without flattening it.
+
+    The output is the same as :class:`~ocdsmerge.merge.CompiledRelease`, but with fewer objects created. (If objects
+    in an array have ``id`` values of different types with the same string, like ``1`` and ``"1"``, the output can
+    differ.) Use
+    :class:`~ocdsmerge.merge.CompiledRelease` to persist the flattened state or to create a versioned release from the
+    same flattened releases.
+
+    If a release sets an object or array where an earlier release set a literal value,
+    :exc:`~ocdsmerge.exceptions.InconsistentTypeError` is raised when the release is merged, even if a later release
+    sets the field to null. (:class:`~ocdsmerge.merge.CompiledRelease` raises the error when the compiled release is
+    created, based on the fields' latest values.) If a release sets a literal value where an earlier release set an
+    object or array, the literal value is ignored, like :class:`~ocdsmerge.merge.CompiledRelease`.
+    """
+
+    def __init__(
+        self,
+        data: dict[str, Any] | None = None,
+        schema: Schema = None,
+        merge_rules: MergeRules | None = None,
+        rule_overrides: RuleOverrides | None = None,
+        rule_tree: RuleNode | None = None,
+        on_collision: OnCollision | None = warn_collision,
+    ):
+        """
+        Initialize a compiled release.
+
+        The arguments are the same as :meth:`~ocdsmerge.merge.MergedRelease.__init__`.
+        """
+        if merge_rules is None:
+            merge_rules = get_merge_rules(schema)
+        if rule_overrides is None:
+            rule_overrides = {}
+        if rule_tree is None:
+            rule_tree = compile_rules(merge_rules, rule_overrides)
+
+        self.merge_rules = merge_rules
+        self.rule_overrides = rule_overrides
+        self.rule_tree = rule_tree
+        self.on_collision = on_collision
+
+        #: The compiled release, in which null values are kept, to preserve the order of fields.
+        self.data: dict[str, Any] = _Object()
+        if data is not None:
+            self._merge_object(self.data, data, self.rule_tree, ())
+        self.data["tag"] = ["compiled"]
+
+    def asdict(self) -> dict[str, Any]:
+        """Return the compiled release as a dictionary."""
+        return _copy_object(self.data)
+
+    def extend(self, releases: list[dict[str, Any]]) -> None:
+        """Sort and merge many releases into the compiled release."""
+        for release in sorted_releases(releases):
+            self.append(release)
+
+    def append(self, release: dict[str, Any]) -> None:
+        """Merge one release into the compiled release."""
+        release = release.copy()
+        # Prior to OCDS 1.1.4, `tag` didn't set "omitWhenMerged": true.
+        release.pop("tag", None)
+
+        ocid = release.get("ocid")
+        date = release.get("date")
+
+        # Add an `id` and `date`.
+        self.data["id"] = f"{ocid}-{date}"
+        self.data["date"] = date
+        # In OCDS 1.0, `ocid` incorrectly sets "mergeStrategy": "ocdsOmit".
+        self.data["ocid"] = ocid
+
+        self._merge_object(self.data, release, self.rule_tree, ())
+
+    def _merge_object(self, node: dict[str, Any], obj: dict[str, Any], rule_node: RuleNode, path: tuple[str, ...]):
+        # This follows the logic of flatten_with_rules. Objects and arrays are created only if they contain fields.
+        children = rule_node.children
+        is_item = type(node) is _Item
+
+        for key, value in obj.items():
+            # An object's `id` value is set when the object is created, like in unflatten.
+            if is_item and key == "id":
+                continue
+
+            new_node = children.get(key, _EMPTY_NODE)
+            rule = new_node.rule
+
+            if rule == "omitWhenMerged":
+                continue
+
+            current = node.get(key)
+
+            # See flatten_with_rules.
+            if (
+                rule == "wholeListMerge"
+                or not isinstance(value, (dict, list))
+                or (type(value) is list and any(not isinstance(item, dict) for item in value))
+            ):
+                # Like unflatten, a literal value doesn't replace an object or array.
+                if type(current) not in {_Object, _Item, _Array}:
+                    node[key] = value
+            elif value:
+                new_path = (*path, key)
+                expected = _Array if type(value) is list else _Object
+
+                if type(current) is expected:
+                    self._merge_value(current, value, new_node, new_path)
+                    continue
+
+                new_value = expected()
+                self._merge_value(new_value, value, new_node, new_path)
+                if not new_value:
+                    continue
+
+                if current is not None:
+                    if expected is _Array:
+                        message = (
+                            "An earlier release had the object {!r} for /{}, but the current release has an array"
+                        )
+                        raise InconsistentTypeError(message.format(current, "/".join(new_path)))
+                    message = "An earlier release had the value {!r} for /{}, but the current release has an object with a {!r} key"  # noqa: E501
+                    raise InconsistentTypeError(message.format(current, "/".join(new_path), next(iter(new_value))))
+
+                # If an earlier release set the field to null, the object or array is added at the end, like unflatten.
+                node.pop(key, None)
+                node[key] = new_value
+
+    def _merge_value(self, node: Any, value: Any, rule_node: RuleNode, path: tuple[str, ...]) -> None:
+        if type(node) is _Array:
+            self._merge_array(node, value, rule_node, path)
+        else:
+            self._merge_object(node, value, rule_node, path)
+
+    def _merge_array(
+        self, array: _Array, items: list[dict[str, Any]], rule_node: RuleNode, path: tuple[str, ...]
+    ) -> None:
+        # This follows the logic of _enumerate and _id_value.
+        rule = rule_node.override
+        index = array.index
+
+        # This tracks the identifiers of objects in the array, to report collisions.
+        on_collision = self.on_collision
+        seen = None if on_collision is None else set()
+
+        for position, item in enumerate(items):
+            has_id = "id" in item
+            if has_id:
+                id_value = item["id"]
+                if seen is not None:
+                    default_key = str(id_value)
+                    if default_key in seen:
+                        on_collision(path, default_key)
+                    else:
+                        seen.add(default_key)
+            else:
+                id_value = None
+
+            # Objects without `id` keys, and objects in arrays with the `APPEND` rule override, are new objects. An
+            # `id` key with a null value is an identifier, like in _id_value.
+            if rule == MergeStrategy.MERGE_BY_POSITION:
+                identifier = position
+                is_new = False
+            elif rule != MergeStrategy.APPEND and has_id:
+                identifier = id_value
+                is_new = False
+            else:
+                identifier = position
+                is_new = True
+
+            item_path = (*path, IdValue(identifier))
+
+            if not is_new and identifier in index:
+                self._merge_object(index[identifier], item, rule_node, item_path)
+                continue
+
+            if id_value is None:
+                new_item = _Object()
+            else:
+                new_item = _Item()
+                new_item["id"] = id_value
+
+            self._merge_object(new_item, item, rule_node, item_path)
+            if new_item:
+                array.append(new_item)
+                if not is_new:
+                    index[identifier] = new_item
+
+
+def _copy_object(node: dict[str, Any]) -> dict[str, Any]:
+    # Omit null'ed fields, like unflatten.
+    return {
+        key: _copy_array(value)
+        if type(value) is _Array
+        else _copy_object(value)
+        if type(value) in {_Object, _Item}
+        else value
+        for key, value in node.items()
+        if value is not None
+    }
+
+
+def _copy_array(array: _Array) -> list[dict[str, Any]]:
+    return [_copy_object(item) for item in array]
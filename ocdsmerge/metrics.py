@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from time import perf_counter
+from typing import TYPE_CHECKING, Any
+
+from ocdsmerge.flatten import IdValue
+from ocdsmerge.util import sorted_releases
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+
+    from ocdsmerge.flatten import Flattened
+    from ocdsmerge.merge import MergedRelease
+
+COUNTERS = ("releases", "leaves", "arrays", "items_without_id", "identifiers", "versioned_entries")
+TIMERS = ("sorted_releases", "flatten", "flat_append", "unflatten")
+
+
+class Metrics:
+    """
+    The counters and timings of merges.
+
+    Pass an instance as the ``metrics`` argument of :class:`~ocdsmerge.merge.MergedRelease`, or pass an ``on_metrics``
+    function to :class:`~ocdsmerge.merge.Merger`, which is called with each OCID and its merge's metrics. If no metrics
+    are collected (the default), the only cost is checking whether ``metrics`` is ``None`` once per call.
+
+    Counting the arrays and objects in a flattened release costs in proportion to the lengths of its paths.
+    """
+
+    __slots__ = (*COUNTERS, "timings")
+
+    def __init__(self):
+        #: The number of releases flattened.
+        self.releases = 0
+        #: The number of paths in the flattened releases.
+        self.leaves = 0
+        #: The number of non-empty arrays of objects in the flattened releases.
+        self.arrays = 0
+        #: The number of objects in arrays without an ``id`` value in the flattened releases.
+        self.items_without_id = 0
+        #: The number of identifiers generated, for objects without ``id`` values and objects in ``APPEND`` arrays.
+        self.identifiers = 0
+        #: The number of entries appended to the histories of versioned releases.
+        self.versioned_entries = 0
+        #: The seconds spent in ``sorted_releases``, ``flatten``, ``flat_append`` and ``unflatten``.
+        self.timings: dict[str, float] = dict.fromkeys(TIMERS, 0.0)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.asdict()!r})"
+
+    def asdict(self) -> dict[str, Any]:
+        """Return the counters and timings as a dictionary, in which timings are prefixed with ``seconds_``."""
+        data: dict[str, Any] = {name: getattr(self, name) for name in COUNTERS}
+        for name, seconds in self.timings.items():
+            data[f"seconds_{name}"] = seconds
+        return data
+
+    @contextmanager
+    def timer(self, name: str) -> Generator[None, None, None]:
+        """Add the time spent in the ``with`` block to the timing."""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] += perf_counter() - start
+
+    def sorted_releases(self, releases: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Sort the releases, like :func:`~ocdsmerge.util.sorted_releases`."""
+        with self.timer("sorted_releases"):
+            return sorted_releases(releases)
+
+    def flatten_release(
+        self, merged_release: MergedRelease, release: dict[str, Any], *, check_types: bool = True
+    ) -> tuple[Flattened, str | None, str | None, str | None, str | None] | None:
+        """Flatten the release, like :meth:`~ocdsmerge.merge.MergedRelease.flatten_release`."""
+        last = merged_release.new_identifier.last
+        with self.timer("flatten"):
+            args = merged_release.flatten_release(release, check_types=check_types)
+
+        self.releases += 1
+        self.identifiers += merged_release.new_identifier.last - last
+        if args is not None:
+            self._count(args[0])
+        return args
+
+    def flat_append(
+        self, merged_release: MergedRelease, args: tuple[Flattened, str | None, str | None, str | None, str | None]
+    ) -> None:
+        """Merge the flattened release, like :meth:`~ocdsmerge.merge.MergedRelease.flat_append`."""
+        if not merged_release.versioned:
+            with self.timer("flat_append"):
+                merged_release.flat_append(*args)
+            return
+
+        data = merged_release.data
+        keys = list(args[0])
+        before = _history_length(data, keys)
+        with self.timer("flat_append"):
+            merged_release.flat_append(*args)
+        self.versioned_entries += _history_length(data, keys) - before
+
+    def _count(self, flat: Flattened) -> None:
+        self.leaves += len(flat)
+
+        arrays = set()
+        items = set()
+        for key in flat:
+            for end, part in enumerate(key):
+                if type(part) is IdValue:
+                    arrays.add(key[:end])
+                    if part.original_value is None:
+                        items.add(key[: end + 1])
+        self.arrays += len(arrays)
+        self.items_without_id += len(items)
+
+
+def _history_length(data: Flattened, keys: list[Any]) -> int:
+    length = 0
+    for key in keys:
+        value = data.get(key)
+        if type(value) is list:
+            length += len(value)
+    return length
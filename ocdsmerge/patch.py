@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+from itertools import islice
+from typing import TYPE_CHECKING, Any
+
+from ocdsmerge.flatten import IdValue, unflatten
+
+if TYPE_CHECKING:
+    from ocdsmerge.flatten import Flattened, Identifier
+
+Path = tuple["Identifier", ...]
+
+
+class Changes(dict):
+    """
+    The paths whose values a release changed in a compiled release, and their previous values (``None`` if absent).
+
+    Returned by :meth:`~ocdsmerge.merge.CompiledRelease.append` with ``changes=True``. Pass it to
+    :func:`~ocdsmerge.patch.json_patch` to describe the changes as a JSON Patch.
+    """
+
+    __slots__ = ("length",)
+
+    def __init__(self, length: int):
+        super().__init__()
+        #: The number of paths in the compiled release before the release was merged. Paths are only ever added, at
+        #: the end of the flattened data.
+        self.length = length
+
+
+def json_patch(flattened: Flattened, changes: Changes) -> list[dict[str, Any]]:
+    """
+    Return a `JSON Patch <https://www.rfc-editor.org/rfc/rfc6902>`__ of the changes that a release made.
+
+    The patch transforms the compiled release before the release was merged into the compiled release after. Changed
+    fields are added, replaced or removed (if set to null). If a release adds an object (like an object in an array)
+    that didn't exist before, the object is added with all its fields. Objects in arrays are referenced by their index
+    in the compiled release, as returned by :meth:`~ocdsmerge.merge.MergedRelease.asdict`.
+
+    :param flattened: the flattened data of the compiled release, after the release was merged
+    :param changes: the changes returned by :meth:`~ocdsmerge.merge.CompiledRelease.append`
+    """
+    if not changes:
+        return []
+
+    length = changes.length
+    # The paths that the release added, which are at the end of the flattened data.
+    new_keys = list(islice(reversed(flattened), len(flattened) - length))
+    new_keys.reverse()
+
+    # The identifiers of the objects in each array on a changed path, in order.
+    arrays: dict[Path, dict[Identifier, int]] = {}
+    # Whether each prefix of a new path was an object or array before: that is, a prefix of a path that existed. (A
+    # path that existed can be a null or literal value, which isn't an object or array.)
+    existed: dict[Path, bool] = {}
+    # Whether each changed path is an object or array: that is, a prefix of another path. Like in unflatten, its value
+    # is then ignored.
+    is_parent: dict[Path, bool] = {}
+    # Whether the `id` of each object in an array, whose `id` path changed, is set from its first path's identifier.
+    # Like in unflatten, its `id` path is then ignored.
+    has_id: dict[Path, bool | None] = {}
+    for path in changes:
+        is_parent[path] = False
+        for end in range(1, len(path)):
+            if type(path[end]) is IdValue:
+                arrays[path[:end]] = {}
+        if len(path) > 1 and path[-1] == "id" and type(path[-2]) is IdValue:
+            has_id[path[:-1]] = None
+    for key in new_keys:
+        for end in range(1, len(key) + 1):
+            existed[key[:end]] = False
+
+    # Number the objects in the arrays, and find the prefixes that are objects or arrays, in one pass.
+    for index, key in enumerate(flattened):
+        for end in range(1, len(key)):
+            prefix = key[:end]
+            if prefix in is_parent:
+                is_parent[prefix] = True
+            if index < length and prefix in existed:
+                existed[prefix] = True
+            part = key[end]
+            if type(part) is IdValue:
+                items = arrays.get(prefix)
+                if items is not None and part.identifier not in items:
+                    items[part.identifier] = len(items)
+                if has_id:
+                    item = key[: end + 1]
+                    if item in has_id and has_id[item] is None:
+                        has_id[item] = part.original_value is not None
+
+    operations: list[dict[str, Any]] = []
+    for key, previous in changes.items():
+        # New paths are added below.
+        if key in existed or is_parent[key] or (key[-1] == "id" and has_id.get(key[:-1])):
+            continue
+        value = flattened[key]
+        if value is None:
+            if previous is not None:
+                operations.append({"op": "remove", "path": _pointer(key, arrays)})
+        elif previous is None:
+            operations.append({"op": "add", "path": _pointer(key, arrays), "value": value})
+        else:
+            operations.append({"op": "replace", "path": _pointer(key, arrays), "value": value})
+
+    # Add the outermost object or value of each new path that didn't exist, with all its fields.
+    added: dict[Path, list[Path]] = {}
+    for key in new_keys:
+        for end in range(1, len(key) + 1):
+            if not existed[key[:end]]:
+                break
+        # If the path is an object or array that existed, its value is ignored, like in unflatten.
+        else:
+            continue
+        top = key[:end]
+        if top in added:
+            added[top].append(key)
+        else:
+            added[top] = [key]
+
+    for top, keys in added.items():
+        if len(keys) == 1 and keys[0] == top:
+            value = flattened[top]
+            if value is not None:
+                operations.append({"op": "add", "path": _pointer(top, arrays), "value": value})
+        else:
+            operations.append({"op": "add", "path": _pointer(top, arrays), "value": _subtree(flattened, top, keys)})
+
+    return operations
+
+
+def _subtree(flattened: Flattened, top: Path, keys: list[Path]) -> Any:
+    # Unflatten the new paths under the prefix. An object in an array is unflattened in an array at a placeholder key.
+    start = len(top) - 1
+    is_item = type(top[-1]) is IdValue
+    subset = {("", *key[start:]) if is_item else key[start:]: flattened[key] for key in keys}
+    if is_item:
+        return unflatten(subset)[""][0]
+    return unflatten(subset)[top[-1]]
+
+
+def _pointer(path: Path, arrays: dict[Path, dict[Identifier, int]]) -> str:
+    parts = []
+    for end, part in enumerate(path):
+        if type(part) is IdValue:
+            parts.append(str(arrays[path[:end]][part.identifier]))
+        else:
+            parts.append(part.replace("~", "~0").replace("/", "~1"))
+    return "/" + "/".join(parts)
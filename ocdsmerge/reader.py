@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import codecs
+import gzip
+import json
+import os
+import re
+from typing import IO, TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+
+DEFAULT_CHUNK_SIZE = 2**16
+
+# See the `ws` rule in https://www.rfc-editor.org/rfc/rfc8259#section-2
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+# The value of a JSON text that isn't entirely in the buffer.
+_INCOMPLETE = object()
+
+
+def read_releases(
+    file: str | os.PathLike[str] | IO[bytes] | IO[str], *, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Generator[dict[str, Any], None, None]:
+    """
+    Yield releases from a file, without reading the entire file into memory.
+
+    The file can contain JSON Lines or concatenated JSON texts, in which each text is a release, a release package or
+    an array of releases and/or release packages. The ``releases`` array of a release package is read one release at a
+    time, so only one release is held in memory at a time, unlike :func:`json.load`.
+
+    To merge the releases, pass this generator to :meth:`~ocdsmerge.merge.Merger.merge`. If releases with the same OCID
+    are consecutive, set ``grouped=True``, so that only one OCID's releases are held in memory at a time.
+
+    :param file: a path (if it ends in ``.gz``, it is read with :mod:`gzip`), or a binary or text file object
+    :param chunk_size: the number of bytes or characters to read at a time
+    :raises json.JSONDecodeError: if the file is not valid JSON
+    """
+    if isinstance(file, (str, os.PathLike)):
+        opener = gzip.open if os.fspath(file).endswith(".gz") else open
+        with opener(file, "rb") as f:
+            yield from _read_releases(f, chunk_size)
+    else:
+        yield from _read_releases(file, chunk_size)
+
+
+def _read_releases(file: IO[bytes] | IO[str], chunk_size: int) -> Generator[dict[str, Any], None, None]:
+    stream = _Stream(file, chunk_size)
+
+    while char := stream.peek():
+        if char == "[":
+            stream.advance()
+            for item in stream.iter_array():
+                if isinstance(item, dict) and "releases" in item:
+                    yield from item["releases"]
+                else:
+                    yield item
+        elif char == "{":
+            yield from _read_object(stream)
+        else:
+            raise json.JSONDecodeError("Expecting '{' or '['", stream.text, stream.pos)
+
+
+def _read_object(stream: _Stream) -> Generator[dict[str, Any], None, None]:
+    # Most objects are releases that fit in the buffer.
+    value = stream.decode_buffered()
+    if value is not _INCOMPLETE:
+        if "releases" in value:
+            yield from value["releases"]
+        else:
+            yield value
+        return
+
+    # Otherwise, read the object's members one at a time, yielding the releases in a `releases` array as they are read.
+    stream.expect("{")
+    obj = {}
+    is_package = False
+
+    if stream.peek() == "}":
+        stream.advance()
+    else:
+        while True:
+            key = stream.decode()
+            stream.expect(":")
+            if key == "releases" and stream.peek() == "[":
+                stream.advance()
+                yield from stream.iter_array()
+                is_package = True
+            else:
+                obj[key] = stream.decode()
+            if stream.expect(",}") == "}":
+                break
+
+    if not is_package:
+        yield obj
+
+
+def _is_truncated(error: json.JSONDecodeError, length: int) -> bool:
+    # Whether the error can be due to the end of the buffer. Unterminated strings are reported at the start of the
+    # string. Other errors are reported within a few characters of the end, like in a partial "\\u0000" escape.
+    return error.msg.startswith("Unterminated string") or length - error.pos <= len("\\u0000")
+
+
+class _Stream:
+    """A buffer of a file's text, which is read in chunks as needed."""
+
+    __slots__ = ("_chunk_size", "_decoder", "_file", "eof", "pos", "text")
+
+    def __init__(self, file: IO[bytes] | IO[str], chunk_size: int):
+        self._file = file
+        self._chunk_size = chunk_size
+        self._decoder: codecs.IncrementalDecoder | None = None
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def _read(self, size: int) -> None:
+        chunk = self._file.read(size)
+
+        if isinstance(chunk, bytes):
+            if self._decoder is None:
+                self._decoder = codecs.getincrementaldecoder("utf-8-sig")()
+            text = self._decoder.decode(chunk, final=not chunk)
+        else:
+            text = chunk
+
+        if not chunk:
+            self.eof = True
+
+        # Drop the text that has been read.
+        self.text = self.text[self.pos :] + text
+        self.pos = 0
+
+    def peek(self) -> str:
+        """Skip whitespace, and return the next character, or an empty string at the end of the file."""
+        while True:
+            self.pos = _WHITESPACE.match(self.text, self.pos).end()
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if self.eof:
+                return ""
+            self._read(self._chunk_size)
+
+    def advance(self) -> None:
+        self.pos += 1
+
+    def expect(self, chars: str) -> str:
+        """Skip whitespace, and read one of the characters."""
+        char = self.peek()
+        if not char or char not in chars:
+            expected = " or ".join(repr(char) for char in chars)
+            raise json.JSONDecodeError(f"Expecting {expected}", self.text, self.pos)
+        self.pos += 1
+        return char
+
+    def decode(self) -> Any:
+        """Read a JSON value, reading more of the file until the value is complete."""
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError as e:
+                if self.eof or not _is_truncated(e, len(self.text)):
+                    raise
+            else:
+                # A number at the end of the buffer might continue in the next chunk.
+                if end < len(self.text) or self.eof or type(value) not in {int, float}:
+                    self.pos = end
+                    return value
+            # Read at least as much as is buffered, so that a large value is decoded a logarithmic number of times.
+            self._read(max(self._chunk_size, len(self.text) - self.pos))
+
+    def decode_buffered(self) -> Any:
+        """Read a JSON object, if it is entirely in the buffer."""
+        try:
+            value, end = _DECODER.raw_decode(self.text, self.pos)
+        except json.JSONDecodeError:
+            return _INCOMPLETE
+        self.pos = end
+        return value
+
+    def iter_array(self) -> Generator[Any, None, None]:
+        """Yield the values of an array, after its opening bracket."""
+        if self.peek() == "]":
+            self.advance()
+            return
+        while True:
+            yield self.decode()
+            if self.expect(",]") == "]":
+                return
@@ -1,84 +1,228 @@
 from __future__ import annotations
 
+import hashlib
+import json
+import os
+import tempfile
 from functools import lru_cache
+from importlib.resources import files
 from typing import TYPE_CHECKING, Any
 
 import jsonref
+import requests
 
-from ocdsmerge.util import get_release_schema_url, get_tags
+from ocdsmerge.util import get_release_schema_url
 
 if TYPE_CHECKING:
-    from collections.abc import Generator
+    from collections.abc import Callable, Generator
 
 MergeRules = dict[tuple[str, ...], str]
 Schema = str | dict[str, Any] | None
 
+#: The versions of OCDS whose merge rules are bundled with this package, in order.
+BUNDLED_TAGS = ("1__0__3", "1__1__4")
+# Increment this number if the merge rules determined from a schema change, to invalidate cached merge rules.
+CACHE_VERSION = 1
 
-def get_merge_rules(schema: Schema = None) -> MergeRules:
+
+def get_merge_rules(schema: Schema = None, *, cache_dir: str | None = None) -> MergeRules:
     """
     Return merge rules as key-value pairs.
 
     The key is a JSON path as a tuple, and the value is the merge rule as a string
     ("omitWhenMerged" or "wholeListMerge").
+
+    If the schema is not provided, or if it is the URL of the release schema of a version of OCDS in
+    :data:`~ocdsmerge.rules.BUNDLED_TAGS`, this returns the merge rules bundled with this package.
+
+    :param schema: the release schema (if not provided, will default to the latest version of OCDS bundled with this
+        package)
+    :param cache_dir: a directory in which to cache merge rules, keyed by the hash of the schema's content, or by
+        the schema's URL (if the schema at the URL changes, clear the directory)
     """
-    schema = schema or get_release_schema_url(get_tags()[-1])
+    if not schema:
+        return get_bundled_merge_rules(BUNDLED_TAGS[-1])
+    if isinstance(schema, str):
+        for tag in BUNDLED_TAGS:
+            if schema == get_release_schema_url(tag):
+                return get_bundled_merge_rules(tag)
+    if cache_dir:
+        return _get_cached_merge_rules(schema, cache_dir)
     if isinstance(schema, dict):
-        # jsonref.JsonRef is deprecated, but used for backwards-compatibility with jsonref 0.x.
-        return _get_merge_rules_from_dereferenced_schema(jsonref.JsonRef.replace_refs(schema))
+        return _get_merge_rules_from_schema(schema)
     return _get_merge_rules_from_url_or_path(schema)
 
 
+@lru_cache
+def get_bundled_merge_rules(tag: str) -> MergeRules:
+    """Return the merge rules of the given version of OCDS, bundled with this package."""
+    return load_merge_rules(json.loads(files("ocdsmerge").joinpath("data", f"merge-rules-{tag}.json").read_text()))
+
+
+def dump_merge_rules(merge_rules: MergeRules) -> list[list[Any]]:
+    """Return merge rules as JSON-serializable data, in which each key-value pair becomes a ``[path, rule]`` pair."""
+    return [[list(path), rule] for path, rule in merge_rules.items()]
+
+
+def load_merge_rules(data: list[list[Any]]) -> MergeRules:
+    """Return merge rules from the output of :func:`~ocdsmerge.rules.dump_merge_rules`."""
+    return {tuple(path): rule for path, rule in data}
+
+
+def _get_cached_merge_rules(schema: str | dict[str, Any], cache_dir: str) -> MergeRules:
+    # The merge rules of a URL are keyed by the URL, so that the schema isn't requested if they are cached.
+    is_url = isinstance(schema, str) and schema.startswith("http")
+    content = None
+    if isinstance(schema, dict):
+        key = content = json.dumps(schema, sort_keys=True).encode()
+    elif is_url:
+        key = b"url:%s" % schema.encode()
+    else:
+        with open(schema, "rb") as f:
+            key = content = f.read()
+
+    digest = hashlib.sha256(b"%d:%s" % (CACHE_VERSION, key)).hexdigest()
+    path = os.path.join(cache_dir, f"{digest}.json")
+
+    try:
+        with open(path) as f:
+            return load_merge_rules(json.load(f))
+    except FileNotFoundError:
+        pass
+
+    if content is None:
+        response = requests.get(schema, timeout=10)
+        response.raise_for_status()
+        content = response.content
+
+    base_uri = schema if is_url else ""
+    merge_rules = _get_merge_rules_from_schema(json.loads(content), base_uri)
+
+    # Write to a temporary file and rename it, so that concurrent processes never read a partial file.
+    os.makedirs(cache_dir, exist_ok=True)
+    with tempfile.NamedTemporaryFile("w", dir=cache_dir, suffix=".tmp", delete=False) as f:
+        json.dump(dump_merge_rules(merge_rules), f)
+    os.replace(f.name, path)
+
+    return merge_rules
+
+
 @lru_cache
 def _get_merge_rules_from_url_or_path(schema: str) -> MergeRules:
     if schema.startswith("http"):
-        deref_schema = jsonref.load_uri(schema)
-    else:
-        with open(schema) as f:
-            deref_schema = jsonref.load(f)
-    return _get_merge_rules_from_dereferenced_schema(deref_schema)
+        return _get_merge_rules_from_schema(jsonref.jsonloader(schema), schema)
+    with open(schema) as f:
+        return _get_merge_rules_from_schema(json.load(f))
+
+
+class _NonLocalReferenceError(Exception):
+    pass
+
+
+def _get_merge_rules_from_schema(schema: dict[str, Any], base_uri: str = "") -> MergeRules:
+    try:
+        return _get_merge_rules_from_dereferenced_schema(schema, resolve=_local_resolver(schema))
+    # If the schema has references to other documents, dereference the entire schema.
+    except _NonLocalReferenceError:
+        # jsonref.JsonRef is deprecated, but used for backwards-compatibility with jsonref 0.x.
+        return _get_merge_rules_from_dereferenced_schema(jsonref.JsonRef.replace_refs(schema, base_uri=base_uri))
+
+
+def _get_merge_rules_from_dereferenced_schema(
+    deref_schema: dict[str, Any], resolve: Callable[[dict[str, Any]], dict[str, Any]] | None = None
+) -> MergeRules:
+    if resolve is None:
+        resolve = _identity
+    return dict(_get_merge_rules(resolve(deref_schema["properties"]), resolve=resolve))
+
 
+def _identity(value: dict[str, Any]) -> dict[str, Any]:
+    return value
 
-def _get_merge_rules_from_dereferenced_schema(deref_schema: dict[str, Any]) -> MergeRules:
-    return dict(_get_merge_rules(deref_schema["properties"]))
+
+def _local_resolver(schema: dict[str, Any]) -> Callable[[dict[str, Any]], dict[str, Any]]:
+    """Return a function that follows a subschema's ``$ref``, if any, like ``jsonref`` but only when needed."""
+
+    def resolve(value: dict[str, Any]) -> dict[str, Any]:
+        while "$ref" in value:
+            reference = value["$ref"]
+            if not reference.startswith("#"):
+                raise _NonLocalReferenceError(reference)
+            value = schema
+            for part in reference[1:].split("/")[1:]:
+                value = value[part.replace("~1", "/").replace("~0", "~")]
+        return value
+
+    return resolve
 
 
 def _get_merge_rules(
-    properties: dict[str, Any], path: tuple[str, ...] | None = None
+    properties: dict[str, Any],
+    path: tuple[str, ...] | None = None,
+    *,
+    resolve: Callable[[dict[str, Any]], dict[str, Any]] = _identity,
+    cache: dict[int, list[tuple[tuple[str, ...], str]]] | None = None,
 ) -> Generator[tuple[tuple[str, ...], str], None, None]:
     """
     Yield merge rules as key-value pairs.
 
     The first element is a JSON path as a tuple, and the second element is the merge rule as a string
     ("omitWhenMerged" or "wholeListMerge").
+
+    ``resolve`` is called on each subschema, to follow its ``$ref``. The merge rules of each ``properties`` object are
+    cached, relative to the object, such that a definition that is referenced many times is walked once.
     """
     if path is None:
         path = ()
+    if cache is None:
+        cache = {}
+
+    key = id(properties)
+    if key not in cache:
+        cache[key] = _get_relative_merge_rules(properties, resolve, cache)
+
+    for relative_path, rule in cache[key]:
+        yield (*path, *relative_path), rule
+
+
+def _get_relative_merge_rules(
+    properties: dict[str, Any],
+    resolve: Callable[[dict[str, Any]], dict[str, Any]],
+    cache: dict[int, list[tuple[tuple[str, ...], str]]],
+) -> list[tuple[tuple[str, ...], str]]:
+    rules = []
 
     for key, value in properties.items():
-        new_path = (*path, key)
+        new_path = (key,)
+        value = resolve(value)  # noqa: PLW2901
         types = _get_types(value)
 
         # `omitWhenMerged` supersedes all other rules.
         # See https://standard.open-contracting.org/1.1/en/schema/merging/#discarded-fields
         if value.get("omitWhenMerged") or value.get("mergeStrategy") == "ocdsOmit":
-            yield new_path, "omitWhenMerged"
+            rules.append((new_path, "omitWhenMerged"))
         # `wholeListMerge` supersedes any nested rules.
         # See https://standard.open-contracting.org/1.1/en/schema/merging/#whole-list-merge
         elif "array" in types and (value.get("wholeListMerge") or value.get("mergeStrategy") == "ocdsVersion"):
-            yield new_path, "wholeListMerge"
+            rules.append((new_path, "wholeListMerge"))
         # See https://standard.open-contracting.org/1.1/en/schema/merging/#object-values
         elif "object" in types and "properties" in value:
-            yield from _get_merge_rules(value["properties"], path=new_path)
+            rules.extend(_get_merge_rules(resolve(value["properties"]), path=new_path, resolve=resolve, cache=cache))
         # See https://standard.open-contracting.org/1.1/en/schema/merging/#whole-list-merge
         elif "array" in types and "items" in value:
-            item_types = _get_types(value["items"])
+            items = resolve(value["items"])
+            item_types = _get_types(items)
             if any(item_type != "object" for item_type in item_types):
-                yield new_path, "wholeListMerge"
-            elif "object" in item_types and "properties" in value["items"]:
-                if "id" not in value["items"]["properties"]:
-                    yield new_path, "wholeListMerge"
+                rules.append((new_path, "wholeListMerge"))
+            elif "object" in item_types and "properties" in items:
+                if "id" not in items["properties"]:
+                    rules.append((new_path, "wholeListMerge"))
                 else:
-                    yield from _get_merge_rules(value["items"]["properties"], path=new_path)
+                    rules.extend(
+                        _get_merge_rules(resolve(items["properties"]), path=new_path, resolve=resolve, cache=cache)
+                    )
+
+    return rules
 
 
 def _get_types(prop: dict[str, Any]) -> list[str]:
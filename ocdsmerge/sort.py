@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import heapq
+import json
+import os
+import tempfile
+from typing import TYPE_CHECKING, Any
+
+from ocdsmerge.util import iter_releases
+
+if TYPE_CHECKING:
+    from collections.abc import Generator, Iterable, Iterator
+
+# The number of characters of serialized releases to hold in memory before writing them to a temporary file.
+DEFAULT_BUFFER_SIZE = 2**27
+# The maximum number of temporary files to read at a time.
+MAX_FILES = 128
+
+SortKey = tuple[bool, str, bool, str]
+
+
+def sort_releases(
+    releases: Iterable[dict[str, Any]],
+    *,
+    buffer_size: int = DEFAULT_BUFFER_SIZE,
+    directory: str | os.PathLike[str] | None = None,
+) -> Generator[dict[str, Any], None, None]:
+    """
+    Yield releases sorted by OCID and date, writing them to temporary files if they don't fit in memory.
+
+    Releases are serialized as JSON and held in memory until ``buffer_size`` characters are held. Then, the releases
+    are sorted and written to a temporary file. Once all releases are read, the temporary files are merged as a stream.
+
+    To merge the releases, pass this generator to :meth:`~ocdsmerge.merge.Merger.merge` with ``grouped=True``, so that
+    only one OCID's releases are held in memory at a time. Merged releases are then yielded in the order of their
+    OCIDs, instead of the order of their OCIDs' first releases.
+
+    The sort is stable: releases with the same OCID and date are yielded in the order in which they were read.
+    Releases whose ``date`` is missing or isn't a string are yielded first, so that
+    :meth:`~ocdsmerge.merge.Merger.merge` raises the same error as without sorting.
+
+    :param releases: an iterable of releases and/or release packages, which must be serializable as JSON
+    :param buffer_size: the number of characters of serialized releases to hold in memory
+    :param directory: the directory in which to write temporary files (if not provided, will default to the directory
+        returned by :func:`tempfile.gettempdir`)
+    """
+    with tempfile.TemporaryDirectory(prefix="ocdsmerge-", dir=directory) as tmpdir:
+        runs: list[str] = []
+        buffer: list[tuple[SortKey, str]] = []
+        size = 0
+
+        for release in iter_releases(releases):
+            line = json.dumps(release)
+            buffer.append((_sort_key(release), line))
+            size += len(line)
+            if size >= buffer_size:
+                runs.append(_write_run(tmpdir, _sorted(buffer)))
+                buffer = []
+                size = 0
+
+        if not runs:
+            for _, line in _sorted(buffer):
+                yield json.loads(line)
+            return
+
+        if buffer:
+            runs.append(_write_run(tmpdir, _sorted(buffer)))
+            buffer = []
+
+        # Merge the runs in passes, to limit the number of open files.
+        while len(runs) > MAX_FILES:
+            runs = [_write_run(tmpdir, _merge_runs(runs[i : i + MAX_FILES])) for i in range(0, len(runs), MAX_FILES)]
+
+        for _, line in _merge_runs(runs):
+            yield json.loads(line)
+
+
+def _sort_key(release: Any) -> SortKey:
+    # Sort by OCID, then by date. Non-string OCIDs are sorted by their JSON representation, so that equal OCIDs are
+    # consecutive. Non-object releases and non-string dates are sorted first, and are reported by `sorted_releases`.
+    if not isinstance(release, dict):
+        return (False, "null", False, "")
+    ocid = release.get("ocid")
+    date = release.get("date")
+    return (
+        isinstance(ocid, str),
+        ocid if isinstance(ocid, str) else json.dumps(ocid),
+        isinstance(date, str),
+        date if isinstance(date, str) else "",
+    )
+
+
+def _sorted(buffer: list[tuple[SortKey, str]]) -> list[tuple[SortKey, str]]:
+    # list.sort() is stable. Only the key is compared, not the line.
+    buffer.sort(key=_first)
+    return buffer
+
+
+def _first(item: tuple[SortKey, str]) -> SortKey:
+    return item[0]
+
+
+def _write_run(directory: str, items: Iterable[tuple[SortKey, str]]) -> str:
+    # Each line is the sort key and the release, separated by a tab. JSON text has no literal tabs or newlines.
+    fd, filename = tempfile.mkstemp(suffix=".tsv", dir=directory)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        for key, line in items:
+            f.write(f"{json.dumps(key)}\t{line}\n")
+    return filename
+
+
+def _read_run(filename: str) -> Generator[tuple[SortKey, str], None, None]:
+    with open(filename, encoding="utf-8") as f:
+        for line in f:
+            key, _, release = line.partition("\t")
+            yield tuple(json.loads(key)), release[:-1]
+    os.remove(filename)
+
+
+def _merge_runs(filenames: list[str]) -> Iterator[tuple[SortKey, str]]:
+    # heapq.merge() is stable: if keys are equal, items from earlier runs are yielded first.
+    return heapq.merge(*map(_read_run, filenames), key=_first)
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from itertools import islice
+from typing import TYPE_CHECKING, Any
+
+from ocdsmerge.merge import CompiledRelease, VersionedRelease, _check_types
+from ocdsmerge.util import group_releases, iter_releases, sorted_releases
+
+if TYPE_CHECKING:
+    import os
+    from collections.abc import Generator, Iterable
+
+    from ocdsmerge.merge import MergedRelease, Merger, MergeResult
+
+# The number of releases to merge per transaction.
+DEFAULT_BATCH_SIZE = 1000
+# The number of OCIDs to select per query, below SQLite's limit on the number of parameters.
+_SELECT_SIZE = 500
+
+_CREATE = """
+CREATE TABLE IF NOT EXISTS merged_release (
+    ocid TEXT PRIMARY KEY NOT NULL,
+    date TEXT,
+    compiled TEXT,
+    versioned TEXT
+)
+"""
+_UPSERT = """
+INSERT INTO merged_release (ocid, date, compiled, versioned) VALUES (?, ?, ?, ?)
+ON CONFLICT (ocid) DO UPDATE SET date = excluded.date, compiled = excluded.compiled, versioned = excluded.versioned
+"""
+
+
+class Store:
+    """
+    A SQLite database of the flattened state of each OCID's merged releases, to merge new releases incrementally.
+
+    Each OCID's row stores the date of its latest release and the output of
+    :meth:`~ocdsmerge.merge.MergedRelease.get_state`, so that merging new releases costs in proportion to the new
+    releases, not to all releases. Use the same ``compiled`` and ``versioned`` arguments each time the store is opened.
+
+    A release that is earlier than the OCID's latest release is merged with
+    :meth:`~ocdsmerge.merge.CompiledRelease.insert` or :meth:`~ocdsmerge.merge.VersionedRelease.insert`.
+    """
+
+    def __init__(
+        self,
+        database: str | os.PathLike[str] | sqlite3.Connection,
+        merger: Merger,
+        *,
+        compiled: bool = True,
+        versioned: bool = False,
+    ):
+        """
+        Open the store, creating its table if it doesn't exist.
+
+        :param database: the path to the SQLite database, or a connection to it
+        :param merger: the merger whose merge rules, rule overrides and interner to use
+        :param compiled: whether to store compiled releases
+        :param versioned: whether to store versioned releases
+        """
+        if isinstance(database, sqlite3.Connection):
+            self.connection = database
+        else:
+            self.connection = sqlite3.connect(database)
+        self.merger = merger
+        self.compiled = compiled
+        self.versioned = versioned
+
+        with self.connection:
+            self.connection.execute(_CREATE)
+
+    def __enter__(self) -> Store:  # noqa: PYI034 # Python 3.11+ typing.Self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the connection to the database."""
+        self.connection.close()
+
+    def get(self, ocid: str) -> MergeResult | None:
+        """
+        Return the merged releases of an OCID, or ``None`` if the OCID isn't in the store.
+
+        :param ocid: the OCID
+        :returns: an ``(ocid, compiled_release, versioned_release)`` tuple, like :meth:`~ocdsmerge.merge.Merger.merge`
+        """
+        row = self._select([ocid]).get(ocid)
+        if row is None:
+            return None
+        compiled_release, versioned_release = self._load(row[1], row[2])
+        return self._result(ocid, compiled_release, versioned_release)
+
+    def upsert(
+        self, releases: Iterable[dict[str, Any]], *, batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> Generator[MergeResult, None, None]:
+        """
+        Merge new releases into the stored merged releases, yielding the merged releases whose output changed.
+
+        The releases are merged in batches of ``batch_size`` releases. Each batch is one transaction, which is
+        committed after the batch's merged releases are yielded. If the releases of an OCID are in many batches, its
+        merged releases can be yielded once per batch.
+
+        :param releases: an iterable of releases and/or release packages, in which each release has an ``ocid``
+        :param batch_size: the number of releases to merge per transaction
+        :returns: an ``(ocid, compiled_release, versioned_release)`` tuple per changed OCID, like
+            :meth:`~ocdsmerge.merge.Merger.merge`
+        """
+        iterator = iter_releases(releases)
+        while batch := list(islice(iterator, batch_size)):
+            groups = dict(group_releases(batch))
+            rows = self._select(list(groups))
+
+            params = []
+            results = []
+            for ocid, group in groups.items():
+                date, compiled_state, versioned_state = rows.get(ocid, (None, None, None))
+                compiled_release, versioned_release = self._load(compiled_state, versioned_state)
+
+                date, changed = self._merge(compiled_release, versioned_release, sorted_releases(group), date)
+
+                compiled_state = json.dumps(compiled_release.get_state()) if self.compiled else None
+                versioned_state = json.dumps(versioned_release.get_state()) if self.versioned else None
+                params.append((ocid, date, compiled_state, versioned_state))
+
+                if changed:
+                    results.append(self._result(ocid, compiled_release, versioned_release))
+
+            # The transaction is rolled back if the generator is closed before the batch's results are yielded.
+            with self.connection:
+                self.connection.executemany(_UPSERT, params)
+                yield from results
+
+    def _select(self, ocids: list[str | None]) -> dict[str, tuple[str | None, str | None, str | None]]:
+        rows = {}
+        for i in range(0, len(ocids), _SELECT_SIZE):
+            chunk = ocids[i : i + _SELECT_SIZE]
+            cursor = self.connection.execute(
+                "SELECT ocid, date, compiled, versioned FROM merged_release "  # noqa: S608 # placeholders
+                f"WHERE ocid IN ({', '.join('?' * len(chunk))})",
+                chunk,
+            )
+            for ocid, *row in cursor:
+                rows[ocid] = tuple(row)
+        return rows
+
+    def _kwargs(self) -> dict[str, Any]:
+        return {
+            "merge_rules": self.merger.merge_rules,
+            "rule_overrides": self.merger.rule_overrides,
+            "rule_tree": self.merger.rule_tree,
+            "flatten_function": self.merger.flatten_function,
+            # The merged releases are discarded after they are stored, so their paths with `id` values are, too.
+            "interner": None if self.merger.interner is None else self.merger.interner.scope(),
+            "on_collision": self.merger.on_collision,
+            "on_type_conflict": self.merger.on_type_conflict,
+        }
+
+    def _load(
+        self, compiled_state: str | None, versioned_state: str | None
+    ) -> tuple[CompiledRelease, VersionedRelease]:
+        kwargs = self._kwargs()
+        compiled_release = (
+            CompiledRelease.from_state(json.loads(compiled_state), track_dates=True, **kwargs)
+            if compiled_state is not None
+            else CompiledRelease(track_dates=True, **kwargs)
+        )
+        versioned_release = (
+            VersionedRelease.from_state(json.loads(versioned_state), track_repeats=True, **kwargs)
+            if versioned_state is not None
+            else VersionedRelease(track_repeats=True, **kwargs)
+        )
+        # The releases are flattened once, for both merged releases, so they share the identifiers of objects.
+        if self.compiled and self.versioned:
+            compiled_release.new_identifier = versioned_release.new_identifier
+        return compiled_release, versioned_release
+
+    def _merge(
+        self,
+        compiled_release: CompiledRelease,
+        versioned_release: VersionedRelease,
+        releases: list[dict[str, Any]],
+        date: str | None,
+    ) -> tuple[str | None, bool]:
+        # Return the date of the latest release, and whether the output of the merged releases changed, from the paths
+        # that each release changed, instead of comparing the merged releases before and after.
+        changed = False
+        # CompiledRelease.flat_append must be called before VersionedRelease.flat_append, which modifies `flat`.
+        merged_releases: list[MergedRelease] = []
+        if self.compiled:
+            merged_releases.append(compiled_release)
+        if self.versioned:
+            merged_releases.append(versioned_release)
+        flattener = versioned_release if self.versioned else compiled_release
+        on_type_conflict = self.merger.on_type_conflict
+        for release in releases:
+            release_date = release.get("date")
+            # `sorted_releases` doesn't check the date of a single release.
+            if not isinstance(release_date, str):
+                release_date = None
+            late = date is not None and release_date is not None and release_date < date
+            # Flatten the release once, for both merged releases, like Merger. The types are checked against each
+            # merged release's own types.
+            args = flattener.flatten_release(release, check_types=False)
+            for merged_release in _check_types(merged_releases, release, args[0], on_type_conflict):
+                if merged_release is compiled_release:
+                    if late:
+                        changes = compiled_release.flat_insert(*args, changes=True)
+                    else:
+                        changes = compiled_release.flat_append(*args, changes=True)
+                    if not changed:
+                        data = compiled_release.data
+                        # A null value for a path that was absent doesn't change the output.
+                        changed = any(
+                            previous is not None or data[key] is not None for key, previous in changes.items()
+                        )
+                elif late:
+                    changed |= versioned_release.flat_insert(*args)
+                else:
+                    changed |= versioned_release.flat_append(*args)
+            if not late and release_date is not None:
+                date = release_date
+        return date, changed
+
+    def _result(
+        self, ocid: str | None, compiled_release: CompiledRelease, versioned_release: VersionedRelease
+    ) -> MergeResult:
+        return (
+            ocid,
+            compiled_release.asdict() if self.compiled else None,
+            versioned_release.asdict() if self.versioned else None,
+        )
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any
+
+from ocdsmerge.exceptions import InconsistentTypeError
+from ocdsmerge.flatten import IdValue, _field
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from ocdsmerge.flatten import Flattened, Identifier
+
+LITERAL = "literal"
+OBJECT = "object"
+ARRAY = "array"
+
+# The path of a field, the type of the field in earlier releases, and its type in the current release.
+TypeConflict = tuple[tuple["Identifier", ...], str, str]
+# A function that is called with a release and its type conflicts.
+OnTypeConflict = Callable[[dict[str, Any], list[TypeConflict]], None]
+
+
+def get_types(flattened: Flattened) -> dict[tuple[Identifier, ...], str]:
+    """
+    Return the type of each field in a flattened object, as unflattened: a literal, an object or an array.
+
+    Null values are omitted from merged releases, so their paths have no type. Arrays of literals, and arrays that are
+    merged as whole lists, are literals.
+    """
+    return TypeTable(flattened).types
+
+
+class TypeTable:
+    """
+    The type of each field in a merged release, to check the types of fields in releases before they are merged.
+
+    Like :func:`~ocdsmerge.flatten.unflatten`, a field is created by its first path (in the order of the flattened
+    data) that is either a longer path, which creates an object or an array, or a path with a non-null value, which
+    creates a literal. A later value of the field is ignored, and the objects of a later array are appended to a
+    literal that is a list. In a versioned release, a null value is in the field's history, so it creates a literal,
+    to which the objects of a later array are appended.
+    """
+
+    __slots__ = ("appended", "nulls", "types", "versioned")
+
+    def __init__(self, flattened: Flattened | None = None, *, versioned: bool = False):
+        """
+        Initialize the types of the fields in the flattened data of a merged release.
+
+        :param flattened: the flattened data of the merged release, if any
+        :param versioned: whether the merged release is a versioned release
+        """
+        #: The type of each field: a literal, an object or an array.
+        self.types: dict[tuple[Identifier, ...], str] = {}
+        #: The paths with null values that are earlier than the paths that created their fields, if any. If the value
+        #: of such a path is set, it creates a literal, or it conflicts with the object or array that was created.
+        self.nulls: set[tuple[Identifier, ...]] = set()
+        #: The literals that are lists, to which the objects of an array are appended, if any. If the value of such a
+        #: path is set to a value that isn't a list, it conflicts with the array.
+        self.appended: set[tuple[Identifier, ...]] = set()
+        self.versioned = versioned
+
+        if flattened is not None:
+            types = self.types
+            for key, value in flattened.items():
+                # Consecutive paths often share prefixes, whose types are set by the earlier path.
+                for end in range(len(key) - 1, 0, -1):
+                    prefix = key[:end]
+                    if prefix in types:
+                        if types[prefix] == LITERAL and type(key[end]) is IdValue and type(flattened[prefix]) is list:
+                            self.appended.add(prefix)
+                        break
+                    types[prefix] = ARRAY if type(key[end]) is IdValue else OBJECT
+                if key not in types:
+                    if value is not None or versioned:
+                        types[key] = LITERAL
+                    else:
+                        self.nulls.add(key)
+
+    def check(self, data: Flattened, flattened: Flattened) -> list[TypeConflict]:
+        """
+        Return the fields whose types in the flattened release conflict with their types in the merged release.
+
+        The release is checked as if it were merged last. If there are no conflicts, the types of the fields that the
+        release creates or removes are updated.
+
+        :param data: the flattened data of the merged release
+        :param flattened: the flattened release
+        """
+        types = self.types
+        nulls = self.nulls
+        appended = self.appended
+        # The changes to the types (None to remove a type), to the nulls and to the appended literals, which are
+        # applied if there are no conflicts.
+        new_types: dict[tuple[Identifier, ...], str | None] = {}
+        new_nulls: dict[tuple[Identifier, ...], bool] = {}
+        new_appended: dict[tuple[Identifier, ...], bool] = {}
+        conflicts = []
+        for key, value in flattened.items():
+            if key in data:
+                # A versioned release adds the value to the history of the path, which is a list.
+                if self.versioned:
+                    continue
+                previous = data[key]
+                kind = new_types.get(key, types.get(key))
+                if previous is None:
+                    if value is not None and new_nulls.get(key, key in nulls):
+                        if kind is None:
+                            new_types[key] = LITERAL
+                            new_nulls[key] = False
+                        # The objects of the array are appended to the list.
+                        elif kind == ARRAY and type(value) is list:
+                            new_types[key] = LITERAL
+                            new_nulls[key] = False
+                            new_appended[key] = True
+                        else:
+                            conflicts.append((key, kind, LITERAL))
+                elif kind == LITERAL:
+                    is_appended = new_appended.get(key, key in appended)
+                    # A null value removes a literal from a compiled release. The path is earlier than any later paths,
+                    # which create the array to which the list's objects were appended, if any.
+                    if value is None:
+                        new_types[key] = ARRAY if is_appended else None
+                        new_nulls[key] = True
+                        new_appended[key] = False
+                    elif is_appended and type(value) is not list:
+                        conflicts.append((key, ARRAY, LITERAL))
+                continue
+
+            # A new path is later than the paths that created its prefixes' fields.
+            for end in range(len(key) - 1, 0, -1):
+                prefix = key[:end]
+                current = ARRAY if type(key[end]) is IdValue else OBJECT
+                earlier = new_types.get(prefix, types.get(prefix))
+                if earlier is not None:
+                    # A release can't set both a path and a longer path, so the literal's value is in the merged
+                    # release.
+                    if earlier == LITERAL and current == ARRAY and type(data.get(prefix)) is list:
+                        new_appended[prefix] = True
+                    elif earlier != current:
+                        conflicts.append((prefix, earlier, current))
+                    break
+                new_types[prefix] = current
+            if new_types.get(key, types.get(key)) is None:
+                if value is not None or self.versioned:
+                    new_types[key] = LITERAL
+                else:
+                    new_nulls[key] = True
+
+        if not conflicts:
+            for key, kind in new_types.items():
+                if kind is None:
+                    types.pop(key, None)
+                else:
+                    types[key] = kind
+            for key, is_null in new_nulls.items():
+                if is_null:
+                    nulls.add(key)
+                else:
+                    nulls.discard(key)
+            for key, is_appended in new_appended.items():
+                if is_appended:
+                    appended.add(key)
+                else:
+                    appended.discard(key)
+        return conflicts
+
+
+def raise_type_conflict(release: dict[str, Any], conflicts: list[TypeConflict]) -> None:
+    """
+    Raise an error for the first field whose type differs from its type in earlier releases.
+
+    Pass this function as ``on_type_conflict`` to fail fast, before merging the release. The error is a
+    :class:`~ocdsmerge.exceptions.InconsistentTypeError`, like :meth:`~ocdsmerge.merge.MergedRelease.asdict`.
+    """
+    path, earlier, current = conflicts[0]
+    raise InconsistentTypeError(
+        f"An earlier release had {_article(earlier)} for /{'/'.join(map(str, path))}, but the current release "
+        f"({release.get('id')!r}) has {_article(current)}"
+    )
+
+
+class TypeConflictReport:
+    """
+    A report of releases whose fields have different types than in earlier releases with the same OCID.
+
+    Pass its :meth:`~ocdsmerge.typecheck.TypeConflictReport.add` method as ``on_type_conflict``, to quarantine such
+    releases instead of merging them.
+    """
+
+    __slots__ = ("counts", "releases")
+
+    def __init__(self):
+        #: The number of conflicts, by the field (with dots between the parts of its path), the type of the field in
+        #: earlier releases, and its type in the quarantined release.
+        self.counts: dict[tuple[str, str, str], int] = {}
+        #: The quarantined releases, in the order in which they were merged.
+        self.releases: list[dict[str, Any]] = []
+
+    def __iter__(self) -> Iterator[tuple[str, str, str, int]]:
+        """Yield the field, earlier type, current type and number of releases of each conflict."""
+        for (field, earlier, current), count in self.counts.items():
+            yield field, earlier, current, count
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def add(self, release: dict[str, Any], conflicts: list[TypeConflict]) -> None:
+        """Quarantine the release, and count its conflicts by field."""
+        self.releases.append(release)
+        # Count each field once per release.
+        for key in dict.fromkeys((_field(path), earlier, current) for path, earlier, current in conflicts):
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+
+def _article(kind: str) -> str:
+    return f"an {kind}" if kind in {ARRAY, OBJECT} else f"a {kind}"
@@ -2,8 +2,9 @@ from __future__ import annotations
 
 import re
 from functools import lru_cache
+from itertools import groupby
 from operator import itemgetter
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import requests
 
@@ -14,6 +15,9 @@ from ocdsmerge.exceptions import (
     NullDateValueError,
 )
 
+if TYPE_CHECKING:
+    from collections.abc import Generator, Iterable
+
 
 @lru_cache
 def get_tags() -> list[str]:
@@ -28,6 +32,42 @@ def get_release_schema_url(tag: str) -> str:
     return f"https://standard.open-contracting.org/schema/{tag}/release-schema.json"
 
 
+def iter_releases(items: Iterable[dict[str, Any]]) -> Generator[dict[str, Any], None, None]:
+    """Yield releases from an iterable of releases and/or release packages."""
+    for item in items:
+        if isinstance(item, dict) and "releases" in item:
+            yield from item["releases"]
+        else:
+            yield item
+
+
+def group_releases(
+    releases: Iterable[dict[str, Any]], *, grouped: bool = False
+) -> Generator[tuple[str | None, list[dict[str, Any]]], None, None]:
+    """
+    Yield each OCID and its releases.
+
+    :param releases: an iterable of releases
+    :param grouped: whether releases with the same OCID are consecutive, in which case only one OCID's releases are
+        held in memory at a time
+    """
+    if grouped:
+        for ocid, group in groupby(releases, key=_get_ocid):
+            yield ocid, list(group)
+    else:
+        groups: dict[str | None, list[dict[str, Any]]] = {}
+        for release in releases:
+            groups.setdefault(_get_ocid(release), []).append(release)
+        yield from groups.items()
+
+
+def _get_ocid(release: dict[str, Any]) -> str | None:
+    # Let `sorted_releases` raise an error for non-object releases.
+    if isinstance(release, dict):
+        return release.get("ocid")
+    return None
+
+
 # If we need a method to get dates from releases, see https://github.com/open-contracting/ocds-merge/issues/25
 def sorted_releases(releases: list[dict[str, Any]]) -> list[dict[str, Any]]:
     """Sort a list of releases by date."""
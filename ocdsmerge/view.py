@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Any
+
+from ocdsmerge.exceptions import InconsistentTypeError
+from ocdsmerge.flatten import IdValue
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+
+    from ocdsmerge.flatten import Flattened, Identifier
+
+Path = tuple["Identifier", ...]
+
+# A sentinel for fields whose value is null, which are omitted like in unflatten.
+_ABSENT = object()
+
+
+class MergedReleaseView(Mapping):
+    """
+    A read-only view of a merged release, which unflattens each field when it is accessed.
+
+    Returned by :meth:`~ocdsmerge.merge.MergedRelease.view`. Objects are views, and arrays of objects are tuples of
+    views. Other values are the same as in :meth:`~ocdsmerge.merge.MergedRelease.asdict`. Lists and dictionaries (like
+    arrays with the ``wholeListMerge`` rule, or versioned values) are copied, so that changing them doesn't change the
+    merged release. Like in ``asdict``, if a field was a list before it was an array of objects (like the versioned
+    values of a field that was null), its tuple has the list's values, then the views.
+
+    An object's paths are grouped by their fields the first time that the object is read, to index the paths by their
+    prefixes one level at a time. Reading a few fields costs in proportion to the number of paths in the objects that
+    contain them, instead of creating every object and array in the merged release.
+
+    Merging more releases into the merged release invalidates the view.
+    """
+
+    __slots__ = ("_convert", "_data", "_depth", "_fields", "_id", "_keys", "_values")
+
+    def __init__(self, data: Flattened, convert: Callable[[list[Any]], Any] | None = None):
+        """
+        Initialize a view of the flattened data of a merged release.
+
+        :param data: the flattened data
+        :param convert: the function with which to convert the values that are lists, if any (for example, to convert
+            the histories of a versioned release to versioned values)
+        """
+        self._data = data
+        self._convert = convert
+        # The paths of the object's fields, and their number of parts before the field.
+        self._keys: Iterable[Path] = data
+        self._depth = 0
+        # The original `id` value of an object in an array, if any.
+        self._id: Any = None
+        # The paths of each field, and the values of the fields that were read.
+        self._fields: dict[str, list[Path]] | None = None
+        self._values: dict[str, Any] = {}
+
+    def __getitem__(self, field: str) -> Any:
+        value = self._get(field)
+        if value is _ABSENT:
+            raise KeyError(field)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        if self._id is not None:
+            yield "id"
+        for field in self._index():
+            if self._get(field) is not _ABSENT:
+                yield field
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __contains__(self, field: object) -> bool:
+        return isinstance(field, str) and self._get(field) is not _ABSENT
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.asdict()!r})"
+
+    def asdict(self) -> dict[str, Any]:
+        """Return the object as a dictionary, like :meth:`~ocdsmerge.merge.MergedRelease.asdict`."""
+        return {field: _asdict(value) for field, value in self.items()}
+
+    def _index(self) -> dict[str, list[Path]]:
+        # Group the paths by the object's fields, in the order in which unflatten creates them: a null value doesn't
+        # create a field. An object in an array has the `id` value of its IdValue.
+        if self._fields is None:
+            data = self._data
+            depth = self._depth
+            fields: dict[str, list[Path]] = {}
+            order: dict[str, list[Path]] = {}
+            for key in self._keys:
+                # An object in an array can have no fields.
+                if len(key) <= depth:
+                    continue
+                field = key[depth]
+                if field in fields:
+                    fields[field].append(key)
+                else:
+                    fields[field] = [key]
+                # A field whose values are all null is omitted.
+                if field not in order and (len(key) > depth + 1 or data[key] is not None):
+                    order[field] = fields[field]
+            if self._id is not None:
+                order.pop("id", None)
+            self._fields = order
+        return self._fields
+
+    def _get(self, field: str) -> Any:
+        if self._id is not None and field == "id":
+            return self._id
+        try:
+            return self._values[field]
+        except KeyError:
+            pass
+
+        keys = self._index().get(field)
+        value = _ABSENT if keys is None else self._resolve(keys)
+        self._values[field] = value
+        return value
+
+    def _resolve(self, keys: list[Path]) -> Any:
+        # This follows the logic of unflatten. If the field is set by an earlier path than the object or array's paths,
+        # the field has inconsistent types, unless it's a list to which the array's objects are appended.
+        depth = self._depth + 1
+        children = []
+        leaf = None
+        for key in keys:
+            if len(key) > depth:
+                children.append(key)
+            elif not children and self._data[key] is not None:
+                leaf = key
+
+        if not children:
+            value = self._data[keys[0]]
+            if value is None:
+                return _ABSENT
+            if self._convert is not None and type(value) is list:
+                return _copy(self._convert(value))
+            return _copy(value)
+
+        is_array = type(children[0][depth]) is IdValue
+        # Like in unflatten, the objects in an array are appended to an earlier list: for example, the versioned
+        # values of a field that was null before it was an array.
+        values: tuple[Any, ...] = ()
+        if leaf is not None:
+            value = self._data[leaf]
+            if self._convert is not None and type(value) is list:
+                value = self._convert(value)
+            if not is_array:
+                raise InconsistentTypeError(
+                    f"An earlier release had the value {value!r} for /{_pointer(leaf)}, but the current release has "
+                    f"an object with a {children[0][depth]!r} key"
+                )
+            if type(value) is not list:
+                raise InconsistentTypeError(
+                    f"An earlier release had the object {value!r} for /{_pointer(leaf)}, but the current release "
+                    "has an array"
+                )
+            values = tuple(_copy(value))
+        for key in children:
+            if (type(key[depth]) is IdValue) is not is_array:
+                raise InconsistentTypeError(
+                    f"/{_pointer(key[:depth])} is an {'array' if is_array else 'object'} in an earlier release, but "
+                    f"the current release has {'an object' if is_array else 'an array'}"
+                )
+
+        if not is_array:
+            return self._child(children, depth, None)
+
+        # Group the paths by the objects in the array, in order.
+        items: dict[Identifier, list[Path]] = {}
+        original_values = []
+        for key in children:
+            identifier = key[depth].identifier
+            if identifier in items:
+                items[identifier].append(key)
+            else:
+                items[identifier] = [key]
+                original_values.append(key[depth].original_value)
+        return values + tuple(
+            self._child(paths, depth + 1, original_value)
+            for paths, original_value in zip(items.values(), original_values, strict=True)
+        )
+
+    def _child(self, keys: list[Path], depth: int, id_value: Any) -> MergedReleaseView:
+        view = object.__new__(type(self))
+        view._data = self._data
+        view._convert = self._convert
+        view._keys = keys
+        view._depth = depth
+        view._id = id_value
+        view._fields = None
+        view._values = {}
+        return view
+
+
+def _copy(value: Any) -> Any:
+    if type(value) is list:
+        return [_copy(item) for item in value]
+    if type(value) is dict:
+        return {key: _copy(item) for key, item in value.items()}
+    return value
+
+
+def _asdict(value: Any) -> Any:
+    if type(value) is tuple:
+        return [_asdict(item) for item in value]
+    if isinstance(value, MergedReleaseView):
+        return value.asdict()
+    return value
+
+
+def _pointer(key: Path) -> str:
+    return "/".join(map(str, key))
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import gzip
+import io
+import json
+import os
+from typing import IO, TYPE_CHECKING, Any
+
+from ocdsmerge.exceptions import InconsistentTypeError
+from ocdsmerge.flatten import IdValue
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+    from ocdsmerge.flatten import Flattened, Identifier
+    from ocdsmerge.merge import MergedRelease
+
+Path = tuple["Identifier", ...]
+
+# The number of characters to buffer before writing to the file.
+BUFFER_SIZE = 2**16
+
+# The same output as json.dumps().
+_encode = json.JSONEncoder().encode
+
+
+def dump(merged_release: MergedRelease, file: str | os.PathLike[str] | IO[str] | IO[bytes]) -> None:
+    """
+    Write a merged release as JSON, without creating the dictionary of :meth:`~ocdsmerge.merge.MergedRelease.asdict`.
+
+    The output is the same as ``json.dumps(merged_release.asdict())``. The versioned values of a versioned release are
+    written from its history entries, one at a time.
+
+    If a field has inconsistent types, the error of :meth:`~ocdsmerge.merge.MergedRelease.asdict` is raised (an
+    :exc:`~ocdsmerge.exceptions.InconsistentTypeError`), after part of the merged release might have been written.
+
+    :param merged_release: the merged release
+    :param file: a path (if it ends in ``.gz``, it is written with :mod:`gzip`), or a text or binary file object
+    """
+    with _Output(file) as write:
+        _write(merged_release, write)
+
+
+def dump_lines(merged_releases: Iterable[MergedRelease], file: str | os.PathLike[str] | IO[str] | IO[bytes]) -> None:
+    """
+    Write merged releases as JSON Lines, like :func:`~ocdsmerge.writer.dump`.
+
+    :param merged_releases: the merged releases
+    :param file: a path (if it ends in ``.gz``, it is written with :mod:`gzip`), or a text or binary file object
+    """
+    with _Output(file) as write:
+        for merged_release in merged_releases:
+            _write(merged_release, write)
+            write("\n")
+
+
+class _Output:
+    # A context manager that returns a function that writes text to the file, in blocks of BUFFER_SIZE characters.
+
+    def __init__(self, file: str | os.PathLike[str] | IO[str] | IO[bytes]):
+        self.owned = isinstance(file, (str, os.PathLike))
+        if self.owned:
+            opener = gzip.open if os.fspath(file).endswith(".gz") else open
+            self.file: IO[Any] = opener(file, "wt", encoding="utf-8")
+        else:
+            self.file = file
+        self.binary = not isinstance(self.file, io.TextIOBase)
+        self.parts: list[str] = []
+        self.size = 0
+
+    def __enter__(self) -> Callable[[str], None]:
+        return self.write
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        try:
+            if exc_type is None:
+                self.flush()
+        finally:
+            if self.owned:
+                self.file.close()
+
+    def write(self, text: str) -> None:
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size >= BUFFER_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        text = "".join(self.parts)
+        self.file.write(text.encode() if self.binary else text)
+        self.parts.clear()
+        self.size = 0
+
+
+def _write(merged_release: MergedRelease, write: Callable[[str], None]) -> None:
+    data = merged_release.data
+    encode = _VersionedEncoder(merged_release).encode if merged_release.versioned else _encode
+
+    # Group the paths by field, one level at a time, like MergedReleaseView, instead of building the structure of the
+    # merged release. Only the paths' lists of the objects being written are held in memory.
+    try:
+        _write_object(data, 0, None, data, encode, write)
+    except InconsistentTypeError:
+        # Raise the error of unflatten, with the values of the fields. The same fields have inconsistent types.
+        merged_release.asdict()
+        raise
+
+
+def _write_object(
+    keys: Iterable[Path],
+    depth: int,
+    id_value: Any,
+    data: Flattened,
+    encode: Callable[[Any], str],
+    write: Callable[[str], None],
+) -> None:
+    fields: dict[Identifier, list[Path]] = {}
+    # The fields in the order in which unflatten creates them: a null value doesn't create a field.
+    order: dict[Identifier, None] = {}
+    for key in keys:
+        # An object in an array can have no fields.
+        if len(key) > depth:
+            field = key[depth]
+            if field in fields:
+                fields[field].append(key)
+            else:
+                fields[field] = [key]
+            if field not in order and (len(key) > depth + 1 or data[key] is not None):
+                order[field] = None
+
+    write("{")
+    separator = ""
+    # The `id` of an object in an array is its original value, like in unflatten.
+    if id_value is not None:
+        order.pop("id", None)
+        write('"id": ')
+        write(_encode(id_value))
+        separator = ", "
+
+    depth += 1
+    for field in order:
+        paths = fields[field]
+        # This follows the logic of MergedReleaseView._resolve.
+        children = []
+        leaf = None
+        for key in paths:
+            if len(key) > depth:
+                children.append(key)
+            elif not children and data[key] is not None:
+                leaf = key
+
+        if not children:
+            value = data[paths[0]]
+            # Omit null'ed fields, like unflatten.
+            if value is None:
+                continue
+            write(separator)
+            write(_encode(field))
+            write(": ")
+            write(encode(value))
+        else:
+            is_array = type(children[0][depth]) is IdValue
+            # Like in unflatten, the objects in an array are appended to an earlier list: for example, the versioned
+            # values of a field that was null before it was an array.
+            literals = ""
+            if leaf is not None:
+                value = data[leaf]
+                if not is_array or type(value) is not list:
+                    raise InconsistentTypeError(f"/{'/'.join(map(str, paths[0][:depth]))} has inconsistent types")
+                literals = encode(value)[1:-1]
+            if any((type(key[depth]) is IdValue) is not is_array for key in children):
+                raise InconsistentTypeError(f"/{'/'.join(map(str, paths[0][:depth]))} has inconsistent types")
+            write(separator)
+            write(_encode(field))
+            write(": ")
+            if is_array:
+                _write_array(children, depth, data, encode, write, literals)
+            else:
+                _write_object(children, depth, None, data, encode, write)
+        separator = ", "
+    write("}")
+
+
+def _write_array(
+    keys: list[Path],
+    depth: int,
+    data: Flattened,
+    encode: Callable[[Any], str],
+    write: Callable[[str], None],
+    literals: str,
+) -> None:
+    # Group the paths by the objects in the array, in order.
+    items: dict[Identifier, tuple[Any, list[Path]]] = {}
+    for key in keys:
+        part = key[depth]
+        identifier = part.identifier
+        if identifier in items:
+            items[identifier][1].append(key)
+        else:
+            items[identifier] = (part.original_value, [key])
+
+    write("[")
+    write(literals)
+    separator = ", " if literals else ""
+    for original_value, paths in items.values():
+        write(separator)
+        _write_object(paths, depth + 1, original_value, data, encode, write)
+        separator = ", "
+    write("]")
+
+
+class _VersionedEncoder:
+    # Encodes history entries as versioned values, encoding each release's metadata once.
+
+    def __init__(self, merged_release: MergedRelease):
+        self.releases = merged_release.releases
+        self.prefixes: dict[int, str] = {}
+
+    def encode(self, value: Any) -> str:
+        if type(value) is not list:
+            return _encode(value)
+
+        prefixes = self.prefixes
+        entries = []
+        for index, entry_value in value:
+            prefix = prefixes.get(index)
+            if prefix is None:
+                release_id, date, tag = self.releases[index]
+                prefix = prefixes[index] = (
+                    f'{{"releaseID": {_encode(release_id)}, "releaseDate": {_encode(date)}, '
+                    f'"releaseTag": {_encode(tag)}, "value": '
+                )
+            entries.append(f"{prefix}{_encode(entry_value)}}}")
+        return f"[{', '.join(entries)}]"
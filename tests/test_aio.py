@@ -0,0 +1,66 @@
+import asyncio
+import os.path
+
+import pytest
+
+from ocdsmerge.aio import AsyncMerger
+from tests import load
+
+releases = load(os.path.join("1.1", "lists.json"))
+data = [dict(release, ocid=f"ocds-213czf-{i}") for i in range(10) for release in releases]
+
+
+async def produce(items, consumed):
+    for item in items:
+        consumed.append(item)
+        await asyncio.sleep(0)
+        yield item
+
+
+@pytest.mark.parametrize("processes", [False, True])
+@pytest.mark.parametrize("ordered", [True, False])
+@pytest.mark.parametrize("asynchronous", [True, False])
+def test_merge(asynchronous, ordered, processes, empty_merger):
+    expected = list(empty_merger.merge(data, versioned=True))
+
+    async def main():
+        async with AsyncMerger(empty_merger, processes=processes, max_workers=2) as async_merger:
+            items = produce(data, []) if asynchronous else data
+            return [result async for result in async_merger.merge(items, versioned=True, ordered=ordered)]
+
+    actual = asyncio.run(main())
+
+    if not ordered:
+        actual.sort(key=lambda result: int(result[0].rsplit("-", 1)[1]))
+
+    assert actual == expected
+
+
+def test_merge_backpressure(empty_merger):
+    consumed = []
+
+    async def main():
+        async with AsyncMerger(empty_merger, max_pending=2) as async_merger:
+            results = async_merger.merge(produce(data, consumed), grouped=True)
+            result = await anext(results)
+            await results.aclose()
+            return result
+
+    result = asyncio.run(main())
+
+    assert result == next(empty_merger.merge(data))
+    # The first two OCIDs are pending, and the third OCID's first release ends the second OCID's group.
+    assert len(consumed) == 2 * len(releases) + 1
+
+
+def test_create_merged_releases(empty_merger):
+    async def main():
+        async with AsyncMerger(empty_merger) as async_merger:
+            return await asyncio.gather(
+                async_merger.create_compiled_release(releases), async_merger.create_versioned_release(releases)
+            )
+
+    assert asyncio.run(main()) == [
+        empty_merger.create_compiled_release(releases),
+        empty_merger.create_versioned_release(releases),
+    ]
@@ -0,0 +1,86 @@
+import os.path
+from glob import glob
+
+import pytest
+
+from ocdsmerge import CompiledRelease, VersionedRelease
+from ocdsmerge.batch import flatten_releases
+from ocdsmerge.flatten import compile_rules
+from tests import load, path
+
+
+def test_flatten_releases():
+    releases = [
+        {"ocid": "A", "id": "1", "date": "2000-01-01", "tag": ["tender"], "a": "x", "b": [{"id": 1, "c": "y"}]},
+        {"ocid": "A", "id": "2", "date": "2000-01-02", "tag": ["award"], "a": "x", "d": "z"},
+        {"ocid": "A", "id": "3", "date": "2000-01-03", "a": "w"},
+    ]
+    merge_rules = {("id",): "omitWhenMerged", ("date",): "omitWhenMerged"}
+
+    batch = flatten_releases(releases, compile_rules(merge_rules, {}))
+
+    assert len(batch) == 9
+    assert batch.paths == [("ocid",), ("a",), ("b", "1", "id"), ("b", "1", "c"), ("d",)]
+    assert batch.releases == [
+        ("A", "1", "2000-01-01", ["tender"]),
+        ("A", "2", "2000-01-02", ["award"]),
+        ("A", "3", "2000-01-03", None),
+    ]
+    assert list(batch.path_ids) == [0, 1, 2, 3, 0, 1, 4, 0, 1]
+    assert list(batch.release_indexes) == [0, 0, 0, 0, 1, 1, 1, 2, 2]
+    assert batch.values == ["A", "x", 1, "y", "A", "x", "z", "A", "w"]
+
+    assert list(batch.last_rows()) == [7, 8, 2, 3, 6]
+    assert list(batch.changed_rows()) == [0, 1, 2, 3, 6, 8]
+    assert batch.rows_by_path() == [[0, 4, 7], [1, 5, 8], [2], [3], [6]]
+    assert batch.compiled() == {("ocid",): "A", ("a",): "w", ("b", "1", "id"): 1, ("b", "1", "c"): "y", ("d",): "z"}
+    assert batch.histories() == {
+        ("ocid",): [(0, "A")],
+        ("a",): [(0, "x"), (2, "w")],
+        ("b", "1", "id"): [(0, 1)],
+        ("b", "1", "c"): [(0, "y")],
+        ("d",): [(1, "z")],
+    }
+
+
+@pytest.mark.parametrize("cls", [CompiledRelease, VersionedRelease])
+@pytest.mark.parametrize("filename", glob(path(os.path.join("1.1", "*-versioned.json"))))
+def test_flat_extend(filename, cls, empty_merger):
+    releases = load(os.path.relpath(filename.replace("-versioned", ""), path("")))
+
+    expected = cls(merge_rules=empty_merger.merge_rules)
+    expected.extend(releases)
+
+    merged_release = cls(merge_rules=empty_merger.merge_rules)
+    merged_release.flat_extend(merged_release.flatten_releases(releases))
+
+    assert merged_release.asdict() == expected.asdict()
+    assert merged_release.get_state() == expected.get_state()
+
+
+def test_flat_extend_existing(empty_merger):
+    releases = load(os.path.join("1.1", "lists.json"))
+
+    expected = VersionedRelease(merge_rules=empty_merger.merge_rules, track_repeats=True)
+    expected.extend(releases)
+
+    merged_release = VersionedRelease(merge_rules=empty_merger.merge_rules, track_repeats=True)
+    merged_release.extend(releases[:1])
+    merged_release.flat_extend(merged_release.flatten_releases(releases[1:]))
+
+    assert merged_release.get_state() == expected.get_state()
+
+
+def test_flat_extend_unversioned_null(empty_merger):
+    data = {"ocid": "a", "x": None}
+    releases = [{"ocid": "a", "id": "1", "date": "2000", "x": 1}]
+
+    expected = VersionedRelease(data, merge_rules=empty_merger.merge_rules)
+    expected.extend(releases)
+
+    merged_release = VersionedRelease(data, merge_rules=empty_merger.merge_rules)
+    merged_release.flat_extend(merged_release.flatten_releases(releases))
+
+    # A path that isn't versioned is skipped, even if its value is null.
+    assert merged_release.data[("x",)] is None
+    assert merged_release.get_state() == expected.get_state()
@@ -0,0 +1,125 @@
+import json
+import os
+import re
+import warnings
+from glob import glob
+
+import pytest
+
+from ocdsmerge import APPEND, MERGE_BY_POSITION, Merger
+from ocdsmerge.codegen import generate_source, get_flatten_function, get_hash
+from ocdsmerge.exceptions import DuplicateIdValueWarning
+from ocdsmerge.flatten import IdentifierSequence, PathInterner, compile_rules, flatten_with_rules
+from ocdsmerge.rules import get_merge_rules
+from tests import load, path
+from tests.test_merge import get_test_cases
+
+rule_overrides = [
+    {},
+    {("awards",): APPEND, ("contracts", "implementation", "transactions"): MERGE_BY_POSITION},
+    {("parties",): MERGE_BY_POSITION, ("tender", "items"): APPEND},
+]
+
+
+@pytest.mark.parametrize(("filename", "schema"), get_test_cases())
+def test_merge(filename, schema):
+    merger = Merger(schema, specialize=True)
+
+    infix = "compiled" if filename.endswith("-compiled.json") else "versioned"
+
+    with open(filename) as f:
+        expected = json.load(f)
+    with open(re.sub(r"-(?:compiled|versioned)", "", filename)) as f:
+        releases = json.load(f)
+
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", category=DuplicateIdValueWarning)
+
+        actual = getattr(merger, f"create_{infix}_release")(releases)
+
+    assert actual == expected
+
+
+@pytest.mark.filterwarnings("ignore::ocdsmerge.exceptions.DuplicateIdValueWarning")
+@pytest.mark.parametrize("overrides", rule_overrides)
+@pytest.mark.parametrize("filename", glob(path(os.path.join("1.1", "*-versioned.json"))))
+def test_flatten(filename, overrides):
+    merge_rules = get_merge_rules()
+    rule_tree = compile_rules(merge_rules, overrides)
+    function = get_flatten_function(merge_rules, overrides)
+
+    for release in load(os.path.relpath(filename.replace("-versioned", ""), path(""))):
+        for versioned in (False, True):
+            kwargs = {"versioned": versioned, "on_collision": None}
+            expected = flatten_with_rules(release, rule_tree, {}, new_identifier=IdentifierSequence(), **kwargs)
+            actual = function(release, {}, new_identifier=IdentifierSequence(), **kwargs)
+
+            # The order of the paths is the order of the fields.
+            assert list(actual.items()) == list(expected.items())
+
+
+def test_flatten_unknown_fields():
+    merge_rules = {("a",): "omitWhenMerged", ("b", "c"): "wholeListMerge"}
+    overrides = {("b", "d"): APPEND}
+    data = {
+        "a": 1,
+        "b": {"c": [{"id": 1}], "d": [{"id": 1}, {"id": 1}], "e": [{"f": {"g": [1]}}]},
+        "x": [{"id": "1", "y": {"z": [{"id": 2}]}}],
+    }
+
+    function = get_flatten_function(merge_rules, overrides)
+    rule_tree = compile_rules(merge_rules, overrides)
+    expected = flatten_with_rules(data, rule_tree, {}, new_identifier=IdentifierSequence(), on_collision=None)
+
+    assert function(data, {}, new_identifier=IdentifierSequence(), on_collision=None) == expected
+    assert list(expected) == [
+        ("b", "c"),
+        ("b", "d", "\x001", "id"),
+        ("b", "d", "\x002", "id"),
+        ("b", "e", "\x003", "f", "g"),
+        ("x", "1", "id"),
+        ("x", "1", "y", "z", "2", "id"),
+    ]
+
+
+def test_flatten_interner():
+    merge_rules = get_merge_rules()
+    releases = load(os.path.join("1.1", "lists.json"))
+    function = get_flatten_function(merge_rules, {})
+    interner = PathInterner()
+
+    first = function(releases[0], {}, new_identifier=IdentifierSequence(), interner=interner)
+    second = function(releases[0], {}, new_identifier=IdentifierSequence(), interner=interner)
+
+    assert first == second
+    assert all(a is b for a, b in zip(first, second, strict=True))
+
+
+def test_merge_parallel(empty_merger):
+    releases = load(os.path.join("1.1", "lists.json"))
+    data = [dict(release, ocid=f"ocds-213czf-{i}") for i in range(4) for release in releases]
+    merger = Merger({}, specialize=True)
+
+    assert list(merger.merge_parallel(data, versioned=True, processes=2)) == list(
+        empty_merger.merge(data, versioned=True)
+    )
+
+
+def test_cache():
+    merge_rules = {("a",): "omitWhenMerged", ("b",): "wholeListMerge"}
+    reordered = {("b",): "wholeListMerge", ("a",): "omitWhenMerged"}
+
+    function = get_flatten_function(merge_rules, {})
+
+    assert get_flatten_function(reordered, {}) is function
+    assert get_flatten_function(merge_rules, {("c",): APPEND}) is not function
+    assert get_hash(merge_rules, {}) == get_hash(reordered, {})
+    assert get_hash(merge_rules, {("c",): APPEND}) != get_hash(merge_rules, {("c",): MERGE_BY_POSITION})
+
+
+def test_generate_source():
+    source = generate_source(compile_rules({("a",): "omitWhenMerged", ("b", "c"): "wholeListMerge"}, {}))
+
+    assert "_OMIT_1 = frozenset(['a'])" in source
+    assert "_CHILDREN_1 = {'b': _flatten_2}" in source
+    assert "_WHOLE_2 = frozenset(['c'])" in source
@@ -3,8 +3,9 @@ import warnings
 
 import pytest
 
-from ocdsmerge import APPEND, MERGE_BY_POSITION, Merger
+from ocdsmerge import APPEND, MERGE_BY_POSITION, DirectCompiledRelease, Merger
 from ocdsmerge.exceptions import DuplicateIdValueWarning
+from ocdsmerge.flatten import CollisionReport
 from tests import load
 
 releases = load(os.path.join("schema", "identifier-merge-duplicate-id.json"))
@@ -40,6 +41,37 @@ def test_ignore(empty_merger):
         empty_merger.create_compiled_release(releases)
 
 
+@pytest.mark.parametrize("direct", [False, True])
+def test_report(direct):
+    report = CollisionReport()
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")  # no unexpected warnings
+
+        if direct:
+            merged_release = DirectCompiledRelease(schema={}, on_collision=report.add)
+            merged_release.extend(releases + releases)
+            compiled_release = merged_release.asdict()
+        else:
+            merger = Merger(schema={}, on_collision=report.add)
+            compiled_release = merger.create_compiled_release(releases + releases)
+
+    assert compiled_release == load(os.path.join("schema", "identifier-merge-duplicate-id-compiled.json"))
+    assert list(report) == [("nested.identifierMerge", "1", 2), ("nested.array", "1", 2)]
+    assert len(report) == 2
+
+
+@pytest.mark.parametrize("direct", [False, True])
+def test_no_check(direct):
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")  # no unexpected warnings
+
+        if direct:
+            DirectCompiledRelease(schema={}, on_collision=None).extend(releases)
+        else:
+            Merger(schema={}, on_collision=None).create_compiled_release(releases)
+
+
 def test_merge_by_position():
     fields = ["identifierMerge", "array", "identifierMerge", "array"]
     string = "Multiple objects have the `id` value '1' in the `nested.{}` array"
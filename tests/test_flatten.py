@@ -1,4 +1,14 @@
-from ocdsmerge.flatten import flatten
+from ocdsmerge import APPEND, MERGE_BY_POSITION
+from ocdsmerge.flatten import (
+    IdentifierSequence,
+    PathInterner,
+    compile_rules,
+    dump_flattened,
+    flatten,
+    flatten_with_rules,
+    load_flattened,
+    unflatten,
+)
 
 
 def test_flatten_1():  # from documentation
@@ -28,3 +38,156 @@ def test_flatten_2():
     assert keys[1][0] == "a"
     assert len(keys[1][1]) == 36
     assert keys[1][2] == "key"
+
+
+def test_load_flattened():
+    data = {"a": [{"id": 1, "b": "c"}, {"id": "2"}, {"d": "e"}], "f": [{"id": "x"}]}
+
+    flattened = flatten(data, {}, {("f",): MERGE_BY_POSITION}, {})
+    actual = load_flattened(dump_flattened(flattened))
+
+    assert actual == flattened
+    for key, expected_key in zip(actual, flattened, strict=True):
+        for part, expected_part in zip(key, expected_key, strict=True):
+            assert type(part) is type(expected_part)
+            if type(part) is not str:
+                assert part.identifier == expected_part.identifier
+                assert part.original_value == expected_part.original_value
+
+
+def test_unflatten():
+    data = {
+        "a": [{"id": 1, "b": [{"id": "x", "c": "d"}, {"e": "f"}]}, {"id": 2, "g": {"h": "i"}}],
+        "j": {"k": {"l": "m"}, "n": None},
+    }
+    flattened = flatten(data, {}, {}, {}, new_identifier=IdentifierSequence())
+
+    assert unflatten(flattened) == {
+        "a": [{"id": 1, "b": [{"id": "x", "c": "d"}, {"e": "f"}]}, {"id": 2, "g": {"h": "i"}}],
+        "j": {"k": {"l": "m"}},
+    }
+
+    # Keys with the same prefix needn't be consecutive.
+    keys = list(flattened)
+    interleaved = {key: flattened[key] for key in keys[::2] + keys[1::2]}
+
+    assert unflatten(interleaved) == unflatten(flattened)
+
+
+def test_unflatten_list_value():
+    flattened = {("a",): [1], **flatten({"a": [{"id": "x"}]}, {}, {}, {})}
+
+    # Objects in an array are appended to an earlier list value, which isn't changed.
+    assert unflatten(flattened) == {"a": [1, {"id": "x"}]}
+    assert flattened[("a",)] == [1]
+
+
+def test_compile_rules():
+    merge_rules = {("a", "b"): "wholeListMerge", ("c",): "omitWhenMerged"}
+    rule_overrides = {("a",): MERGE_BY_POSITION}
+
+    root = compile_rules(merge_rules, rule_overrides)
+
+    assert list(root.children) == ["a", "c"]
+    assert root.children["a"].override == MERGE_BY_POSITION
+    assert root.children["a"].rule is None
+    assert root.children["a"].children["b"].rule == "wholeListMerge"
+    assert root.children["c"].rule == "omitWhenMerged"
+
+    data = {"a": [{"id": "x", "b": [{"id": 1}]}], "c": "omitted", "d": "e"}
+
+    assert flatten_with_rules(data, root, {}) == flatten(data, merge_rules, rule_overrides, {})
+    assert flatten(data, merge_rules, rule_overrides, {}) == {
+        ("a", "0", "b"): [{"id": 1}],
+        ("a", "0", "id"): "x",
+        ("d",): "e",
+    }
+
+
+def test_flatten_cached_rules():
+    merge_rules = {("a",): "omitWhenMerged"}
+    rule_overrides = {}
+    data = {"a": 1, "b": [{"id": "x"}]}
+
+    assert flatten(data, merge_rules, rule_overrides, {}) == {("b", "x", "id"): "x"}
+    assert flatten(data, merge_rules, rule_overrides, {}) == {("b", "x", "id"): "x"}
+
+    # The rules and overrides can be modified between calls.
+    merge_rules[("b",)] = "wholeListMerge"
+    rule_overrides[("a",)] = APPEND
+
+    assert flatten(data, merge_rules, rule_overrides, {}) == {("b",): [{"id": "x"}]}
+
+    del merge_rules[("a",)]
+
+    assert flatten(data, merge_rules, rule_overrides, {}) == {("a",): 1, ("b",): [{"id": "x"}]}
+
+
+def test_identifier_sequence():
+    data = {"a": [{"key": "value"}, {"key": "value"}], "b": [{"id": "x"}]}
+
+    flattened = flatten(data, {}, {("b",): APPEND}, {}, new_identifier=IdentifierSequence())
+
+    assert flattened == flatten(data, {}, {("b",): APPEND}, {}, new_identifier=IdentifierSequence())
+    assert [key[1].identifier for key in flattened] == ["\x001", "\x002", "\x003"]
+    assert [key[1].original_value for key in flattened] == [None, None, "x"]
+
+
+def test_path_interner():
+    data = {"a": [{"id": 1, "b": "c"}, {"d": "e"}], "f": [{"id": "x"}], "g": {"h": "i"}}
+    rule_overrides = {("f",): MERGE_BY_POSITION}
+    interner = PathInterner()
+
+    first = flatten(data, {}, rule_overrides, {}, new_identifier=IdentifierSequence(), interner=interner)
+    second = flatten(data, {}, rule_overrides, {}, new_identifier=IdentifierSequence(), interner=interner)
+
+    assert first == second == flatten(data, {}, rule_overrides, {}, new_identifier=IdentifierSequence())
+    for key, other in zip(first, second, strict=True):
+        # The paths of objects without `id` values are not interned.
+        if key[:2] == ("a", "\x001"):
+            assert key is not other
+        else:
+            assert key is other
+            assert all(part is other_part for part, other_part in zip(key, other, strict=True))
+
+    stats = interner.stats()
+
+    assert stats["paths"] == 9
+    assert stats["id_values"] == 2
+    assert stats["hits"] == 9
+    assert stats["misses"] == 13
+    assert stats["bytes"] > 0
+
+
+def test_path_interner_scope():
+    data = {"a": [{"id": 1, "b": "c"}, {"d": "e"}], "g": {"h": "i"}}
+    interner = PathInterner()
+
+    first = flatten(data, {}, {}, {}, new_identifier=IdentifierSequence(), interner=interner.scope())
+    second = flatten(data, {}, {}, {}, new_identifier=IdentifierSequence(), interner=interner.scope())
+
+    assert first == second
+    # Paths without `id` values are shared by the scopes.
+    assert [key is other for key, other in zip(first, second, strict=True)] == [False, False, False, True]
+    assert interner.stats()["paths"] == 3
+    assert interner.stats()["id_values"] == 0
+
+    # Paths with `id` values are interned by the scope.
+    scope = interner.scope()
+    first = flatten(data, {}, {}, {}, new_identifier=IdentifierSequence(), interner=scope)
+    second = flatten(data, {}, {}, {}, new_identifier=IdentifierSequence(), interner=scope)
+
+    assert [key is other for key, other in zip(first, second, strict=True)] == [True, True, False, True]
+    assert scope.stats()["paths"] == 3
+    assert scope.stats()["id_values"] == 1
+
+
+def test_path_interner_load_flattened():
+    data = {"a": [{"id": 1, "b": "c"}, {"d": "e"}], "f": [{"id": "x"}]}
+    interner = PathInterner()
+
+    flattened = flatten(data, {}, {("f",): APPEND}, {}, new_identifier=IdentifierSequence(), interner=interner)
+    actual = load_flattened(dump_flattened(flattened), interner)
+
+    assert actual == flattened
+    assert [key is other for key, other in zip(actual, flattened, strict=True)] == [True, True, False, False]
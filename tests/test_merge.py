@@ -7,7 +7,7 @@ from glob import glob
 
 import pytest
 
-from ocdsmerge import CompiledRelease, Merger, VersionedRelease
+from ocdsmerge import APPEND, MERGE_BY_POSITION, CompiledRelease, DirectCompiledRelease, Merger, VersionedRelease
 from ocdsmerge.exceptions import (
     DuplicateIdValueWarning,
     InconsistentTypeError,
@@ -16,6 +16,7 @@ from ocdsmerge.exceptions import (
     NonStringDateValueError,
     NullDateValueError,
 )
+from ocdsmerge.flatten import PathInterner
 from tests import load, path, schema_url, tags
 
 
@@ -128,7 +129,68 @@ def test_merge(filename, schema):
     assert actual == expected, f"{filename}\n{json.dumps(actual, indent=2)}"
 
 
-@pytest.mark.parametrize(("infix", "cls"), [("compiled", CompiledRelease), ("versioned", VersionedRelease)])
+@pytest.mark.parametrize(("filename", "schema"), [case for case in get_test_cases() if "-compiled" in case[0]])
+def test_direct_compiled_release(filename, schema):
+    merger = Merger(schema)
+
+    with open(filename) as f:
+        expected = json.load(f)
+    with open(filename.replace("-compiled", "")) as f:
+        releases = json.load(f)
+
+    original = deepcopy(releases)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")  # no unexpected warnings
+        if filename == os.path.join("tests", "fixtures", "schema", "identifier-merge-duplicate-id-compiled.json"):
+            warnings.filterwarnings("ignore", category=DuplicateIdValueWarning)
+
+        merged_release = DirectCompiledRelease(merge_rules=merger.merge_rules)
+        merged_release.extend(releases)
+
+    assert releases == original
+    assert json.dumps(merged_release.asdict()) == json.dumps(expected), filename
+
+
+@pytest.mark.filterwarnings("ignore::ocdsmerge.exceptions.DuplicateIdValueWarning")
+@pytest.mark.parametrize("rule_overrides", [{}, {("a",): APPEND}, {("a",): MERGE_BY_POSITION}])
+def test_direct_compiled_release_null_id(rule_overrides, empty_merger):
+    releases = [
+        {"date": "2000", "a": [{"id": None, "b": 1}, {"c": 2}, {"id": None, "d": 3}]},
+        {"date": "2001", "a": [{"id": None, "e": 4}, {"id": "x", "f": 5}]},
+    ]
+    kwargs = {"merge_rules": empty_merger.merge_rules, "rule_overrides": rule_overrides}
+
+    compiled_release = CompiledRelease(**kwargs)
+    compiled_release.extend(releases)
+    merged_release = DirectCompiledRelease(**kwargs)
+    merged_release.extend(releases)
+
+    assert merged_release.asdict() == compiled_release.asdict()
+
+
+def test_direct_compiled_release_inconsistent_type(empty_merger):
+    data = [
+        {"date": "2000-01-01T00:00:00Z", "integer": 1},
+        {"date": "2000-01-02T00:00:00Z", "integer": {"object": 1}},
+    ]
+
+    merged_release = DirectCompiledRelease(merge_rules=empty_merger.merge_rules)
+    merged_release.append(data[0])
+
+    with pytest.raises(InconsistentTypeError) as excinfo:
+        merged_release.append(data[1])
+
+    assert (
+        str(excinfo.value)
+        == "An earlier release had the value 1 for /integer, but the current release has an object with a 'object' key"
+    )
+
+
+@pytest.mark.parametrize(
+    ("infix", "cls"),
+    [("compiled", CompiledRelease), ("compiled", DirectCompiledRelease), ("versioned", VersionedRelease)],
+)
 def test_extend(infix, cls, empty_merger):
     expected = load(os.path.join("1.1", f"lists-{infix}.json"))
     releases = load(os.path.join("1.1", "lists.json"))
@@ -146,7 +208,10 @@ def test_extend(infix, cls, empty_merger):
     assert merger.asdict() == expected
 
 
-@pytest.mark.parametrize(("infix", "cls"), [("compiled", CompiledRelease), ("versioned", VersionedRelease)])
+@pytest.mark.parametrize(
+    ("infix", "cls"),
+    [("compiled", CompiledRelease), ("compiled", DirectCompiledRelease), ("versioned", VersionedRelease)],
+)
 def test_append(infix, cls, empty_merger):
     expected = load(os.path.join("1.1", f"lists-{infix}.json"))
     releases = load(os.path.join("1.1", "lists.json"))
@@ -280,3 +345,306 @@ def test_merge_when_array_is_mixed_without_schema(i, j, empty_merger):
             assert empty_merger.create_compiled_release(actual) == expected, (
                 f"removed item index {j} from release index {i}"
             )
+
+
+@pytest.mark.parametrize("grouped", [True, False])
+def test_merge_many_ocids(grouped, empty_merger):
+    releases = load(os.path.join("1.1", "lists.json"))
+    other = [dict(release, ocid="ocds-213czf-B") for release in releases]
+    expected_compiled = load(os.path.join("1.1", "lists-compiled.json"))
+    expected_versioned = load(os.path.join("1.1", "lists-versioned.json"))
+
+    # Release packages and releases can be mixed.
+    data = [{"uri": "http://example.com", "releases": releases}, *other]
+
+    actual = list(empty_merger.merge(data, versioned=True, grouped=grouped))
+
+    assert [ocid for ocid, _, _ in actual] == [releases[0]["ocid"], "ocds-213czf-B"]
+    assert actual[0][1] == expected_compiled
+    assert actual[0][2] == expected_versioned
+    assert actual[1][1] == empty_merger.create_compiled_release(other)
+    assert actual[1][2] == empty_merger.create_versioned_release(other)
+
+
+def test_merge_ungrouped(empty_merger):
+    releases = load(os.path.join("1.1", "lists.json"))
+    other = [dict(release, ocid="ocds-213czf-B") for release in releases]
+    data = [releases[0], other[0], releases[1], other[1]]
+
+    assert len(list(empty_merger.merge(data, grouped=True))) == 4
+    assert [result[1] for result in empty_merger.merge(data)] == [
+        load(os.path.join("1.1", "lists-compiled.json")),
+        empty_merger.create_compiled_release(other),
+    ]
+
+
+def test_merge_neither(empty_merger):
+    releases = load(os.path.join("1.1", "lists.json"))
+
+    assert list(empty_merger.merge(releases, compiled=False)) == [(releases[0]["ocid"], None, None)]
+
+
+@pytest.mark.parametrize("ordered", [True, False])
+def test_merge_parallel(ordered, empty_merger):
+    releases = load(os.path.join("1.1", "lists.json"))
+    data = [dict(release, ocid=f"ocds-213czf-{i}") for i in range(10) for release in releases]
+
+    expected = list(empty_merger.merge(data, versioned=True))
+    actual = list(empty_merger.merge_parallel(data, versioned=True, processes=2, chunksize=3, ordered=ordered))
+
+    if not ordered:
+        actual.sort(key=lambda result: int(result[0].rsplit("-", 1)[1]))
+
+    assert actual == expected
+
+
+@pytest.mark.parametrize("ordered", [True, False])
+def test_merge_parallel_max_pending(ordered, empty_merger):
+    releases = load(os.path.join("1.1", "lists.json"))
+    read = []
+
+    def generate():
+        for i in range(100):
+            read.append(i)
+            yield dict(releases[0], ocid=f"ocds-213czf-{i}")
+
+    results = empty_merger.merge_parallel(
+        generate(), grouped=True, processes=2, chunksize=2, ordered=ordered, max_pending=3
+    )
+    next(results)
+
+    # The first result is yielded once 3 chunks of 2 OCIDs are pending. The next OCID's release ends the last chunk.
+    assert len(read) == 7
+
+    assert len(list(results)) == 99
+
+
+@pytest.mark.parametrize("filename", glob(path(os.path.join("1.1", "*-versioned.json"))))
+def test_interner(filename, empty_merger):
+    releases = load(os.path.relpath(filename.replace("-versioned", ""), path("")))
+    data = [dict(release, ocid=f"ocds-213czf-{i}") for i in range(2) for release in releases]
+
+    interner = PathInterner()
+    merger = Merger(merge_rules=empty_merger.merge_rules, interner=interner)
+
+    assert list(merger.merge(data, versioned=True)) == list(empty_merger.merge(data, versioned=True))
+
+
+def test_interner_scope(empty_merger):
+    interner = PathInterner()
+    merger = Merger(merge_rules=empty_merger.merge_rules, interner=interner)
+
+    data = [
+        {"ocid": f"ocds-213czf-{i}", "date": "2000", "tender": {"title": "x"}, "awards": [{"id": str(i)}]}
+        for i in range(100)
+    ]
+    for _ in merger.merge(data, versioned=True):
+        pass
+
+    # Paths with `id` values aren't interned across OCIDs.
+    assert interner.stats()["paths"] == 4
+    assert interner.stats()["id_values"] == 0
+
+
+def test_interner_shared(empty_merger):
+    releases = load(os.path.join("1.1", "lists.json"))
+    interner = PathInterner()
+
+    first = CompiledRelease(merge_rules=empty_merger.merge_rules, interner=interner)
+    first.extend(releases)
+    second = VersionedRelease(merge_rules=empty_merger.merge_rules, interner=interner)
+    second.extend(releases)
+
+    shared = {id(key) for key in first.data}
+
+    assert interner.hits
+    assert all(id(key) in shared for key in second.data if len(key) > 1)
+
+
+@pytest.mark.parametrize(("infix", "cls"), [("compiled", CompiledRelease), ("versioned", VersionedRelease)])
+@pytest.mark.parametrize("filename", ["lists", os.path.join("..", "schema", "identifier-merge-no-id")])
+def test_state(filename, infix, cls, empty_merger):
+    releases = load(os.path.join("1.1", f"{filename}.json"))
+
+    merged_release = cls(merge_rules=empty_merger.merge_rules)
+    merged_release.extend(releases[:1])
+
+    state = json.loads(json.dumps(merged_release.get_state()))
+
+    merger = cls.from_state(state, merge_rules=empty_merger.merge_rules)
+
+    assert merger.get_state() == state
+
+    merger.extend(releases[1:])
+
+    assert merger.asdict() == getattr(empty_merger, f"create_{infix}_release")(releases)
+
+
+def sort_arrays(data):
+    if isinstance(data, dict):
+        return {key: sort_arrays(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return sorted((sort_arrays(item) for item in data), key=lambda item: json.dumps(item, sort_keys=True))
+    return data
+
+
+@pytest.mark.parametrize("filename", glob(path(os.path.join("1.1", "*-versioned.json"))))
+def test_insert(filename, empty_merger):
+    expected = load(os.path.relpath(filename, path("")))
+    releases = load(os.path.relpath(filename.replace("-versioned", ""), path("")))
+
+    merger = VersionedRelease(merge_rules=empty_merger.merge_rules, track_repeats=True)
+    for release in reversed(releases):
+        merger.insert(release)
+
+    # Objects in arrays are ordered by when they were first merged.
+    assert sort_arrays(merger.asdict()) == sort_arrays(expected)
+
+
+@pytest.mark.parametrize(
+    ("later", "earlier", "expected"),
+    [
+        # Fields are ordered by when they were first merged.
+        ({"b": 1}, {"a": 1}, ["b", "a"]),
+        # The null value's versioned values are before the array's objects.
+        ({"awards": None}, {"awards": [{"id": "1"}]}, ["awards"]),
+        (
+            {"tender": {"title": None}},
+            {"tender": {"title": {"x": 1}}},
+            (
+                "An earlier release had the value [{'releaseID': '2', 'releaseDate': '2001', 'releaseTag': None, "
+                "'value': None}] for /tender/title, but the current release has an object with a 'x' key"
+            ),
+        ),
+    ],
+)
+def test_insert_order(later, earlier, expected, empty_merger):
+    later = {"ocid": "a", "id": "2", "date": "2001", **later}
+    earlier = {"ocid": "a", "id": "1", "date": "2000", **earlier}
+
+    merger = VersionedRelease(merge_rules=empty_merger.merge_rules, track_repeats=True)
+    merger.append(later)
+    merger.insert(earlier)
+
+    sorted_merger = VersionedRelease(merge_rules=empty_merger.merge_rules, track_repeats=True)
+    sorted_merger.extend([later, earlier])
+
+    # The output differs from merging the releases in date order.
+    if isinstance(expected, str):
+        sorted_merger.asdict()
+        with pytest.raises(InconsistentTypeError) as excinfo:
+            merger.asdict()
+
+        assert str(excinfo.value) == expected
+    else:
+        actual = merger.asdict()
+
+        assert list(actual) == ["ocid", *expected]
+        assert json.dumps(actual) != json.dumps(sorted_merger.asdict())
+
+
+@pytest.mark.parametrize("filename", glob(path(os.path.join("1.1", "*-compiled.json"))))
+def test_compiled_insert(filename, empty_merger):
+    expected = load(os.path.relpath(filename, path("")))
+    releases = load(os.path.relpath(filename.replace("-compiled", ""), path("")))
+
+    merger = CompiledRelease(merge_rules=empty_merger.merge_rules, track_dates=True)
+    merger.append(releases[-1])
+    merger = CompiledRelease.from_state(
+        json.loads(json.dumps(merger.get_state())), merge_rules=empty_merger.merge_rules, track_dates=True
+    )
+    for release in reversed(releases[:-1]):
+        merger.insert(release)
+
+    # Objects in arrays are ordered by when they were first merged.
+    assert sort_arrays(merger.asdict()) == sort_arrays(expected)
+
+
+@pytest.mark.parametrize("cls", [CompiledRelease, VersionedRelease])
+def test_insert_no_date(cls, empty_merger):
+    releases = [
+        {"id": "1", "date": "2000-01-01T00:00:00Z", "initiationType": "x"},
+        {"id": "2", "date": None, "initiationType": "y"},
+    ]
+    kwargs = {"track_dates": True} if cls is CompiledRelease else {"track_repeats": True}
+
+    merger = cls(merge_rules=empty_merger.merge_rules, **kwargs)
+    merger.insert(releases[0])
+    # A release without a date is merged like append().
+    merger.insert(releases[1])
+
+    expected = cls(merge_rules=empty_merger.merge_rules)
+    for release in releases:
+        expected.append(release)
+
+    assert merger.asdict() == expected.asdict()
+
+
+def test_compiled_insert_changes(empty_merger):
+    merger = CompiledRelease(merge_rules=empty_merger.merge_rules, track_dates=True)
+    merger.append({"id": "2", "date": "2001", "initiationType": "x"})
+
+    changes = merger.insert({"id": "1", "date": "2000", "initiationType": "y", "title": "z"}, changes=True)
+
+    assert changes == {("title",): None}
+
+
+@pytest.mark.parametrize(
+    ("track_repeats", "expected"),
+    [
+        (True, [("1", "x"), ("2", "y"), ("3", "x")]),
+        (False, [("1", "x"), ("2", "y")]),
+    ],
+)
+def test_insert_repeats(track_repeats, expected, empty_merger):
+    releases = [
+        {"id": "1", "date": "2000-01-01T00:00:00Z", "initiationType": "x"},
+        {"id": "3", "date": "2000-01-03T00:00:00Z", "initiationType": "x"},
+        {"id": "2", "date": "2000-01-02T00:00:00Z", "initiationType": "y"},
+    ]
+
+    merger = VersionedRelease(merge_rules=empty_merger.merge_rules, track_repeats=track_repeats)
+    merger.extend(releases[:2])
+    merger = VersionedRelease.from_state(
+        json.loads(json.dumps(merger.get_state())),
+        merge_rules=empty_merger.merge_rules,
+        track_repeats=track_repeats,
+    )
+    merger.insert(releases[2])
+
+    actual = [(entry["releaseID"], entry["value"]) for entry in merger.asdict()["initiationType"]]
+
+    assert actual == expected
+    if track_repeats:
+        assert merger.asdict() == empty_merger.create_versioned_release(releases)
+
+
+@pytest.mark.parametrize("cls", [CompiledRelease, VersionedRelease])
+def test_reproducible(cls, empty_merger):
+    releases = load(os.path.join("schema", "identifier-merge-no-id.json"))
+
+    states = []
+    for _ in range(2):
+        merged_release = cls(merge_rules=empty_merger.merge_rules)
+        merged_release.extend(releases)
+        states.append(json.dumps(merged_release.get_state()))
+
+    assert states[0] == states[1]
+
+
+def test_versioned_release_history(empty_merger):
+    releases = load(os.path.join("1.1", "lists.json"))
+    expected = load(os.path.join("1.1", "lists-versioned.json"))
+
+    merged_release = VersionedRelease(merge_rules=empty_merger.merge_rules)
+    merged_release.extend(releases)
+
+    assert merged_release.releases == [(release["id"], release["date"], release["tag"]) for release in releases]
+    assert merged_release.data[("initiationType",)] == [(0, "tender")]
+    assert merged_release.asdict() == expected
+
+    # The metadata of the releases in an existing versioned release are stored once.
+    merged_release = VersionedRelease(expected, merge_rules=empty_merger.merge_rules)
+
+    assert merged_release.releases == [(release["id"], release["date"], release["tag"]) for release in releases]
+    assert merged_release.asdict() == expected
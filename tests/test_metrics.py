@@ -0,0 +1,150 @@
+import json
+import re
+
+import pytest
+
+from ocdsmerge import CompiledRelease, Merger, VersionedRelease
+from ocdsmerge.metrics import Metrics
+from tests.test_merge import get_test_cases
+
+releases = [
+    {
+        "ocid": "a",
+        "id": "1",
+        "date": "2000",
+        "tag": ["planning"],
+        "awards": [{"id": "x", "title": "t"}, {"title": "u"}],
+    },
+    {"ocid": "b", "id": "3", "date": "2001", "title": "w"},
+    {"ocid": "a", "id": "2", "date": "2001", "awards": [{"id": "x", "title": "v"}]},
+]
+
+counters = {
+    "a": {
+        "releases": 2,
+        "leaves": 7,
+        "arrays": 2,
+        "items_without_id": 1,
+        "identifiers": 1,
+        "versioned_entries": 4,
+    },
+    "b": {
+        "releases": 1,
+        "leaves": 2,
+        "arrays": 0,
+        "items_without_id": 0,
+        "identifiers": 0,
+        "versioned_entries": 1,
+    },
+}
+
+
+def split(metrics):
+    data = metrics.asdict()
+    timings = {key: data.pop(key) for key in list(data) if key.startswith("seconds_")}
+    return data, timings
+
+
+def test_merge():
+    calls = []
+    merger = Merger(schema={}, on_metrics=lambda ocid, metrics: calls.append((ocid, metrics)))
+
+    assert list(merger.merge(releases, versioned=True)) == list(Merger(schema={}).merge(releases, versioned=True))
+
+    assert [ocid for ocid, _ in calls] == ["a", "b"]
+    for ocid, metrics in calls:
+        data, timings = split(metrics)
+
+        assert data == counters[ocid]
+        assert set(timings) == {
+            "seconds_sorted_releases",
+            "seconds_flatten",
+            "seconds_flat_append",
+            "seconds_unflatten",
+        }
+        assert all(seconds > 0 for seconds in timings.values())
+
+
+def test_merge_compiled():
+    calls = []
+    merger = Merger(schema={}, on_metrics=lambda ocid, metrics: calls.append((ocid, metrics)))
+
+    list(merger.merge(releases))
+
+    data, _ = split(calls[0][1])
+
+    assert data == {**counters["a"], "versioned_entries": 0}
+
+
+@pytest.mark.parametrize(
+    ("method", "versioned_entries"), [("create_compiled_release", 0), ("create_versioned_release", 4)]
+)
+def test_create(method, versioned_entries):
+    calls = []
+    merger = Merger(schema={}, on_metrics=lambda ocid, metrics: calls.append((ocid, metrics)))
+
+    getattr(merger, method)([releases[0], releases[2]])
+
+    assert len(calls) == 1
+    assert calls[0][0] is None
+    data, _ = split(calls[0][1])
+
+    assert data == {**counters["a"], "versioned_entries": versioned_entries}
+
+
+def test_merged_release():
+    metrics = Metrics()
+    compiled_release = CompiledRelease(schema={}, metrics=metrics)
+    versioned_release = VersionedRelease(schema={}, metrics=metrics)
+
+    compiled_release.extend([releases[0], releases[2]])
+    changes = compiled_release.append({"ocid": "a", "id": "4", "date": "2002", "title": "z"}, changes=True)
+    versioned_release.extend([releases[0], releases[2]])
+
+    assert ("title",) in changes
+    assert compiled_release.asdict()["title"] == "z"
+    assert versioned_release.asdict()["awards"][1]["title"][0]["value"] == "u"
+
+    data, timings = split(metrics)
+
+    assert data == {
+        "releases": 5,
+        "leaves": 16,
+        "arrays": 4,
+        "items_without_id": 2,
+        "identifiers": 2,
+        "versioned_entries": 4,
+    }
+    assert all(seconds > 0 for seconds in timings.values())
+
+
+def test_disabled():
+    merger = Merger(schema={})
+    compiled_release = CompiledRelease(schema={})
+
+    assert merger.on_metrics is None
+    assert compiled_release.metrics is None
+
+
+def test_repr():
+    assert repr(Metrics()) == (
+        "Metrics({'releases': 0, 'leaves': 0, 'arrays': 0, 'items_without_id': 0, 'identifiers': 0, "
+        "'versioned_entries': 0, 'seconds_sorted_releases': 0.0, 'seconds_flatten': 0.0, 'seconds_flat_append': 0.0, "
+        "'seconds_unflatten': 0.0})"
+    )
+
+
+@pytest.mark.filterwarnings("ignore::ocdsmerge.exceptions.DuplicateIdValueWarning")
+@pytest.mark.parametrize(("filename", "schema"), get_test_cases())
+def test_output(filename, schema):
+    calls = []
+    merger = Merger(schema, on_metrics=lambda _, metrics: calls.append(metrics))
+    infix = "compiled" if filename.endswith("-compiled.json") else "versioned"
+
+    with open(filename) as f:
+        expected = json.load(f)
+    with open(re.sub(r"-(?:compiled|versioned)", "", filename)) as f:
+        data = json.load(f)
+
+    assert getattr(merger, f"create_{infix}_release")(data) == expected
+    assert calls[0].releases == len(data)
@@ -0,0 +1,113 @@
+import copy
+import json
+
+import pytest
+
+from ocdsmerge import MERGE_BY_POSITION, CompiledRelease, Merger
+from ocdsmerge.patch import json_patch
+from ocdsmerge.util import sorted_releases
+from tests.test_merge import get_test_cases
+
+
+def apply_patch(document, patch):
+    document = copy.deepcopy(document)
+    for operation in patch:
+        *parents, last = [part.replace("~1", "/").replace("~0", "~") for part in operation["path"].split("/")[1:]]
+        node = document
+        for part in parents:
+            node = node[int(part)] if isinstance(node, list) else node[part]
+        if operation["op"] == "remove":
+            del node[last]
+        elif isinstance(node, list):
+            assert operation["op"] == "add"
+            assert int(last) == len(node)
+            node.append(operation["value"])
+        else:
+            assert (operation["op"] == "replace") == (last in node)
+            node[last] = operation["value"]
+    return document
+
+
+@pytest.mark.filterwarnings("ignore::ocdsmerge.exceptions.DuplicateIdValueWarning")
+@pytest.mark.parametrize(("filename", "schema"), [case for case in get_test_cases() if "-compiled" in case[0]])
+def test_json_patch(filename, schema):
+    merger = Merger(schema)
+
+    with open(filename.replace("-compiled", "")) as f:
+        releases = json.load(f)
+
+    merged_release = CompiledRelease(merge_rules=merger.merge_rules)
+    for release in sorted_releases(releases):
+        before = merged_release.asdict()
+        flattened = dict(merged_release.data)
+
+        changes = merged_release.append(release, changes=True)
+
+        assert apply_patch(before, json_patch(merged_release.data, changes)) == merged_release.asdict()
+        assert set(changes) == {
+            key
+            for key, value in merged_release.data.items()
+            if key not in flattened or type(flattened[key]) is not type(value) or flattened[key] != value
+        }
+
+
+def test_json_patch_operations(empty_merger):
+    merged_release = CompiledRelease(merge_rules=empty_merger.merge_rules)
+    merged_release.append(
+        {
+            "ocid": "A",
+            "date": "2000-01-01T00:00:00Z",
+            "title/~": "x",
+            "awards": [{"id": "1", "status": "pending", "value": {"amount": 1}}],
+        }
+    )
+
+    changes = merged_release.append(
+        {
+            "ocid": "A",
+            "date": "2000-01-02T00:00:00Z",
+            "title/~": None,
+            "awards": [{"id": "1", "status": "active", "date": "2000-01-02T00:00:00Z"}, {"id": "2", "title": "y"}],
+        },
+        changes=True,
+    )
+
+    assert json_patch(merged_release.data, changes) == [
+        {"op": "replace", "path": "/id", "value": "A-2000-01-02T00:00:00Z"},
+        {"op": "replace", "path": "/date", "value": "2000-01-02T00:00:00Z"},
+        {"op": "remove", "path": "/title~1~0"},
+        {"op": "replace", "path": "/awards/0/status", "value": "active"},
+        {"op": "add", "path": "/awards/0/date", "value": "2000-01-02T00:00:00Z"},
+        {"op": "add", "path": "/awards/1", "value": {"id": "2", "title": "y"}},
+    ]
+    assert merged_release.append({"ocid": "A", "date": "2000-01-02T00:00:00Z"}, changes=True) == {}
+
+
+@pytest.mark.parametrize(
+    ("values", "expected"),
+    [
+        # An object, then a literal, which unflatten ignores.
+        ([{"p": 1}, 2], []),
+        # A null, then an object.
+        ([None, {"p": 1}], [{"op": "add", "path": "/a", "value": {"p": 1}}]),
+        # An object without an `id`, then an object with an `id`, at the same position.
+        (
+            [[{"p": 1}], [{"id": "1", "q": 2}]],
+            [
+                {"op": "add", "path": "/a/0/id", "value": "1"},
+                {"op": "add", "path": "/a/0/q", "value": 2},
+            ],
+        ),
+    ],
+)
+def test_json_patch_types(values, expected):
+    merged_release = CompiledRelease(schema={}, rule_overrides={("a",): MERGE_BY_POSITION})
+    for i, value in enumerate(values):
+        before = merged_release.asdict()
+
+        changes = merged_release.append({"ocid": "A", "date": str(i), "a": value}, changes=True)
+        patch = json_patch(merged_release.data, changes)
+
+        assert apply_patch(before, patch) == merged_release.asdict()
+
+    assert patch[2:] == expected
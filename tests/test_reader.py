@@ -0,0 +1,67 @@
+import gzip
+import io
+import json
+import os.path
+
+import pytest
+
+from ocdsmerge.reader import read_releases
+from tests import load
+
+releases = load(os.path.join("1.1", "lists.json"))
+
+
+def package(items):
+    return {"uri": "http://example.com", "version": "1.1", "releases": items, "publishedDate": "2000-01-01T00:00:00Z"}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 2**16])
+@pytest.mark.parametrize(
+    "data",
+    [
+        # JSON Lines
+        "\n".join(json.dumps(release) for release in releases) + "\n",
+        # A release package, with whitespace and non-ASCII characters.
+        json.dumps(package(releases), indent=2, ensure_ascii=False),
+        json.dumps(package(releases), ensure_ascii=True),
+        # A JSON Lines of release packages.
+        "\n".join(json.dumps(package([release])) for release in releases),
+        # An array of releases and release packages.
+        json.dumps([releases[0], package(releases[1:])]),
+        # Concatenated JSON.
+        "".join(json.dumps(release) for release in releases),
+    ],
+)
+def test_read_releases(data, chunk_size):
+    assert list(read_releases(io.BytesIO(data.encode()), chunk_size=chunk_size)) == releases
+    assert list(read_releases(io.StringIO(data), chunk_size=chunk_size)) == releases
+
+
+def test_read_releases_numbers():
+    data = '[{"a": 12345}, {"b": [1.5e10, -3]}]'
+
+    assert list(read_releases(io.StringIO(data), chunk_size=3)) == [{"a": 12345}, {"b": [1.5e10, -3]}]
+
+
+def test_read_releases_path(tmp_path):
+    filename = tmp_path / "releases.json.gz"
+    with gzip.open(filename, "wt") as f:
+        json.dump(package(releases), f)
+
+    assert list(read_releases(filename, chunk_size=100)) == releases
+    assert list(read_releases(str(filename))) == releases
+
+
+@pytest.mark.parametrize("data", ['{"releases": [{"a": 1} {"b": 2}]}', '{"releases": [{"a": 1}', "1", '[{"a": tru}]'])
+def test_read_releases_error(data):
+    with pytest.raises(json.JSONDecodeError):
+        list(read_releases(io.StringIO(data), chunk_size=4))
+
+
+def test_read_releases_merge(empty_merger):
+    data = "\n".join(json.dumps(dict(release, ocid=f"ocds-213czf-{i}")) for i in range(3) for release in releases)
+
+    actual = list(empty_merger.merge(read_releases(io.StringIO(data), chunk_size=100), grouped=True))
+
+    assert [ocid for ocid, _, _ in actual] == ["ocds-213czf-0", "ocds-213czf-1", "ocds-213czf-2"]
+    assert actual == list(empty_merger.merge(json.loads(line) for line in data.splitlines()))
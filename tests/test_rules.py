@@ -1,5 +1,9 @@
-from ocdsmerge.rules import get_merge_rules
-from tests import schema_url, tags
+import jsonref
+import pytest
+
+from ocdsmerge import rules
+from ocdsmerge.rules import BUNDLED_TAGS, get_bundled_merge_rules, get_merge_rules
+from tests import load, path, schema_url, tags
 
 
 def test_get_merge_rules_1_1():
@@ -50,3 +54,81 @@ def test_get_merge_rules_1_0():
         ("tender", "submissionMethod"): "wholeListMerge",
         ("tender", "tenderers"): "wholeListMerge",
     }
+
+
+@pytest.mark.parametrize("tag", BUNDLED_TAGS)
+def test_get_bundled_merge_rules(tag):
+    # To update the bundled merge rules, write `dump_merge_rules(get_merge_rules(...))` to the file.
+    assert get_bundled_merge_rules(tag) == get_merge_rules(path(f"release-schema-{tag}.json"))
+
+
+def test_get_merge_rules_default():
+    assert get_merge_rules() == get_bundled_merge_rules(BUNDLED_TAGS[-1])
+
+
+@pytest.mark.parametrize("loader", [path, load])
+def test_get_merge_rules_cache_dir(loader, tmp_path, monkeypatch):
+    schema = loader("schema.json")
+    expected = get_merge_rules(schema)
+
+    assert get_merge_rules(schema, cache_dir=tmp_path) == expected
+    assert len(list(tmp_path.iterdir())) == 1
+
+    # The cached merge rules are read, instead of determined.
+    monkeypatch.setattr(rules, "_get_merge_rules_from_dereferenced_schema", None)
+
+    assert get_merge_rules(schema, cache_dir=tmp_path) == expected
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+def test_get_merge_rules_cache_dir_url(tmp_path, monkeypatch):
+    url = "https://example.com/release-schema.json"
+    with open(path("schema.json"), "rb") as f:
+        content = f.read()
+
+    class Response:
+        def __init__(self):
+            self.content = content
+
+        def raise_for_status(self):
+            pass
+
+    monkeypatch.setattr(rules.requests, "get", lambda *args, **kwargs: Response())
+
+    expected = get_merge_rules(path("schema.json"))
+
+    assert get_merge_rules(url, cache_dir=tmp_path) == expected
+    assert len(list(tmp_path.iterdir())) == 1
+
+    def get(*args, **kwargs):
+        raise AssertionError("requests.get was called")
+
+    # The cached merge rules are read, without requesting the schema.
+    monkeypatch.setattr(rules.requests, "get", get)
+
+    assert get_merge_rules(url, cache_dir=tmp_path) == expected
+
+
+@pytest.mark.parametrize("filename", ["release-schema-1__0__3.json", "release-schema-1__1__4.json", "schema.json"])
+def test_get_merge_rules_without_dereferencing(filename):
+    schema = load(filename)
+
+    # jsonref.JsonRef is deprecated, but used for backwards-compatibility with jsonref 0.x.
+    assert get_merge_rules(schema) == get_merge_rules(jsonref.JsonRef.replace_refs(schema))
+
+
+def test_get_merge_rules_reused_definition():
+    schema = {
+        "properties": {
+            "a": {"$ref": "#/definitions/Ob~1ject"},
+            "b": {"type": "array", "items": {"$ref": "#/definitions/Ob~1ject"}},
+        },
+        "definitions": {
+            "Ob/ject": {
+                "type": "object",
+                "properties": {"id": {"type": "string"}, "c": {"type": "array", "items": {"type": "string"}}},
+            },
+        },
+    }
+
+    assert get_merge_rules(schema) == {("a", "c"): "wholeListMerge", ("b", "c"): "wholeListMerge"}
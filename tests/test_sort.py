@@ -0,0 +1,51 @@
+import os.path
+
+import pytest
+
+from ocdsmerge.exceptions import NullDateValueError
+from ocdsmerge.sort import sort_releases
+from tests import load
+
+releases = load(os.path.join("1.1", "lists.json"))
+
+
+def dataset():
+    # Interleave the releases of many OCIDs, with some releases having the same date.
+    return [
+        dict(release, ocid=f"ocds-213czf-{i % 7}", id=f"{i}-{release['id']}", date=release["date"][: 1 + i % 11])
+        for i in range(50)
+        for release in releases
+    ]
+
+
+@pytest.mark.parametrize("buffer_size", [1, 1000, 2**27])
+def test_sort_releases(buffer_size, tmp_path, monkeypatch):
+    monkeypatch.setattr("ocdsmerge.sort.MAX_FILES", 3)
+
+    data = dataset()
+
+    actual = list(sort_releases(data, buffer_size=buffer_size, directory=tmp_path))
+
+    assert actual == sorted(data, key=lambda release: (release["ocid"], release["date"]))
+    assert not os.listdir(tmp_path)
+
+
+def test_sort_releases_packages(tmp_path):
+    actual = list(sort_releases([{"releases": releases[::-1]}], buffer_size=1, directory=tmp_path))
+
+    assert actual == releases
+
+
+def test_sort_releases_merge(empty_merger):
+    data = dataset()
+
+    actual = list(empty_merger.merge(sort_releases(data, buffer_size=1000), grouped=True, versioned=True))
+
+    assert actual == sorted(empty_merger.merge(data, versioned=True), key=lambda result: result[0])
+
+
+def test_sort_releases_null_date(empty_merger):
+    data = [{"ocid": "A", "date": "2000-01-01"}, {"ocid": "B", "date": "2000-01-01"}, {"ocid": "A", "date": None}]
+
+    with pytest.raises(NullDateValueError):
+        list(empty_merger.merge(sort_releases(data, buffer_size=1), grouped=True))
@@ -0,0 +1,113 @@
+import os.path
+
+import pytest
+
+from ocdsmerge import Merger
+from ocdsmerge.merge import MergedRelease
+from ocdsmerge.store import Store
+from ocdsmerge.typecheck import TypeConflictReport
+from tests import load
+from tests.test_merge import sort_arrays
+
+releases = load(os.path.join("1.1", "lists.json"))
+
+
+def dataset():
+    return [dict(release, ocid=f"ocds-213czf-{i}") for i in range(3) for release in releases]
+
+
+@pytest.mark.parametrize(("compiled", "versioned"), [(True, False), (False, True), (True, True)])
+def test_upsert(compiled, versioned, tmp_path, empty_merger):
+    data = dataset()
+    expected = list(empty_merger.merge(data, compiled=compiled, versioned=versioned))
+
+    with Store(tmp_path / "store.db", empty_merger, compiled=compiled, versioned=versioned) as store:
+        first = list(store.upsert([release for release in data if release["id"] != releases[-1]["id"]], batch_size=2))
+
+        assert sorted({ocid for ocid, _, _ in first}) == ["ocds-213czf-0", "ocds-213czf-1", "ocds-213czf-2"]
+
+    with Store(tmp_path / "store.db", empty_merger, compiled=compiled, versioned=versioned) as store:
+        second = list(store.upsert([release for release in data if release["id"] == releases[-1]["id"]]))
+
+        assert second == expected
+        assert [store.get(ocid) for ocid, _, _ in expected] == expected
+        assert store.get("ocds-213czf-3") is None
+
+        # Merging the same releases changes nothing.
+        assert list(store.upsert(data, batch_size=5)) == []
+
+
+@pytest.mark.parametrize(("compiled", "versioned"), [(True, False), (False, True)])
+def test_upsert_late(compiled, versioned, empty_merger):
+    data = dataset()
+    expected = list(empty_merger.merge(data, compiled=compiled, versioned=versioned))
+
+    with Store(":memory:", empty_merger, compiled=compiled, versioned=versioned) as store:
+        for release in reversed(data):
+            list(store.upsert([release]))
+
+        # Objects in arrays are ordered by when they were first merged.
+        for result in expected:
+            assert sort_arrays(list(store.get(result[0]))) == sort_arrays(list(result))
+
+
+@pytest.mark.parametrize(("compiled", "versioned"), [(True, False), (False, True)])
+def test_upsert_changed(compiled, versioned, empty_merger):
+    release = {"ocid": "a", "id": "1", "date": "2001", "tender": {"title": "x"}}
+    # A null value for an absent field doesn't change a compiled release.
+    other = dict(release, id="2", tender={"title": "x", "value": None} if compiled else {"title": "x"})
+    late = {"ocid": "a", "id": "0", "date": "2000", "tender": {"title": "y"}}
+
+    with Store(":memory:", empty_merger, compiled=compiled, versioned=versioned) as store:
+        assert len(list(store.upsert([release]))) == 1
+        assert list(store.upsert([other])) == []
+        # A late release's fields are set by later releases in a compiled release, but not in a versioned release.
+        assert len(list(store.upsert([late]))) == (0 if compiled else 1)
+
+
+def test_upsert_rollback(empty_merger):
+    with Store(":memory:", empty_merger) as store:
+        results = store.upsert(dataset())
+        next(results)
+        results.close()
+
+        assert store.get("ocds-213czf-0") is None
+
+
+def test_upsert_flatten_once(monkeypatch, empty_merger):
+    calls = []
+    flatten_release = MergedRelease.flatten_release
+
+    def wrapper(self, release, **kwargs):
+        calls.append(release)
+        return flatten_release(self, release, **kwargs)
+
+    monkeypatch.setattr(MergedRelease, "flatten_release", wrapper)
+
+    data = dataset()
+    with Store(":memory:", empty_merger, compiled=True, versioned=True) as store:
+        list(store.upsert(data[:-1]))
+        list(store.upsert(data[-1:]))
+
+        # Each release is flattened once, for both merged releases.
+        assert calls == data
+
+        monkeypatch.undo()
+        expected = list(empty_merger.merge(data, compiled=True, versioned=True))
+
+        assert [store.get(ocid) for ocid, _, _ in expected] == expected
+
+
+def test_upsert_type_conflict():
+    data = [
+        {"ocid": "a", "id": "1", "date": "2000", "tender": None},
+        {"ocid": "a", "id": "2", "date": "2001", "tender": {"title": "x"}},
+    ]
+    expected_report = TypeConflictReport()
+    expected = list(Merger({}, on_type_conflict=expected_report.add).merge(data, compiled=True, versioned=True))
+
+    report = TypeConflictReport()
+    with Store(":memory:", Merger({}, on_type_conflict=report.add), compiled=True, versioned=True) as store:
+        # The release conflicts with the versioned release only.
+        assert list(store.upsert(data)) == expected
+        assert report.releases == expected_report.releases == [data[1]]
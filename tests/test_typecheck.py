@@ -0,0 +1,198 @@
+import json
+import re
+import warnings
+
+import pytest
+
+from ocdsmerge import CompiledRelease, Merger, VersionedRelease
+from ocdsmerge.exceptions import DuplicateIdValueWarning, InconsistentTypeError
+from ocdsmerge.flatten import IdValue, flatten
+from ocdsmerge.typecheck import TypeConflictReport, get_types, raise_type_conflict
+from tests.test_merge import get_test_cases
+
+releases = [
+    {"ocid": "a", "id": "1", "date": "2000", "tender": {"title": "x"}, "awards": [{"id": "1", "value": 1}]},
+    {"ocid": "a", "id": "2", "date": "2001", "tender": "y", "awards": [{"id": "1", "value": {"amount": 1}}]},
+    {"ocid": "a", "id": "3", "date": "2002", "tender": {"title": "z"}, "awards": {"id": "2"}},
+    {"ocid": "a", "id": "4", "date": "2003", "tender": {"title": "w"}, "awards": [{"id": "2", "value": 2}]},
+]
+
+
+@pytest.mark.parametrize(("filename", "schema"), get_test_cases())
+def test_consistent(filename, schema):
+    merger = Merger(schema, on_type_conflict=raise_type_conflict)
+
+    infix = "compiled" if filename.endswith("-compiled.json") else "versioned"
+
+    with open(filename) as f:
+        expected = json.load(f)
+    with open(re.sub(r"-(?:compiled|versioned)", "", filename)) as f:
+        data = json.load(f)
+
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", category=DuplicateIdValueWarning)
+
+        actual = getattr(merger, f"create_{infix}_release")(data)
+
+    assert actual == expected
+
+
+@pytest.mark.parametrize("method", ["create_compiled_release", "create_versioned_release"])
+def test_raise(method, empty_merger):
+    with pytest.raises(InconsistentTypeError):
+        getattr(empty_merger, method)(releases)
+
+    merger = Merger({}, on_type_conflict=raise_type_conflict)
+
+    with pytest.raises(InconsistentTypeError) as excinfo:
+        getattr(merger, method)(releases)
+
+    assert (
+        str(excinfo.value)
+        == "An earlier release had a literal for /awards/1/value, but the current release ('2') has an object"
+    )
+
+
+@pytest.mark.parametrize("versioned", [False, True])
+def test_report(versioned):
+    report = TypeConflictReport()
+    merger = Merger({}, on_type_conflict=report.add)
+
+    other = [dict(release, ocid="b") for release in releases]
+    actual = list(merger.merge(releases + other, versioned=versioned))
+
+    expected = list(Merger({}).merge([releases[0], releases[3], other[0], other[3]], versioned=versioned))
+
+    assert actual == expected
+    assert report.releases == [releases[1], releases[2], dict(releases[1], ocid="b"), dict(releases[2], ocid="b")]
+    # A literal for /tender, which was created as an object, is ignored.
+    assert list(report) == [
+        ("awards.value", "literal", "object", 2),
+        ("awards", "array", "object", 2),
+    ]
+    assert len(report) == 2
+
+
+def test_merged_release():
+    report = TypeConflictReport()
+    compiled_release = CompiledRelease(schema={}, on_type_conflict=report.add)
+
+    compiled_release.append(releases[0])
+    changes = compiled_release.append(releases[1], changes=True)
+    compiled_release.insert(releases[2])
+
+    assert changes == {}
+    assert report.releases == [releases[1], releases[2]]
+    assert compiled_release.asdict()["tender"] == {"title": "x"}
+
+
+def test_null(empty_merger):
+    data = [
+        {"ocid": "a", "id": "1", "date": "2000", "tender": "x"},
+        {"ocid": "a", "id": "2", "date": "2001", "tender": None},
+        {"ocid": "a", "id": "3", "date": "2002", "tender": {"title": "y"}},
+    ]
+    merger = Merger({}, on_type_conflict=raise_type_conflict)
+
+    # A null value removes a field from a compiled release.
+    assert merger.create_compiled_release(data) == empty_merger.create_compiled_release(data)
+    assert list(merger.merge(data)) == list(empty_merger.merge(data))
+    # A null value is in the field's history.
+    with pytest.raises(InconsistentTypeError):
+        merger.create_versioned_release(data)
+    with pytest.raises(InconsistentTypeError):
+        list(merger.merge(data, versioned=True))
+
+
+def test_merge_separately():
+    report = TypeConflictReport()
+    merger = Merger({}, on_type_conflict=report.add)
+
+    data = [
+        {"ocid": "a", "id": "1", "date": "2000", "tender": None},
+        {"ocid": "a", "id": "2", "date": "2001", "tender": {"title": "x"}},
+    ]
+    actual = list(merger.merge(data, compiled=True, versioned=True))
+
+    # The release conflicts with the versioned release only, in which the null value created a literal.
+    assert actual == [
+        (
+            "a",
+            Merger({}).create_compiled_release(data),
+            Merger({}).create_versioned_release(data[:1]),
+        )
+    ]
+    assert report.releases == [data[1]]
+    assert list(report) == [("tender", "literal", "object", 1)]
+
+
+@pytest.mark.parametrize("cls", [CompiledRelease, VersionedRelease])
+def test_state(cls):
+    report = TypeConflictReport()
+    merged_release = cls(schema={})
+    merged_release.append(releases[0])
+
+    restored = cls.from_state(merged_release.get_state(), schema={}, on_type_conflict=report.add)
+    restored.append(releases[1])
+
+    assert report.releases == [releases[1]]
+
+
+def test_get_types():
+    flattened = flatten({"a": [{"id": 1, "b": {"c": None}}], "d": [1, 2], "e": 1}, {}, {}, {})
+
+    assert get_types(flattened) == {
+        ("a", IdValue(1), "id"): "literal",
+        ("a", IdValue(1)): "object",
+        ("a",): "array",
+        ("a", IdValue(1), "b"): "object",
+        ("d",): "literal",
+        ("e",): "literal",
+    }
+
+
+@pytest.mark.parametrize(
+    ("cls", "values", "quarantined"),
+    [
+        # A null value for an object doesn't remove the object's fields from a compiled release.
+        (CompiledRelease, [{"q": 1}, None, [{"id": "1", "p": 1}]], [2]),
+        # A null value removes a literal, and is earlier than an object that is created later.
+        (CompiledRelease, [1, None, {"p": 1}], []),
+        (CompiledRelease, [None, {"p": 1}, 2], [2]),
+        (CompiledRelease, [{"p": 1}, None, 2], []),
+        # A null value is in the field's history.
+        (VersionedRelease, [None, {"p": [{"id": "1", "q": 1}]}, {}], [1]),
+        # A literal for a field that was created as an object is ignored.
+        (CompiledRelease, [{"p": 1}, 2, {"p": 3}], []),
+        (VersionedRelease, [{"p": 1}, 2, {"p": 3}], []),
+        # The objects of an array are appended to a list, like the versioned values of a field that was null.
+        (VersionedRelease, [None, [{"id": "1", "p": 1}]], []),
+        (CompiledRelease, [[1], [{"id": "1", "p": 1}], 2], [2]),
+        (CompiledRelease, [[1], [{"id": "1", "p": 1}], None, [2]], []),
+        (CompiledRelease, [1, [{"id": "1", "p": 1}]], [1]),
+    ],
+)
+def test_sequence(cls, values, quarantined):
+    report = TypeConflictReport()
+    merged_release = cls(schema={}, on_type_conflict=report.add)
+
+    releases = [{"ocid": "a", "id": str(i), "date": str(i), "a": value} for i, value in enumerate(values)]
+    for release in releases:
+        merged_release.append(release)
+
+    assert report.releases == [releases[i] for i in quarantined]
+    # The merged release has consistent types.
+    merged_release.asdict()
+
+
+@pytest.mark.parametrize("cls", [CompiledRelease, VersionedRelease])
+def test_flat_extend(cls):
+    report = TypeConflictReport()
+    merged_release = cls(schema={}, on_type_conflict=report.add)
+    merged_release.append({"ocid": "a", "id": "1", "date": "2000", "a": 1})
+
+    # The releases in a batch aren't checked, but the types of their fields are.
+    merged_release.flat_extend(merged_release.flatten_releases([{"ocid": "a", "id": "2", "date": "2001", "b": 1}]))
+    merged_release.append({"ocid": "a", "id": "3", "date": "2002", "b": {"c": 1}})
+
+    assert list(report) == [("b", "literal", "object", 1)]
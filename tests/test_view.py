@@ -0,0 +1,182 @@
+import json
+import re
+import warnings
+
+import pytest
+
+from ocdsmerge import CompiledRelease, Merger, VersionedRelease
+from ocdsmerge.exceptions import DuplicateIdValueWarning, InconsistentTypeError
+from ocdsmerge.view import MergedReleaseView
+from tests.test_merge import get_test_cases
+
+
+@pytest.mark.parametrize(("filename", "schema"), get_test_cases())
+def test_view(filename, schema):
+    merger = Merger(schema)
+    cls = CompiledRelease if filename.endswith("-compiled.json") else VersionedRelease
+
+    with open(filename) as f:
+        expected = json.load(f)
+    with open(re.sub(r"-(?:compiled|versioned)", "", filename)) as f:
+        releases = json.load(f)
+
+    merged_release = cls(merge_rules=merger.merge_rules)
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", category=DuplicateIdValueWarning)
+
+        merged_release.extend(releases)
+
+    view = merged_release.view()
+
+    assert isinstance(view, MergedReleaseView)
+    assert view.asdict() == expected
+    # The order of the fields is the same.
+    assert json.dumps(view.asdict()) == json.dumps(merged_release.asdict())
+
+
+def test_access(empty_merger):
+    merged_release = CompiledRelease(merge_rules=empty_merger.merge_rules)
+    merged_release.extend(
+        [
+            {
+                "ocid": "a",
+                "id": "1",
+                "date": "2000",
+                "tender": {"title": "x", "value": {"amount": 1}},
+                "awards": [{"id": "1", "suppliers": [{"name": "y"}]}, {"title": "z"}],
+            },
+            {"ocid": "a", "id": "2", "date": "2001", "tender": {"title": None}, "awards": [{"id": "1", "title": "w"}]},
+        ]
+    )
+
+    view = merged_release.view()
+    tender = view["tender"]
+    awards = view["awards"]
+
+    assert tender["value"]["amount"] == 1
+    assert "title" not in tender
+    assert list(tender) == ["value"]
+    assert len(tender) == 1
+    assert tender.get("title") is None
+    with pytest.raises(KeyError):
+        tender["title"]
+
+    assert type(awards) is tuple
+    assert [dict(award) for award in awards[1:]] == [{"title": "z"}]
+    assert list(awards[0]) == ["id", "suppliers", "title"]
+    assert awards[0]["id"] == "1"
+    assert awards[0]["suppliers"][0]["name"] == "y"
+    assert view["awards"] is awards
+
+    assert list(view) == ["tag", "id", "date", "ocid", "tender", "awards"]
+    assert repr(tender) == "MergedReleaseView({'value': {'amount': 1}})"
+
+
+def test_versioned(empty_merger):
+    merged_release = VersionedRelease(merge_rules=empty_merger.merge_rules)
+    merged_release.extend(
+        [
+            {"ocid": "a", "id": "1", "date": "2000", "tag": ["tender"], "tender": {"title": "x"}},
+            {"ocid": "a", "id": "2", "date": "2001", "tag": ["tenderUpdate"], "tender": {"title": "y"}},
+        ]
+    )
+
+    assert merged_release.view()["tender"]["title"] == [
+        {"releaseID": "1", "releaseDate": "2000", "releaseTag": ["tender"], "value": "x"},
+        {"releaseID": "2", "releaseDate": "2001", "releaseTag": ["tenderUpdate"], "value": "y"},
+    ]
+
+
+@pytest.mark.parametrize(
+    "releases",
+    [
+        [{"date": "2000", "a": 1}, {"date": "2001", "a": {"b": 1}}],
+        [{"date": "2000", "a": 1}, {"date": "2001", "a": [{"b": 1}]}],
+        [{"date": "2000", "a": {"b": 1}}, {"date": "2001", "a": [{"b": 1}]}],
+        [{"date": "2000", "a": [{"b": 1}]}, {"date": "2001", "a": {"b": 1}}],
+    ],
+)
+def test_inconsistent_type(releases, empty_merger):
+    merged_release = CompiledRelease(merge_rules=empty_merger.merge_rules)
+    merged_release.extend(releases)
+
+    with pytest.raises(InconsistentTypeError):
+        merged_release.asdict()
+
+    view = merged_release.view()
+
+    # Other fields can be read.
+    assert view["date"] == "2001"
+    with pytest.raises(InconsistentTypeError):
+        view["a"]
+
+
+@pytest.mark.parametrize("cls", [CompiledRelease, VersionedRelease])
+def test_copy(cls):
+    merged_release = cls(merge_rules={("a",): "wholeListMerge"})
+    merged_release.extend([{"ocid": "a", "id": "1", "date": "2000", "a": [{"b": [1]}], "c": [1]}])
+    expected = json.dumps(merged_release.asdict())
+
+    view = merged_release.view()
+    for field in ("a", "c"):
+        value = view[field]
+        if cls is VersionedRelease:
+            value[0]["releaseID"] = "x"
+            value = value[0]["value"]
+        value.append(2)
+        if field == "a":
+            value[0]["b"].append(2)
+
+    assert json.dumps(merged_release.asdict()) == expected
+    assert json.dumps(merged_release.view().asdict()) == expected
+
+
+def test_null_order(empty_merger):
+    # In a versioned release, a null value is in the field's history.
+    merged_release = CompiledRelease(merge_rules=empty_merger.merge_rules)
+    merged_release.extend(
+        [
+            {"ocid": "a", "id": "1", "date": "2000", "a": None, "b": 1},
+            {"ocid": "a", "id": "2", "date": "2001", "a": {"c": 1}},
+        ]
+    )
+
+    view = merged_release.view()
+
+    assert list(view) == list(merged_release.asdict())
+    assert json.dumps(view.asdict()) == json.dumps(merged_release.asdict())
+
+
+@pytest.mark.parametrize("cls", [CompiledRelease, VersionedRelease])
+def test_null_array(cls, empty_merger):
+    merged_release = cls(merge_rules=empty_merger.merge_rules)
+    merged_release.extend(
+        [
+            {"ocid": "a", "id": "1", "date": "2000", "awards": None},
+            {"ocid": "a", "id": "2", "date": "2001", "awards": [{"id": "a1", "title": "x"}]},
+        ]
+    )
+
+    view = merged_release.view()
+
+    # In a versioned release, the objects are appended to the versioned values, like in unflatten.
+    assert view.asdict() == merged_release.asdict()
+    assert view["awards"][-1]["id"] == "a1"
+
+
+def test_inconsistent_type_versioned(empty_merger):
+    merged_release = VersionedRelease(merge_rules=empty_merger.merge_rules)
+    merged_release.extend(
+        [
+            {"ocid": "a", "id": "1", "date": "2000", "a": None},
+            {"ocid": "a", "id": "2", "date": "2001", "a": {"b": 1}},
+        ]
+    )
+
+    with pytest.raises(InconsistentTypeError) as excinfo:
+        merged_release.view()["a"]
+
+    assert str(excinfo.value) == (
+        "An earlier release had the value [{'releaseID': '1', 'releaseDate': '2000', 'releaseTag': None, 'value': "
+        "None}] for /a, but the current release has an object with a 'b' key"
+    )
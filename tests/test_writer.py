@@ -0,0 +1,103 @@
+import gzip
+import io
+import json
+import os.path
+from glob import glob
+
+import pytest
+
+from ocdsmerge import CompiledRelease, VersionedRelease
+from ocdsmerge.exceptions import InconsistentTypeError
+from ocdsmerge.writer import dump, dump_lines
+from tests import load, path
+
+
+@pytest.mark.parametrize("cls", [CompiledRelease, VersionedRelease])
+@pytest.mark.parametrize("filename", glob(path(os.path.join("1.1", "*-versioned.json"))))
+def test_dump(filename, cls, empty_merger):
+    releases = load(os.path.relpath(filename.replace("-versioned", ""), path("")))
+
+    merged_release = cls(merge_rules=empty_merger.merge_rules)
+    merged_release.extend(releases)
+
+    text = io.StringIO()
+    dump(merged_release, text)
+
+    binary = io.BytesIO()
+    dump(merged_release, binary)
+
+    assert text.getvalue() == json.dumps(merged_release.asdict())
+    assert binary.getvalue() == text.getvalue().encode()
+
+
+def test_dump_lines(tmp_path, empty_merger):
+    merged_releases = []
+    for filename in ("lists", "contextual"):
+        merged_release = VersionedRelease(merge_rules=empty_merger.merge_rules)
+        merged_release.extend(load(os.path.join("1.1", f"{filename}.json")))
+        merged_releases.append(merged_release)
+
+    filename = tmp_path / "versioned.jsonl.gz"
+    dump_lines(merged_releases, filename)
+
+    with gzip.open(filename, "rt") as f:
+        assert [json.loads(line) for line in f] == [merged_release.asdict() for merged_release in merged_releases]
+
+
+@pytest.mark.parametrize(
+    ("cls", "releases"),
+    [
+        (
+            CompiledRelease,
+            [
+                {"date": "2000-01-01T00:00:00Z", "a": None, "b": [{"id": "1", "c": None}], "d": {"e": 1}},
+                {"date": "2000-01-02T00:00:00Z", "a": {"f": 1}, "b": [{"id": "1", "c": {"g": 1}}]},
+            ],
+        ),
+        *(
+            (
+                cls,
+                # A publisher clears a field with a null value.
+                [
+                    {"date": "2000-01-01T00:00:00Z", "awards": None},
+                    {"date": "2001-01-01T00:00:00Z", "awards": [{"id": "a1", "title": "x"}]},
+                ],
+            )
+            for cls in (CompiledRelease, VersionedRelease)
+        ),
+    ],
+)
+def test_dump_null(cls, releases, empty_merger):
+    merged_release = cls(merge_rules=empty_merger.merge_rules)
+    merged_release.extend(releases)
+
+    text = io.StringIO()
+    dump(merged_release, text)
+
+    # A null value doesn't create a field in a compiled release, and is a versioned value in a versioned release, like
+    # in unflatten.
+    assert text.getvalue() == json.dumps(merged_release.asdict())
+
+
+@pytest.mark.parametrize("cls", [CompiledRelease, VersionedRelease])
+def test_dump_inconsistent_type(cls, empty_merger):
+    merged_release = cls(merge_rules=empty_merger.merge_rules)
+    merged_release.extend(
+        [
+            {"date": "2000-01-01T00:00:00Z", "integer": 1},
+            {"date": "2000-01-02T00:00:00Z", "integer": {"object": 1}},
+        ]
+    )
+
+    with pytest.raises(InconsistentTypeError) as expected:
+        merged_release.asdict()
+    with pytest.raises(InconsistentTypeError) as excinfo:
+        dump(merged_release, io.StringIO())
+
+    # The error is the same as unflatten's.
+    assert str(excinfo.value) == str(expected.value)
+    if cls is CompiledRelease:
+        assert str(excinfo.value) == (
+            "An earlier release had the value 1 for /integer, but the current release has an object with a 'object' "
+            "key"
+        )